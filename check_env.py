@@ -23,6 +23,7 @@ def main() -> None:
         db = Database()
         db.connect()
         print(f"Conectado a {db.settings.db_engine} -> {db.settings.db_name}")
+        print("Diagnóstico:", db.diagnostics())
         # Basic DDL/DML test for sqlite
         if settings.db_engine == "sqlite":
             db.execute("CREATE TABLE IF NOT EXISTS test (id INTEGER PRIMARY KEY, name TEXT)")
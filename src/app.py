@@ -4,7 +4,8 @@ import tkinter as tk
 from typing import Type, Any
 
 from config.settings import configure_logging, get_settings
-from core.frame_manager import FrameManager, BaseScreen
+from core.database import Database, close_all_connections
+from core.frame_manager import FrameManager, BaseScreen, shutdown_executor
 from view.login_screen import LoginScreen
 
 
@@ -46,9 +47,18 @@ def main() -> None:
     print(f"DB_ENGINE: {s.db_engine}")
     if s.db_engine == "sqlite":
         print(f"DB_PATH: {s.sqlite_path}")
+        diag = Database().diagnostics()
+        print(
+            f"DB_PROFILE: {diag['profile']} (journal={diag['journal_mode']}, sync={diag['synchronous']}, "
+            f"mmap={diag['mmap_size']}, cache={diag['cache_size']}, busy={diag['busy_timeout']}ms)"
+        )
     else:
         print(f"DB_HOST: {s.db_host}:{s.db_port} DB_NAME: {s.db_name}")
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        shutdown_executor()
+        close_all_connections()
 
 
 if __name__ == "__main__":
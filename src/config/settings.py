@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import logging
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal
 
 try:  # pragma: no cover - optional import
     from dotenv import load_dotenv  # type: ignore
@@ -56,6 +56,93 @@ def get_env_bool(key: str, default: bool) -> bool:
     return default
 
 
+@dataclass(frozen=True, slots=True)
+class SqliteProfile:
+    """Perfil de rendimiento SQLite: se aplica como PRAGMAs en cada conexión nueva."""
+
+    name: str
+    journal_mode: str = "WAL"
+    synchronous: str = "FULL"
+    mmap_size: int = 0  # bytes; 0 desactiva lecturas memory-mapped
+    cache_size_kb: int = 2000
+    busy_timeout_ms: int = 5000
+    temp_store: str = "DEFAULT"
+    query_only: bool = False
+
+    def pragmas(self) -> list[tuple[str, Any]]:
+        # busy_timeout primero: cambiar journal_mode puede requerir esperar un lock
+        return [
+            ("busy_timeout", self.busy_timeout_ms),
+            ("journal_mode", self.journal_mode),
+            ("synchronous", self.synchronous),
+            ("mmap_size", self.mmap_size),
+            ("cache_size", -self.cache_size_kb),  # negativo = KiB en lugar de páginas
+            ("temp_store", self.temp_store),
+            ("query_only", int(self.query_only)),
+        ]
+
+
+SQLITE_PROFILES: dict[str, SqliteProfile] = {
+    # Durable ante cortes de luz; WAL evita que los lectores bloqueen a quien guarda
+    "desktop-safe": SqliteProfile(
+        name="desktop-safe",
+        journal_mode="WAL",
+        synchronous="FULL",
+        mmap_size=64 * 1024 * 1024,
+        cache_size_kb=8 * 1024,
+        busy_timeout_ms=5000,
+        temp_store="DEFAULT",
+    ),
+    # Cargas masivas/jobs: NORMAL en WAL sólo arriesga la última transacción ante un corte de luz
+    "high-throughput": SqliteProfile(
+        name="high-throughput",
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        mmap_size=256 * 1024 * 1024,
+        cache_size_kb=64 * 1024,
+        busy_timeout_ms=10000,
+        temp_store="MEMORY",
+    ),
+    # Reportes: conexión de sólo lectura con caché y mmap grandes
+    "read-only-reporting": SqliteProfile(
+        name="read-only-reporting",
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        mmap_size=512 * 1024 * 1024,
+        cache_size_kb=128 * 1024,
+        busy_timeout_ms=10000,
+        temp_store="MEMORY",
+        query_only=True,
+    ),
+}
+DEFAULT_SQLITE_PROFILE = "desktop-safe"
+
+_JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+_SYNCHRONOUS = ("OFF", "NORMAL", "FULL", "EXTRA")
+_TEMP_STORE = ("DEFAULT", "FILE", "MEMORY")
+
+
+def load_sqlite_profile() -> SqliteProfile:
+    """Perfil elegido con DB_PROFILE; cada valor puede sobrescribirse con su variable DB_*."""
+    name = get_env_str("DB_PROFILE", DEFAULT_SQLITE_PROFILE).lower()
+    base = SQLITE_PROFILES.get(name) or SQLITE_PROFILES[DEFAULT_SQLITE_PROFILE]
+
+    def choice(key: str, allowed: tuple[str, ...], default: str) -> str:
+        val = get_env_str(key, default).upper()
+        return val if val in allowed else default
+
+    return replace(
+        base,
+        journal_mode=choice("DB_JOURNAL_MODE", _JOURNAL_MODES, base.journal_mode),
+        synchronous=choice("DB_SYNCHRONOUS", _SYNCHRONOUS, base.synchronous),
+        mmap_size=max(0, get_env_int("DB_MMAP_SIZE", base.mmap_size)),
+        cache_size_kb=max(0, get_env_int("DB_CACHE_SIZE_KB", base.cache_size_kb)),
+        busy_timeout_ms=max(0, get_env_int("DB_BUSY_TIMEOUT_MS", base.busy_timeout_ms)),
+        temp_store=choice("DB_TEMP_STORE", _TEMP_STORE, base.temp_store),
+        query_only=get_env_bool("DB_QUERY_ONLY", base.query_only),
+    )
+
+
 @dataclass(slots=True)
 class Config:
     env: EnvName
@@ -71,6 +158,12 @@ class Config:
     data_dir: Path
     sqlite_path: Path
     log_level: str
+    db_pool_max_size: int
+    db_pool_timeout: int
+    db_pool_idle_seconds: int
+    sqlite_profile: SqliteProfile
+    db_slow_query_ms: int
+    db_query_stats: bool
 
 
 def _resolve_sqlite_path(base_dir: Path, data_dir: Path, db_name: str) -> Path:
@@ -131,6 +224,12 @@ def get_settings() -> Config:
         data_dir=data_dir,
         sqlite_path=sqlite_path,
         log_level=get_env_str("LOG_LEVEL", "INFO").upper(),
+        db_pool_max_size=max(1, get_env_int("DB_POOL_MAX_SIZE", 5)),
+        db_pool_timeout=max(0, get_env_int("DB_POOL_TIMEOUT", 30)),
+        db_pool_idle_seconds=max(0, get_env_int("DB_POOL_IDLE_SECONDS", 300)),
+        sqlite_profile=load_sqlite_profile(),
+        db_slow_query_ms=max(0, get_env_int("DB_SLOW_QUERY_MS", 200)),
+        db_query_stats=get_env_bool("DB_QUERY_STATS", False),
     )
     return cfg
 
@@ -2,15 +2,261 @@ from __future__ import annotations
 
 import logging
 import sqlite3
+import threading
+import time
+import uuid
 from contextlib import contextmanager
-from typing import Any, Iterable, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
 try:  # pragma: no cover - optional until PostgreSQL is used
     import psycopg2  # type: ignore
+    import psycopg2.extras  # type: ignore
 except Exception:  # noqa: S110 - acceptable for optional dependency
     psycopg2 = None  # type: ignore[assignment]
 
-from config.settings import get_settings, database_dsn
+from config.settings import Config, get_settings, database_dsn
+from core.query_monitor import get_query_monitor
+
+
+T = TypeVar("T")
+
+# Límite de parámetros por sentencia en SQLite < 3.32 (SQLITE_MAX_VARIABLE_NUMBER).
+# Usamos el valor histórico para ser portables entre builds.
+SQLITE_MAX_VARIABLES = 999
+
+
+def chunked(values: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Parte un iterable en listas de a lo sumo `size` elementos."""
+    chunk: List[T] = []
+    for v in values:
+        chunk.append(v)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def unique_violation(exc: BaseException) -> Optional[str]:
+    """
+    Si `exc` es una violación de unicidad devuelve qué la causó: en SQLite las columnas
+    ('terrenos.manzana, terrenos.numero_lote'), en PostgreSQL el nombre del constraint/índice.
+    Para cualquier otro error devuelve None.
+    """
+    if isinstance(exc, sqlite3.IntegrityError):
+        msg = str(exc)
+        prefix = "UNIQUE constraint failed:"
+        return msg[len(prefix):].strip() if msg.startswith(prefix) else None
+    if psycopg2 is not None and isinstance(exc, psycopg2.IntegrityError):
+        if getattr(exc, "pgcode", None) == "23505":
+            return getattr(getattr(exc, "diag", None), "constraint_name", None) or ""
+    return None
+
+
+class ConnectionManager:
+    """
+    Administrador de conexiones compartido por todo el proceso.
+    - SQLite: una conexión por hilo, reutilizada por todos los repositorios de ese hilo.
+    - PostgreSQL: pool acotado (max_size) con checkout/return y desalojo de conexiones ociosas.
+    Dentro de un mismo hilo, checkouts anidados devuelven la misma conexión (contador de referencias).
+    """
+
+    def __init__(self, settings: Config) -> None:
+        self.settings = settings
+        self.max_size = max(1, settings.db_pool_max_size)
+        self.timeout = settings.db_pool_timeout
+        self.idle_seconds = settings.db_pool_idle_seconds
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._local = threading.local()
+        self._generation = 0
+        # PostgreSQL: conexiones libres (conn, devuelta_en) y cantidad prestada
+        self._idle: List[Tuple[Any, float]] = []
+        self._in_use = 0
+        # SQLite: conexiones por hilo (para desalojar las de hilos terminados y cerrar todo)
+        self._sqlite_conns: List[Tuple[threading.Thread, Any]] = []
+
+    @property
+    def engine(self) -> str:
+        return self.settings.db_engine
+
+    # ---------- Checkout / return ----------
+    def acquire(self) -> Any:
+        """Devuelve la conexión asociada al hilo actual (la crea o la toma del pool si no hay)."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is not None and getattr(local, "generation", None) == self._generation:
+            local.refs += 1
+            return conn
+        conn = self._open_sqlite() if self.engine == "sqlite" else self._checkout()
+        local.conn = conn
+        local.refs = 1
+        local.generation = self._generation
+        local.tx_depth = 0
+        return conn
+
+    def release(self, conn: Any) -> None:
+        """Libera una referencia; en PostgreSQL la conexión vuelve al pool al llegar a cero."""
+        local = self._local
+        if getattr(local, "conn", None) is not conn:
+            return
+        local.refs = max(0, local.refs - 1)
+        if local.refs or self.engine == "sqlite":
+            # SQLite mantiene la conexión del hilo abierta para reutilizarla
+            return
+        local.conn = None
+        self._checkin(conn, local.generation)
+
+    # ---------- Estado de transacción del hilo ----------
+    @property
+    def tx_depth(self) -> int:
+        """Nivel de anidamiento de Database.transaction() en el hilo actual (0 = autocommit)."""
+        return getattr(self._local, "tx_depth", 0)
+
+    @tx_depth.setter
+    def tx_depth(self, value: int) -> None:
+        self._local.tx_depth = value
+
+    @property
+    def on_commit(self) -> List[Tuple[int, Callable[[], None]]]:
+        """Callbacks (nivel, fn) pendientes del commit externo en el hilo actual."""
+        pending = getattr(self._local, "on_commit", None)
+        if pending is None:
+            pending = self._local.on_commit = []
+        return pending
+
+    # ---------- SQLite ----------
+    def _open_sqlite(self) -> Any:
+        self._evict_dead_threads()
+        self.logger.info("Connecting DB: %s", database_dsn())
+        self.settings.sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+        # check_same_thread=False sólo para poder cerrar desde otro hilo al desalojar;
+        # el uso normal queda confinado al hilo dueño (threading.local).
+        conn = sqlite3.connect(self.settings.sqlite_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma, value in self.settings.sqlite_profile.pragmas():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        with self._lock:
+            self._sqlite_conns.append((threading.current_thread(), conn))
+        return conn
+
+    def _evict_dead_threads(self) -> None:
+        with self._lock:
+            alive = [(t, c) for t, c in self._sqlite_conns if t.is_alive()]
+            dead = [c for t, c in self._sqlite_conns if not t.is_alive()]
+            self._sqlite_conns = alive
+        for conn in dead:
+            self._safe_close(conn)
+
+    # ---------- PostgreSQL ----------
+    def _connect_postgres(self) -> Any:
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2-binary is required for PostgreSQL engine")
+        self.logger.info("Connecting DB: %s", database_dsn())
+        return psycopg2.connect(
+            host=self.settings.db_host,
+            port=self.settings.db_port,
+            user=self.settings.db_user,
+            password=self.settings.db_password,
+            dbname=self.settings.db_name,
+        )
+
+    def _checkout(self) -> Any:
+        deadline = time.monotonic() + self.timeout
+        with self._available:
+            self._evict_idle_locked()
+            while True:
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    self._in_use += 1
+                    return conn
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._available.wait(remaining):
+                    raise RuntimeError(f"Pool de conexiones agotado (max={self.max_size}).")
+        try:
+            return self._connect_postgres()
+        except Exception:
+            with self._available:
+                self._in_use -= 1
+                self._available.notify()
+            raise
+
+    def _checkin(self, conn: Any, generation: int) -> None:
+        with self._available:
+            self._in_use = max(0, self._in_use - 1)
+            if generation == self._generation and not getattr(conn, "closed", 0):
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._available.notify()
+        if conn is not None:
+            self._safe_close(conn)
+
+    def _evict_idle_locked(self) -> None:
+        if not self.idle_seconds:
+            return
+        limit = time.monotonic() - self.idle_seconds
+        stale = [c for c, ts in self._idle if ts < limit]
+        if stale:
+            self._idle = [(c, ts) for c, ts in self._idle if ts >= limit]
+            for conn in stale:
+                self._safe_close(conn)
+
+    # ---------- Cierre ----------
+    @staticmethod
+    def _safe_close(conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_all(self) -> None:
+        """Cierra todas las conexiones (fin de la app o tests). Las siguientes se abren de nuevo."""
+        with self._available:
+            self._generation += 1
+            conns = [c for _, c in self._sqlite_conns] + [c for c, _ in self._idle]
+            self._sqlite_conns = []
+            self._idle = []
+            self._available.notify_all()
+        self._local.conn = None
+        for conn in conns:
+            self._safe_close(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "engine": self.engine,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "sqlite_threads": len(self._sqlite_conns),
+            }
+
+
+_SYNCHRONOUS_NAMES = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}
+_TEMP_STORE_NAMES = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}
+
+_manager: Optional[ConnectionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_connection_manager() -> ConnectionManager:
+    """Singleton del administrador de conexiones (se configura con get_settings())."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager(get_settings())
+    return _manager
+
+
+def close_all_connections() -> None:
+    if _manager is not None:
+        _manager.close_all()
 
 
 class Database:
@@ -18,71 +264,276 @@ class Database:
 
     def __init__(self) -> None:
         self.settings = get_settings()
+        self.manager = get_connection_manager()
+        self.monitor = get_query_monitor()
         self.conn: Optional[Any] = None
 
     def connect(self) -> None:
-        """Establece la conexión según el motor configurado."""
+        """Fija una conexión compartida del administrador hasta llamar a close()."""
         if self.conn:
             return
-        logging.getLogger(__name__).info("Connecting DB: %s", database_dsn())
-        if self.settings.db_engine == "sqlite":
-            self.settings.sqlite_path.parent.mkdir(parents=True, exist_ok=True)
-            self.conn = sqlite3.connect(self.settings.sqlite_path)
-        elif self.settings.db_engine == "postgresql":
-            if psycopg2 is None:
-                raise RuntimeError("psycopg2-binary is required for PostgreSQL engine")
-            self.conn = psycopg2.connect(
-                host=self.settings.db_host,
-                port=self.settings.db_port,
-                user=self.settings.db_user,
-                password=self.settings.db_password,
-                dbname=self.settings.db_name,
-            )
-        else:
+        if self.settings.db_engine not in ("sqlite", "postgresql"):
             raise ValueError(f"Motor de base de datos no soportado: {self.settings.db_engine}")
-        self.conn.row_factory = sqlite3.Row if self.settings.db_engine == "sqlite" else None
+        self.conn = self.manager.acquire()
 
     def close(self) -> None:
+        """Devuelve la conexión al administrador (no cierra la conexión física compartida)."""
         if self.conn:
-            self.conn.close()
+            self.manager.release(self.conn)
             self.conn = None
 
     @contextmanager
-    def cursor(self):
-        """Context manager para abrir/cerrar el cursor automáticamente."""
-        if not self.conn:
-            self.connect()
-        assert self.conn is not None
-        cur = self.conn.cursor()
+    def _connection(self) -> Iterator[Any]:
+        if self.conn is not None:
+            yield self.conn
+            return
+        conn = self.manager.acquire()
         try:
-            yield cur
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
+            yield conn
         finally:
-            cur.close()
+            self.manager.release(conn)
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator["Database"]:
+        """
+        Unidad de trabajo: agrupa varias operaciones (de uno o más repositorios) en un solo commit.
+        Los repositorios del mismo hilo comparten la conexión, así que todos participan.
+        Anidar transaction() crea SAVEPOINTs: un error interno sólo deshace su bloque.
+        `immediate` (SQLite, sólo la transacción externa): BEGIN IMMEDIATE toma el lock de
+        escritura al inicio; escritores concurrentes esperan busy_timeout en lugar de fallar
+        al promover un lock de lectura.
+        Los callbacks de on_commit() registrados adentro corren tras el commit externo; los de
+        un bloque deshecho (rollback o ROLLBACK TO SAVEPOINT) se descartan.
+        """
+        with self._connection() as conn:
+            depth = self.manager.tx_depth
+            savepoint = f"sp_{depth}"
+            if depth == 0:
+                # psycopg2 abre la transacción implícitamente; SQLite necesita BEGIN explícito
+                if self.settings.db_engine == "sqlite" and not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            else:
+                conn.cursor().execute(f"SAVEPOINT {savepoint}")
+            self.manager.tx_depth = depth + 1
+            try:
+                yield self
+            except BaseException:
+                self.manager.tx_depth = depth
+                pending = self.manager.on_commit
+                pending[:] = [(level, fn) for level, fn in pending if level <= depth]
+                if depth == 0:
+                    conn.rollback()
+                else:
+                    cur = conn.cursor()
+                    cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                    cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+                raise
+            self.manager.tx_depth = depth
+            if depth == 0:
+                conn.commit()
+                self._run_on_commit()
+            else:
+                conn.cursor().execute(f"RELEASE SAVEPOINT {savepoint}")
+
+    def on_commit(self, fn: Callable[[], None]) -> None:
+        """Corre `fn` cuando la transacción en curso confirme (o ya mismo si no hay ninguna)."""
+        depth = self.manager.tx_depth
+        if depth == 0:
+            fn()
+        else:
+            self.manager.on_commit.append((depth, fn))
+
+    def _run_on_commit(self) -> None:
+        pending = self.manager.on_commit
+        callbacks = [fn for _, fn in pending]
+        pending.clear()
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception:  # el commit ya ocurrió: un aviso fallido no debe parecer un error de escritura
+                self.manager.logger.exception("Callback on_commit falló")
+
+    def diagnostics(self) -> dict:
+        """Valores efectivos del motor (PRAGMAs leídos de la conexión real) y estado del pool."""
+        info: dict[str, Any] = {"engine": self.settings.db_engine, "dsn": database_dsn()}
+        info["pool"] = self.manager.stats()
+        if self.settings.db_engine != "sqlite":
+            return info
+        info["profile"] = self.settings.sqlite_profile.name
+        with self._connection() as conn:
+            for pragma, _ in self.settings.sqlite_profile.pragmas():
+                row = conn.execute(f"PRAGMA {pragma}").fetchone()
+                info[pragma] = row[0] if row is not None else None
+        info["synchronous"] = _SYNCHRONOUS_NAMES.get(info["synchronous"], info["synchronous"])
+        info["temp_store"] = _TEMP_STORE_NAMES.get(info["temp_store"], info["temp_store"])
+        return info
+
+    def in_transaction(self) -> bool:
+        return self.manager.tx_depth > 0
+
+    @contextmanager
+    def cursor(self, name: Optional[str] = None):
+        """
+        Context manager para abrir/cerrar el cursor automáticamente.
+        `name` crea un cursor server-side en PostgreSQL (se ignora en SQLite).
+        """
+        with self._connection() as conn:
+            cur = conn.cursor(name=name) if name and self.settings.db_engine == "postgresql" else conn.cursor()
+            if self.manager.tx_depth > 0:
+                # dentro de transaction(): el commit/rollback lo decide la unidad de trabajo
+                try:
+                    yield cur
+                finally:
+                    cur.close()
+                return
+            try:
+                yield cur
+                conn.commit()
+            except BaseException:
+                # incluye GeneratorExit: un fetch_iter abandonado no deja la transacción abierta
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def _record(self, query: str, params: Optional[Iterable[Any]], started: float, rows: int) -> None:
+        self.monitor.record(query, params, (time.perf_counter() - started) * 1000.0, max(rows, 0))
 
     # --- Métodos de ayuda ---
-    def execute(self, query: str, params: Optional[Iterable[Any]] = None) -> None:
+    def execute(self, query: str, params: Optional[Iterable[Any]] = None) -> int:
+        """Ejecuta una sentencia y retorna la cantidad de filas afectadas (rowcount)."""
+        started = time.perf_counter()
         with self.cursor() as cur:
             cur.execute(query, params or [])
+            rows = cur.rowcount
+        self._record(query, params, started, rows)
+        return rows
+
+    def execute_in(self, query: str, values: Iterable[Any], params: Sequence[Any] = ()) -> int:
+        """
+        execute para sentencias `... IN ({ids})` (UPDATE/DELETE sobre un conjunto de ids):
+        una sentencia por trozo bajo el límite de parámetros, todo en una transacción.
+        `params` va antes de los valores del IN. Retorna el total de filas afectadas.
+        """
+        size = max(1, SQLITE_MAX_VARIABLES - len(params))
+        total = 0
+        with self.transaction():
+            for chunk in chunked(values, size):
+                marks = ",".join("?" * len(chunk))
+                total += max(0, self.execute(query.format(ids=marks), (*params, *chunk)))
+        return total
+
+    def execute_many(self, query: str, params_seq: Iterable[Iterable[Any]], page_size: int = 500) -> int:
+        """
+        Ejecuta la misma sentencia para cada juego de parámetros en una sola transacción
+        (executemany en SQLite; execute_batch por páginas en PostgreSQL). Retorna filas afectadas.
+        """
+        rows = [tuple(p) for p in params_seq]
+        if not rows:
+            return 0
+        started = time.perf_counter()
+        with self.transaction():
+            with self.cursor() as cur:
+                if self.settings.db_engine == "postgresql":
+                    psycopg2.extras.execute_batch(cur, query, rows, page_size=max(1, page_size))
+                    affected = len(rows)
+                else:
+                    cur.executemany(query, rows)
+                    affected = cur.rowcount
+        self._record(query, rows[0], started, affected)
+        return affected
+
+    def insert_many(self, query: str, params_seq: Iterable[Iterable[Any]]) -> List[int]:
+        """
+        INSERT masivo que retorna los ids generados en el orden de entrada (SQLite).
+        Dentro de la transacción nadie más puede escribir, así que los ids de una tabla
+        AUTOINCREMENT son consecutivos y terminan en last_insert_rowid().
+        No usar con INSERT OR IGNORE (las filas ignoradas no consumen id).
+        Para PostgreSQL, se reemplazará por RETURNING id.
+        """
+        rows = [tuple(p) for p in params_seq]
+        if not rows:
+            return []
+        with self.transaction():
+            self.execute_many(query, rows)
+            row = self.fetch_one("SELECT last_insert_rowid() AS id")
+        last = int(row["id"]) if row else 0
+        return list(range(last - len(rows) + 1, last + 1))
 
     def fetch_one(self, query: str, params: Optional[Iterable[Any]] = None) -> Optional[dict]:
+        started = time.perf_counter()
         with self.cursor() as cur:
             cur.execute(query, params or [])
             row = cur.fetchone()
-            return dict(row) if row is not None and self.settings.db_engine == "sqlite" else row
+        self._record(query, params, started, 0 if row is None else 1)
+        return dict(row) if row is not None and self.settings.db_engine == "sqlite" else row
 
     def fetch_all(self, query: str, params: Optional[Iterable[Any]] = None) -> list[dict]:
+        started = time.perf_counter()
         with self.cursor() as cur:
             cur.execute(query, params or [])
             rows = cur.fetchall()
-            if self.settings.db_engine == "sqlite":
-                return [dict(r) for r in rows]
-            return rows
+        self._record(query, params, started, len(rows))
+        if self.settings.db_engine == "sqlite":
+            return [dict(r) for r in rows]
+        return rows
+
+    def fetch_all_in(
+        self, query: str, values: Iterable[Any], params: Sequence[Any] = ()
+    ) -> list[dict]:
+        """
+        fetch_all para consultas `... IN ({ids})` con listas largas: `{ids}` se reemplaza por
+        los marcadores y la lista se parte en trozos bajo el límite de parámetros de SQLite.
+        `params` va antes de los valores del IN. El orden global sólo se respeta dentro de cada trozo.
+        """
+        size = max(1, SQLITE_MAX_VARIABLES - len(params))
+        result: list[dict] = []
+        for chunk in chunked(values, size):
+            marks = ",".join("?" * len(chunk))
+            result.extend(self.fetch_all(query.format(ids=marks), (*params, *chunk)))
+        return result
+
+    def existing_ids(self, table: str, ids: Iterable[Any]) -> set[int]:
+        """Subconjunto de `ids` que existe en `table` (por PK), con un SELECT id ... IN por trozo."""
+        unique = list(dict.fromkeys(int(i) for i in ids))
+        if not unique:
+            return set()
+        rows = self.fetch_all_in(f"SELECT id FROM {table} WHERE id IN ({{ids}})", unique)
+        return {int(r["id"]) for r in rows}
+
+    def fetch_iter(
+        self, query: str, params: Optional[Iterable[Any]] = None, batch_size: int = 500
+    ) -> Iterator[dict]:
+        """
+        Generador de filas con memoria acotada: trae de a `batch_size` filas
+        (fetchmany en SQLite, cursor server-side con nombre en PostgreSQL).
+        La conexión queda tomada hasta agotar o cerrar el generador.
+        """
+        batch_size = max(1, int(batch_size))
+        name = f"fetch_iter_{uuid.uuid4().hex}" if self.settings.db_engine == "postgresql" else None
+        count = 0
+        db_seconds = 0.0  # sólo tiempo en el motor, no el del consumidor entre lotes
+        try:
+            with self.cursor(name=name) as cur:
+                if name:
+                    cur.itersize = batch_size
+                t0 = time.perf_counter()
+                cur.execute(query, params or [])
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    db_seconds += time.perf_counter() - t0
+                    if not rows:
+                        break
+                    count += len(rows)
+                    if self.settings.db_engine == "sqlite":
+                        for r in rows:
+                            yield dict(r)
+                    else:
+                        yield from rows
+                    t0 = time.perf_counter()
+        finally:
+            self._record(query, params, time.perf_counter() - db_seconds, count)
 
     # --- Métodos legacy para compatibilidad con issues previos ---
     def execute_query(self, query: str, params: Iterable[Any] | None = None) -> None:
         self.execute(query, params)
-
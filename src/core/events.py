@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+CREADO = "CREADO"
+ACTUALIZADO = "ACTUALIZADO"
+ELIMINADO = "ELIMINADO"
+
+
+@dataclass(frozen=True, slots=True)
+class Cambio:
+    """
+    Una escritura ya confirmada sobre una entidad ("TERRENO", "EDIFICACION", "LOTEO", "RESERVA").
+    - `id` None: cambiaron filas no identificadas (p. ej. vínculos borrados en cascada);
+      quien escucha debe releer la entidad entera.
+    - `campos` vacío: no se sabe qué columnas cambiaron (alta, baja o cambio completo).
+    """
+
+    entidad: str
+    id: Optional[int]
+    accion: str = ACTUALIZADO
+    campos: FrozenSet[str] = field(default_factory=frozenset)
+
+    def toca(self, campos: Iterable[str]) -> bool:
+        """¿Puede afectar a alguno de `campos`? (sin información de columnas, se asume que sí)."""
+        return not self.campos or not self.campos.isdisjoint(campos)
+
+
+def cambio(entidad: str, id: Optional[int], accion: str = ACTUALIZADO, campos: Iterable[str] = ()) -> Cambio:
+    return Cambio(entidad, None if id is None else int(id), accion, frozenset(campos))
+
+
+Handler = Callable[[List[Cambio]], None]
+
+
+class EventBus:
+    """
+    Publicación/suscripción en proceso para avisar escrituras entre servicios, cachés y pantallas.
+    - Los servicios publican después del commit: dentro de Database.transaction() el aviso
+      se difiere hasta el commit externo y se descarta si hay rollback.
+    - Los handlers se llaman en el hilo que publicó, con la lista de cambios de esa escritura
+      (una operación masiva publica todos sus cambios juntos). Para tocar widgets usar ColaCambios.
+    - Un handler que falla se registra en el log y no afecta al resto ni a quien publicó.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subs: List[Tuple[Optional[FrozenSet[str]], Handler]] = []
+
+    def suscribir(self, entidades: Union[str, Sequence[str], None], handler: Handler) -> Callable[[], None]:
+        """Registra `handler` para esas entidades (None = todas). Devuelve la función para desuscribir."""
+        if isinstance(entidades, str):
+            entidades = (entidades,)
+        sub = (None if entidades is None else frozenset(entidades), handler)
+        with self._lock:
+            self._subs.append(sub)
+
+        def desuscribir() -> None:
+            with self._lock:
+                if sub in self._subs:
+                    self._subs.remove(sub)
+
+        return desuscribir
+
+    def publicar(self, cambios: Iterable[Cambio], db: Any = None) -> None:
+        """Entrega `cambios`; con `db` en transacción, recién cuando ésta confirma."""
+        cambios = list(cambios)
+        if not cambios:
+            return
+        if db is not None and db.in_transaction():
+            db.on_commit(lambda: self._entregar(cambios))
+        else:
+            self._entregar(cambios)
+
+    def _entregar(self, cambios: List[Cambio]) -> None:
+        with self._lock:
+            subs = list(self._subs)
+        for entidades, handler in subs:
+            propios = cambios if entidades is None else [c for c in cambios if c.entidad in entidades]
+            if not propios:
+                continue
+            try:
+                handler(propios)
+            except Exception:
+                logger.exception("Handler de eventos falló")
+
+
+def fusionar(cambios: Iterable[Cambio]) -> List[Cambio]:
+    """
+    Colapsa una ráfaga de cambios en uno por (entidad, id), en orden de primera aparición:
+    alta + modificaciones = alta; cualquier cosa + baja = baja; columnas acumuladas.
+    Un cambio sin id absorbe todos los de su entidad.
+    """
+    out: Dict[Tuple[str, Optional[int]], Cambio] = {}
+    todas: Dict[str, Cambio] = {}
+    for c in cambios:
+        if c.id is None:
+            prev = todas.get(c.entidad)
+            campos = c.campos if prev is None else _unir(prev.campos, c.campos)
+            todas[c.entidad] = Cambio(c.entidad, None, ACTUALIZADO, campos)
+            continue
+        key = (c.entidad, c.id)
+        prev = out.get(key)
+        if prev is None or c.accion == ELIMINADO:
+            out[key] = c
+        elif prev.accion == ELIMINADO:
+            out[key] = Cambio(c.entidad, c.id, c.accion, c.campos)  # id reutilizado
+        else:
+            accion = CREADO if prev.accion == CREADO else c.accion
+            out[key] = Cambio(c.entidad, c.id, accion, _unir(prev.campos, c.campos))
+    fusionados = [c for c in out.values() if c.entidad not in todas]
+    return fusionados + list(todas.values())
+
+
+def _unir(a: FrozenSet[str], b: FrozenSet[str]) -> FrozenSet[str]:
+    # vacío = "columnas desconocidas", que domina a cualquier conjunto concreto
+    return frozenset() if not a or not b else a | b
+
+
+@dataclass(slots=True)
+class Parche:
+    """Qué hacer en una vista de `entidad` ante una tanda de cambios (ver resumir())."""
+
+    recargar: bool = False
+    actualizar: List[int] = field(default_factory=list)
+    quitar: List[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return self.recargar or bool(self.actualizar) or bool(self.quitar)
+
+
+def resumir(
+    cambios: Iterable[Cambio],
+    entidad: str,
+    campos: Optional[Iterable[str]] = None,
+    max_filas: int = 500,
+) -> Parche:
+    """
+    Traduce cambios ya fusionados a un parche por filas para una vista de `entidad`.
+    - `campos`: columnas que la vista muestra; los cambios que no las tocan se ignoran.
+    - Más de `max_filas` filas a releer (o un cambio sin id) se resuelve con una recarga completa.
+    """
+    mostrados = None if campos is None else frozenset(campos)
+    p = Parche()
+    for c in cambios:
+        if c.entidad != entidad:
+            continue
+        if c.accion == ELIMINADO and c.id is not None:
+            p.quitar.append(c.id)
+        elif mostrados is not None and c.accion != CREADO and not c.toca(mostrados):
+            continue
+        elif c.id is None:
+            p.recargar = True
+        else:
+            p.actualizar.append(c.id)
+    if len(p.actualizar) > max_filas:
+        p.recargar = True
+    if p.recargar:
+        p.actualizar = []
+        p.quitar = []
+    return p
+
+
+class ColaCambios:
+    """
+    Junta los cambios que llegan del bus y los entrega fusionados, una vez por ráfaga, en el
+    hilo de Tk. Puede recibir desde cualquier hilo: sólo encola (nunca toca el widget) y un
+    poll con `widget.after(delay_ms)`, programado desde el hilo de Tk al crearla, vacía la
+    cola (como AsyncLoader). Así una operación masiva (o varias seguidas) produce un solo
+    repintado por pantalla. Crearla en el hilo de Tk; detener() corta el poll.
+    """
+
+    def __init__(self, widget: Any, handler: Handler, delay_ms: int = 50) -> None:
+        self.widget = widget
+        self.handler = handler
+        self.delay_ms = delay_ms
+        self._cola: "queue.SimpleQueue[Cambio]" = queue.SimpleQueue()
+        self._activa = True
+        self.widget.after(self.delay_ms, self._poll)
+
+    def __call__(self, cambios: List[Cambio]) -> None:
+        for c in cambios:
+            self._cola.put(c)
+
+    @property
+    def pendientes(self) -> int:
+        return self._cola.qsize()
+
+    def detener(self) -> None:
+        self._activa = False
+
+    def _poll(self) -> None:
+        if not self._activa:
+            return
+        cambios: List[Cambio] = []
+        while True:
+            try:
+                cambios.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+        if cambios:
+            try:
+                self.handler(fusionar(cambios))
+            except Exception:
+                logger.exception("Aplicación de cambios falló")
+        self.widget.after(self.delay_ms, self._poll)
+
+
+_bus: Optional[EventBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Bus compartido por servicios, cachés y pantallas."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = EventBus()
+        return _bus
@@ -1,15 +1,164 @@
 from __future__ import annotations
 
+import itertools
+import logging
+import queue
+import threading
 import tkinter as tk
-from typing import Type, Any, List, Optional, Dict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Type, Any, Callable, List, Optional, Dict, Sequence, Tuple, Union
+
+from core.events import Cambio, ColaCambios, get_event_bus
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Pool de hilos compartido por todas las pantallas para trabajo de base de datos."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="loader")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+class AsyncLoader:
+    """
+    Corre funciones bloqueantes (servicios/DB) en el pool y entrega el resultado en el hilo de Tk.
+    - Los workers nunca tocan widgets: dejan el resultado en una cola que se vacía con after().
+    - Coalescencia por clave: un pedido nuevo con la misma clave reemplaza al anterior
+      (si no empezó se cancela; si ya corre, su resultado se descarta). Sólo gana el último.
+    - cancel(): descarta resultados pendientes (p. ej. al salir de la pantalla).
+    - on_busy(True/False) avisa cuando empieza/termina la actividad, para indicadores de carga.
+    """
+
+    def __init__(
+        self,
+        widget: Any,
+        on_busy: Optional[Callable[[bool], None]] = None,
+        poll_ms: int = 30,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ) -> None:
+        self.widget = widget
+        self.on_busy = on_busy
+        self.poll_ms = poll_ms
+        self._executor = executor
+        self._results: "queue.Queue[Tuple[str, int, bool, Any]]" = queue.Queue()
+        self._tickets = itertools.count(1)
+        # clave -> (ticket vigente, future, on_done, on_error)
+        self._pending: Dict[str, Tuple[int, Future, Callable[[Any], None], Optional[Callable[[BaseException], None]]]] = {}
+        self._polling = False
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._pending)
+
+    def pending_keys(self) -> List[str]:
+        """Claves con un pedido todavía sin entregar."""
+        return list(self._pending)
+
+    def submit(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> int:
+        """Encola `fn()` en el pool; `on_done(resultado)` se llama luego en el hilo de Tk."""
+        was_busy = self.busy
+        previous = self._pending.get(key)
+        if previous is not None:
+            previous[1].cancel()
+        ticket = next(self._tickets)
+        future = (self._executor or get_executor()).submit(self._run, key, ticket, fn)
+        self._pending[key] = (ticket, future, on_done, on_error)
+        if not was_busy:
+            self._notify_busy(True)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+        return ticket
+
+    def cancel(self, key: Optional[str] = None) -> None:
+        """Descarta el pedido `key` (o todos). Un worker ya en curso termina, pero se ignora."""
+        keys = [key] if key is not None else list(self._pending)
+        for k in keys:
+            entry = self._pending.pop(k, None)
+            if entry is not None:
+                entry[1].cancel()
+        if keys and not self._pending:
+            self._notify_busy(False)
+
+    # ---------- internos ----------
+    def _run(self, key: str, ticket: int, fn: Callable[[], Any]) -> None:
+        try:
+            self._results.put((key, ticket, True, fn()))
+        except BaseException as exc:  # se entrega al hilo de Tk
+            self._results.put((key, ticket, False, exc))
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                key, ticket, ok, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            entry = self._pending.get(key)
+            if entry is None or entry[0] != ticket:
+                continue  # cancelado o reemplazado por un pedido más nuevo
+            del self._pending[key]
+            _, _, on_done, on_error = entry
+            try:
+                if ok:
+                    on_done(value)
+                elif on_error is not None:
+                    on_error(value)
+                else:
+                    logger.error("Carga '%s' falló", key, exc_info=value)
+            except Exception:
+                logger.exception("Callback de carga '%s' falló", key)
+            if not self._pending:
+                self._notify_busy(False)
+        if self._pending:
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _notify_busy(self, busy: bool) -> None:
+        if self.on_busy is not None:
+            try:
+                self.on_busy(busy)
+            except Exception:
+                logger.exception("on_busy falló")
 
 
 class BaseScreen(tk.Frame):
     """
     Base para todas las pantallas.
     Los screens pueden sobrescribir on_show/on_hide para cargar datos, focus, etc.
+    Para no congelar la ventana, las consultas pesadas van por load_async(); el FrameManager
+    cancela las cargas pendientes al ocultar la pantalla y las vuelve a pedir al mostrarla
+    (resume_loads), así una pantalla abandonada antes de su primera carga no queda vacía.
+    Con escuchar() la pantalla recibe los cambios que publican los servicios aunque esté
+    oculta en el caché del FrameManager, y parchea sólo las filas afectadas.
     """
 
+    _loader: Optional[AsyncLoader] = None
+    # último pedido por clave y los que cancel_loads() interrumpió: (fn, on_done, on_error)
+    _load_specs: Optional[Dict[str, Tuple[Callable[[], Any], Callable[[Any], None], Any]]] = None
+    _interrupted: Optional[Dict[str, Tuple[Callable[[], Any], Callable[[Any], None], Any]]] = None
+    _suscripciones: Optional[List[Callable[[], None]]] = None
+
     def on_show(self, *args: Any, **kwargs: Any) -> None:  # noqa: D401
         """Hook: se llama cuando la pantalla se vuelve visible."""
         pass
@@ -18,6 +167,82 @@ class BaseScreen(tk.Frame):
         """Hook: se llama justo antes de ocultar la pantalla."""
         pass
 
+    # ---------- Carga en segundo plano ----------
+    @property
+    def loader(self) -> AsyncLoader:
+        if self._loader is None:
+            self._loader = AsyncLoader(self, on_busy=self.set_busy)
+        return self._loader
+
+    def load_async(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> int:
+        """Corre `fn` fuera del hilo de Tk y llama `on_done(resultado)` en él. Ver AsyncLoader."""
+        if self._load_specs is None:
+            self._load_specs = {}
+        self._load_specs[key] = (fn, on_done, on_error)
+        if self._interrupted:
+            self._interrupted.pop(key, None)  # un pedido nuevo reemplaza al interrumpido
+        return self.loader.submit(key, fn, on_done, on_error or self._on_load_error)
+
+    def cancel_loads(self) -> None:
+        """Descarta las cargas en curso; resume_loads() las vuelve a pedir."""
+        if self._loader is None:
+            return
+        specs = self._load_specs or {}
+        pending = {k: specs[k] for k in self._loader.pending_keys() if k in specs}
+        if pending:
+            self._interrupted = {**(self._interrupted or {}), **pending}
+        self._loader.cancel()
+
+    def resume_loads(self) -> None:
+        """Repite las cargas que cancel_loads() cortó antes de entregar su resultado."""
+        interrupted, self._interrupted = self._interrupted or {}, None
+        for key, (fn, on_done, on_error) in interrupted.items():
+            self.load_async(key, fn, on_done, on_error)
+
+    def set_busy(self, busy: bool) -> None:
+        """Indicador de carga por defecto: cursor de espera sobre la pantalla."""
+        try:
+            self.configure(cursor="watch" if busy else "")
+        except tk.TclError:
+            pass
+
+    # ---------- Cambios de otras pantallas/servicios ----------
+    def escuchar(
+        self,
+        entidades: Union[str, Sequence[str]],
+        handler: Callable[[List[Cambio]], None],
+        delay_ms: int = 50,
+    ) -> None:
+        """Suscribe `handler` al bus; recibe los cambios fusionados por ráfaga, en el hilo de Tk."""
+        if self._suscripciones is None:
+            self._suscripciones = []
+        cola = ColaCambios(self, handler, delay_ms=delay_ms)
+        desuscribir = get_event_bus().suscribir(entidades, cola)
+
+        def cerrar() -> None:
+            desuscribir()
+            cola.detener()
+
+        self._suscripciones.append(cerrar)
+
+    def destroy(self) -> None:
+        for cerrar in self._suscripciones or []:
+            cerrar()
+        self._suscripciones = None
+        super().destroy()
+
+    def _on_load_error(self, exc: BaseException) -> None:
+        from tkinter import messagebox
+
+        logger.error("Error cargando datos", exc_info=exc)
+        messagebox.showerror("Error", f"No se pudieron cargar los datos: {exc}")
+
 
 class FrameManager:
     """
@@ -49,6 +274,20 @@ class FrameManager:
             scr.grid(row=0, column=0, sticky="nsew")
         return scr
 
+    @staticmethod
+    def _hide(screen: BaseScreen) -> None:
+        # Llamar hook si existe y descartar cargas en curso: sus resultados ya no se verían
+        getattr(screen, "on_hide", lambda: None)()
+        getattr(screen, "cancel_loads", lambda: None)()
+        screen.grid_remove()
+
+    @staticmethod
+    def _show(screen: BaseScreen, *args: Any, **kwargs: Any) -> None:
+        getattr(screen, "on_show", lambda *a, **k: None)(*args, **kwargs)
+        # retomar cargas cortadas al ocultarla (p. ej. la primera, si se salió antes de que termine)
+        getattr(screen, "resume_loads", lambda: None)()
+        screen.grid()  # vuelve a mostrarse en su misma celda
+
     def current(self) -> Optional[BaseScreen]:
         return self._stack[-1] if self._stack else None
 
@@ -58,15 +297,12 @@ class FrameManager:
         # ocultar actual
         current = self.current()
         if current is not None:
-            # Llamar hook si existe
-            getattr(current, "on_hide", lambda: None)()
-            current.grid_remove()
+            self._hide(current)
 
         # obtener/crear target
         target = self._get_or_create(screen_class, *args, **kwargs)
         # pasar parámetros a on_show si existe
-        getattr(target, "on_show", lambda *a, **k: None)(*args, **kwargs)
-        target.grid()  # vuelve a mostrarse en su misma celda
+        self._show(target, *args, **kwargs)
         self._stack.append(target)
         return target
 
@@ -78,25 +314,21 @@ class FrameManager:
 
         top = self._stack.pop()
         # ocultar la actual
-        getattr(top, "on_hide", lambda: None)()
-        top.grid_remove()
+        self._hide(top)
 
         # mostrar la anterior
         prev = self._stack[-1]
-        getattr(prev, "on_show", lambda: None)()
-        prev.grid()
+        self._show(prev)
         return prev
 
     def replace(self, screen_class: Type[BaseScreen], *args: Any, **kwargs: Any) -> BaseScreen:
         """Reemplaza la pantalla actual por otra (no aumenta profundidad del stack)."""
         if self._stack:
             current = self._stack.pop()
-            getattr(current, "on_hide", lambda: None)()
-            current.grid_remove()
+            self._hide(current)
 
         target = self._get_or_create(screen_class, *args, **kwargs)
-        getattr(target, "on_show", lambda *a, **k: None)(*args, **kwargs)
-        target.grid()
+        self._show(target, *args, **kwargs)
         self._stack.append(target)
         return target
 
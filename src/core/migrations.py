@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import sqlite3
 from typing import List
 
 from core.database import Database
@@ -35,9 +36,37 @@ class MigrationManager:
             self.logger.info(f"✅ Migración '{name}' ya aplicada.")
             return
         self.logger.info(f"🚀 Aplicando migración '{name}'...")
-        # Permitir múltiples sentencias separadas por ';' en un mismo archivo
-        statements = [s.strip() for s in sql.split(";") if s.strip()]
-        for stmt in statements:
-            self.db.execute(stmt)
-        self.db.execute("INSERT INTO migrations (name) VALUES (?)", (name,))
+        statements = split_statements(sql)
+        # Todo o nada: si una sentencia falla, la migración no queda a medio aplicar
+        with self.db.transaction():
+            for stmt in statements:
+                self.db.execute(stmt)
+            self.db.execute("INSERT INTO migrations (name) VALUES (?)", (name,))
         self.logger.info(f"✅ Migración '{name}' aplicada correctamente.")
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Separa un script en sentencias. Un ';' sólo cierra la sentencia si ésta queda completa
+    (sqlite3.complete_statement), así no se cortan triggers BEGIN ... END ni literales con ';'.
+    """
+    statements: List[str] = []
+    buf = ""
+    for piece in sql.split(";"):
+        buf += piece + ";"
+        if sqlite3.complete_statement(buf):
+            if _has_code(buf):
+                statements.append(buf.strip())
+            buf = ""
+    if _has_code(buf[:-1]):
+        statements.append(buf[:-1].strip())
+    return statements
+
+
+def _has_code(text: str) -> bool:
+    """True si el fragmento tiene algo más que espacios, comentarios '--' y ';'."""
+    for line in text.splitlines():
+        code = line.split("--", 1)[0].strip().strip(";").strip()
+        if code:
+            return True
+    return False
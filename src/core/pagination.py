@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Generic, Iterable, List, Literal, Mapping, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+Order = Literal["asc", "desc"]
+
+
+@dataclass(slots=True)
+class Page(Generic[T]):
+    """Una página de resultados con token para pedir la siguiente (None = última página)."""
+
+    items: List[T] = field(default_factory=list)
+    next_token: Optional[str] = None
+    next_after_id: Optional[int] = None
+    total_estimate: Optional[int] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_token is not None
+
+
+def encode_token(last_id: int, order: Order, values: Sequence[Any] = ()) -> str:
+    """Token opaco; `values` son las columnas de orden de la última fila (paginación por clave)."""
+    if values:
+        raw = json.dumps([order, int(last_id), list(values)], ensure_ascii=False).encode("utf-8")
+    else:
+        raw = f"{order}:{int(last_id)}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode(token: str) -> Tuple[int, Order, Tuple[Any, ...]]:
+    try:
+        raw = base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
+        if raw.startswith("["):
+            order, last_id, values = json.loads(raw)
+            values = tuple(values)
+        else:
+            (order, last_id), values = raw.split(":", 1), ()
+        if order not in ("asc", "desc"):
+            raise ValueError
+        return int(last_id), order, values  # type: ignore[return-value]
+    except Exception:
+        raise ValueError("Token de paginación inválido.") from None
+
+
+def decode_token(token: str) -> Tuple[int, Order]:
+    last_id, order, _ = _decode(token)
+    return last_id, order
+
+
+def keyset_page(
+    db: Any,
+    table: str,
+    *,
+    after_id: Optional[int] = None,
+    token: Optional[str] = None,
+    limit: int = 50,
+    order: Order = "asc",
+    filters: Optional[Mapping[str, Any]] = None,
+    allowed_filters: Iterable[str] = (),
+    include_total: bool = False,
+    sort: Sequence[str] = (),
+    allowed_sorts: Iterable[Sequence[str]] = (),
+) -> Page[dict]:
+    """
+    Paginación keyset (seek) sobre la PK: `WHERE id > ? ORDER BY id LIMIT n`.
+    Con `sort` (una de `allowed_sorts`) la clave es (*sort, id):
+    `WHERE (manzana, numero_lote, id) > (?, ?, ?) ORDER BY manzana, numero_lote, id`;
+    las columnas deben ser NOT NULL y prefijo de un índice (el id va implícito en él).
+    La página siguiente de un orden por columnas se pide con el token, que lleva sus valores.
+    El costo por página es constante (búsqueda en el índice), a diferencia de OFFSET.
+    Los filtros son igualdades sobre columnas permitidas (idealmente indexadas).
+    `total_estimate` es barato: rango de ids sin filtros, COUNT(*) por índice con filtros.
+    """
+    sort = tuple(sort)
+    if sort and sort not in {tuple(s) for s in allowed_sorts}:
+        raise ValueError(f"Orden no soportado para {table}: {', '.join(sort)}")
+    after_values: Tuple[Any, ...] = ()
+    if token:
+        after_id, order, after_values = _decode(token)
+        if len(after_values) != len(sort):
+            raise ValueError("Token de paginación inválido.")
+    elif after_id is not None and sort:
+        raise ValueError("Con un orden por columnas la página siguiente se pide con el token.")
+    if order not in ("asc", "desc"):
+        raise ValueError("order debe ser 'asc' o 'desc'.")
+    limit = max(1, int(limit))
+
+    allowed = set(allowed_filters)
+    where: List[str] = []
+    params: List[Any] = []
+    for col, val in sorted((filters or {}).items()):
+        if col not in allowed:
+            raise ValueError(f"Filtro no soportado para {table}: {col}")
+        if val is None:
+            where.append(f"{col} IS NULL")
+        else:
+            where.append(f"{col} = ?")
+            params.append(val)
+    filter_sql = list(where)
+    filter_params = list(params)
+
+    key = (*sort, "id")
+    if after_id is not None:
+        op = ">" if order == "asc" else "<"
+        if sort:
+            where.append(f"({', '.join(key)}) {op} ({', '.join('?' * len(key))})")
+            params.extend([*after_values, int(after_id)])
+        else:
+            where.append(f"id {op} ?")
+            params.append(int(after_id))
+
+    sql = f"SELECT * FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # pedimos una fila extra para saber si hay página siguiente sin contar
+    sql += " ORDER BY " + ", ".join(f"{c} {order.upper()}" for c in key) + " LIMIT ?"
+    rows = db.fetch_all(sql, (*params, limit + 1))
+
+    page: Page[dict] = Page(items=rows[:limit])
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        page.next_after_id = int(last["id"])
+        page.next_token = encode_token(page.next_after_id, order, [last[c] for c in sort])
+
+    if include_total:
+        if filter_sql:
+            row = db.fetch_one(
+                f"SELECT COUNT(*) AS n FROM {table} WHERE " + " AND ".join(filter_sql), filter_params
+            )
+        else:
+            row = db.fetch_one(f"SELECT COALESCE(MAX(id) - MIN(id) + 1, 0) AS n FROM {table}")
+        page.total_estimate = int(row["n"]) if row else 0
+    return page
+
+
+def map_page(page: Page[dict], convert: Any) -> Page[Any]:
+    """Convierte las filas de una página en entidades (convert recibe la lista completa)."""
+    return Page(
+        items=list(convert(page.items)),
+        next_token=page.next_token,
+        next_after_id=page.next_after_id,
+        total_estimate=page.total_estimate,
+    )
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterable, List, Literal, Mapping, Optional, Sequence, Tuple, Union
+
+Op = Literal["eq", "ne", "gte", "lte", "in", "contains"]
+
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+@dataclass(frozen=True, slots=True)
+class Filter:
+    """
+    Condición tipada de un listado. `column` es una columna (o tupla de columnas para 'contains',
+    que busca el texto en cualquiera de ellas). Las condiciones con value None se ignoran,
+    así los servicios pueden pasar sus kwargs opcionales tal cual.
+    """
+
+    column: Union[str, Tuple[str, ...]]
+    op: Op
+    value: Any
+
+
+def eq(column: str, value: Any) -> Filter:
+    return Filter(column, "eq", value)
+
+
+def ne(column: str, value: Any) -> Filter:
+    return Filter(column, "ne", value)
+
+
+def gte(column: str, value: Any) -> Filter:
+    return Filter(column, "gte", value)
+
+
+def lte(column: str, value: Any) -> Filter:
+    return Filter(column, "lte", value)
+
+
+def is_in(column: str, values: Optional[Iterable[Any]]) -> Filter:
+    return Filter(column, "in", None if values is None else tuple(values))
+
+
+def contains(columns: Sequence[str], text: Optional[str]) -> Filter:
+    text = (text or "").strip()
+    return Filter(tuple(columns), "contains", text or None)
+
+
+def _check_ident(name: str) -> str:
+    if not _IDENT_RE.match(name):
+        raise ValueError(f"Identificador SQL inválido: {name!r}")
+    return name
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# Forma de un filtro (sin valores): define el texto SQL y es la clave del caché.
+_Shape = Tuple[Union[str, Tuple[str, ...]], str, int]
+
+
+@lru_cache(maxsize=256)
+def _compile(table: str, shape: Tuple[_Shape, ...], order_by: str, limited: bool) -> str:
+    parts: List[str] = []
+    for column, op, n in shape:
+        if op == "contains":
+            cols = [_check_ident(c) for c in column]  # type: ignore[union-attr]
+            parts.append("(" + " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in cols) + ")")
+            continue
+        col = _check_ident(column)  # type: ignore[arg-type]
+        if op == "eq":
+            parts.append(f"{col} = ?")
+        elif op == "ne":
+            parts.append(f"{col} <> ?")
+        elif op == "gte":
+            parts.append(f"{col} >= ?")
+        elif op == "lte":
+            parts.append(f"{col} <= ?")
+        elif op == "in":
+            parts.append(f"{col} IN ({','.join('?' * n)})" if n else "0")
+        else:
+            raise ValueError(f"Operador no soportado: {op}")
+    sql = f"SELECT * FROM {_check_ident(table)}"
+    if parts:
+        sql += " WHERE " + " AND ".join(parts)
+    order_sql = ", ".join(
+        f"{_check_ident(c.split()[0])} {'DESC' if c.upper().endswith(' DESC') else 'ASC'}"
+        for c in order_by.split(",")
+    )
+    sql += f" ORDER BY {order_sql}"
+    if limited:
+        sql += " LIMIT ?"
+    return sql
+
+
+def build_select(
+    table: str,
+    filters: Iterable[Filter],
+    order_by: str = "id",
+    limit: Optional[int] = None,
+) -> Tuple[str, List[Any]]:
+    """
+    Compila filtros a un SELECT parametrizado. El texto SQL se cachea por forma
+    (columnas/operadores/cantidad de valores IN), así los mismos criterios reusan
+    la misma sentencia (y el caché de sentencias preparadas del driver).
+    """
+    shape: List[_Shape] = []
+    params: List[Any] = []
+    for f in filters:
+        if f.value is None:
+            continue
+        if f.op == "in":
+            values = list(f.value)
+            shape.append((f.column, f.op, len(values)))
+            params.extend(values)
+        elif f.op == "contains":
+            pattern = f"%{_escape_like(str(f.value))}%"
+            shape.append((f.column, f.op, len(f.column)))
+            params.extend([pattern] * len(f.column))
+        else:
+            shape.append((f.column, f.op, 1))
+            params.append(f.value)
+    sql = _compile(table, tuple(shape), order_by, limit is not None)
+    if limit is not None:
+        params.append(max(0, int(limit)))
+    return sql, params
+
+
+@lru_cache(maxsize=256)
+def _compile_update(table: str, columns: Tuple[str, ...]) -> str:
+    sets = ", ".join(f"{_check_ident(c)} = ?" for c in columns)
+    return f"UPDATE {_check_ident(table)} SET {sets} WHERE id = ?"
+
+
+def build_update(
+    table: str, row_id: int, changes: Mapping[str, Any], allowed: Iterable[str]
+) -> Optional[Tuple[str, List[Any]]]:
+    """
+    UPDATE parcial por id con sólo las columnas de `changes` (None si no hay nada que escribir).
+    Columnas fuera de `allowed` -> ValueError. El texto se cachea por conjunto de columnas.
+    """
+    allowed_set = set(allowed)
+    unknown = [c for c in changes if c not in allowed_set]
+    if unknown:
+        raise ValueError(f"Columnas no actualizables en {table}: {', '.join(sorted(unknown))}")
+    columns = tuple(sorted(changes))
+    if not columns:
+        return None
+    return _compile_update(table, columns), [*(changes[c] for c in columns), row_id]
+
+
+def build_update_many(
+    table: str, changes_by_id: Mapping[int, Mapping[str, Any]], allowed: Iterable[str]
+) -> List[Tuple[str, List[List[Any]]]]:
+    """
+    Varios UPDATE parciales agrupados por conjunto de columnas: una sentencia (la misma que
+    build_update) con sus filas de parámetros por grupo, lista para Database.execute_many.
+    Los ids sin cambios se omiten; columnas fuera de `allowed` -> ValueError.
+    """
+    groups: dict[str, List[List[Any]]] = {}
+    for row_id, changes in changes_by_id.items():
+        stmt = build_update(table, int(row_id), changes, allowed)
+        if stmt is not None:
+            groups.setdefault(stmt[0], []).append(stmt[1])
+    return list(groups.items())
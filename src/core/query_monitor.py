@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import logging
+import re
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional
+
+from config.settings import get_settings
+
+
+@dataclass(slots=True)
+class QueryEvent:
+    """Una sentencia ejecutada por Database (lo que reciben los hooks)."""
+
+    sql: str  # normalizada
+    param_count: int
+    elapsed_ms: float
+    rows: int
+    caller: str
+
+
+@dataclass(slots=True)
+class StatementStats:
+    """Contadores agregados por sentencia normalizada."""
+
+    sql: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    callers: Counter = field(default_factory=Counter)
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+QueryHook = Callable[[QueryEvent], None]
+
+_WS_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Colapsa espacios y listas IN (?, ?, ...) para agrupar variantes de la misma consulta."""
+    text = _WS_RE.sub(" ", sql).strip()
+    return _IN_LIST_RE.sub("IN (?, ...)", text)
+
+
+def _caller() -> str:
+    """Primer frame fuera de core.* (normalmente 'XRepository.metodo')."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith("core.") and module != "contextlib":
+            return f"{module}:{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryMonitor:
+    """
+    Registro de sentencias SQL ejecutadas por Database.
+    - Log de consultas lentas (>= slow_ms) siempre activo.
+    - Agregados por sentencia sólo si `enabled` (DB_QUERY_STATS=1) o hay hooks registrados.
+    """
+
+    def __init__(self, slow_ms: int = 200, enabled: bool = False) -> None:
+        self.slow_ms = slow_ms
+        self.enabled = enabled
+        self.logger = logging.getLogger(__name__)
+        self._hooks: List[QueryHook] = []
+        self._stats: dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    # ---------- Hooks ----------
+    def add_hook(self, hook: QueryHook) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: QueryHook) -> None:
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    @property
+    def active(self) -> bool:
+        return self.enabled or bool(self._hooks)
+
+    # ---------- Registro ----------
+    def record(self, sql: str, params: Optional[Iterable[Any]], elapsed_ms: float, rows: int) -> None:
+        slow = bool(self.slow_ms) and elapsed_ms >= self.slow_ms
+        if not (slow or self.active):
+            return
+        event = QueryEvent(
+            sql=normalize_sql(sql),
+            param_count=_param_count(params),
+            elapsed_ms=elapsed_ms,
+            rows=rows,
+            caller=_caller(),
+        )
+        if slow:
+            self.logger.warning(
+                "Slow query (%.1f ms, %d rows) en %s: %s", elapsed_ms, rows, event.caller, event.sql
+            )
+        if self.enabled:
+            with self._lock:
+                st = self._stats.get(event.sql)
+                if st is None:
+                    st = self._stats[event.sql] = StatementStats(sql=event.sql)
+                st.calls += 1
+                st.total_ms += elapsed_ms
+                st.max_ms = max(st.max_ms, elapsed_ms)
+                st.rows += rows
+                st.callers[event.caller] += 1
+        for hook in list(self._hooks):
+            try:
+                hook(event)
+            except Exception:  # un hook defectuoso no debe romper la consulta
+                self.logger.exception("Query hook failed")
+
+    # ---------- Consultas ----------
+    def top(self, n: int = 10, by: str = "total_ms") -> List[StatementStats]:
+        """Top-N sentencias por total_ms (o 'calls', 'max_ms', 'rows', 'avg_ms')."""
+        with self._lock:
+            items = list(self._stats.values())
+        return sorted(items, key=lambda s: getattr(s, by), reverse=True)[:n]
+
+    def format_top(self, n: int = 10, by: str = "total_ms") -> str:
+        lines = [f"{'calls':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8} {'rows':>8}  sql / callers"]
+        for st in self.top(n, by):
+            lines.append(
+                f"{st.calls:>7} {st.total_ms:>10.1f} {st.avg_ms:>8.2f} {st.max_ms:>8.1f} {st.rows:>8}  {st.sql}"
+            )
+            for caller, count in st.callers.most_common(3):
+                lines.append(f"{'':>46}  <- {caller} x{count}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def _param_count(params: Optional[Iterable[Any]]) -> int:
+    if params is None:
+        return 0
+    try:
+        return len(params)  # type: ignore[arg-type]
+    except TypeError:
+        return 0
+
+
+_monitor: Optional[QueryMonitor] = None
+
+
+def get_query_monitor() -> QueryMonitor:
+    """Singleton configurado con DB_SLOW_QUERY_MS y DB_QUERY_STATS."""
+    global _monitor
+    if _monitor is None:
+        s = get_settings()
+        _monitor = QueryMonitor(slow_ms=s.db_slow_query_ms, enabled=s.db_query_stats)
+    return _monitor
@@ -4,12 +4,14 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Literal, Optional
 
+from entities.tracking import DirtyTrackingMixin
+
 TipoEdificacion = Literal["CASA", "DUPLEX", "DEPARTAMENTO", "LOCAL", "GALPON"]
 EstadoEdificacion = Literal["DISPONIBLE", "RESERVADO", "VENDIDO"]
 
 
 @dataclass
-class Edificacion:
+class Edificacion(DirtyTrackingMixin):
     """
     Representa una propiedad edificada.
     Se asocia a uno o varios Terrenos vía la tabla puente 'edificacion_terreno'.
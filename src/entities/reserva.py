@@ -3,12 +3,14 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Optional, Literal
 
+from entities.tracking import DirtyTrackingMixin
+
 TipoPropiedad = Literal["TERRENO", "EDIFICACION"]
 EstadoReserva = Literal["ACTIVA", "CANCELADA", "CONFIRMADA"]
 
 
 @dataclass
-class Reserva:
+class Reserva(DirtyTrackingMixin):
     id: Optional[int] = field(default=None)
     tipo_propiedad: TipoPropiedad = field(default="TERRENO")
     propiedad_id: int = field(default=0)
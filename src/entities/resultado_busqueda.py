@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Literal
+
+TipoResultado = Literal["TERRENO", "EDIFICACION", "RESERVA"]
+
+
+@dataclass
+class ResultadoBusqueda:
+    """Un resultado de la búsqueda de texto completo (ver BusquedaService)."""
+
+    tipo: TipoResultado
+    id: int
+    titulo: str
+    snippet: str = field(default="")  # fragmento con las coincidencias resaltadas
+    score: float = field(default=0.0)  # bm25: más negativo = más relevante
+    estado: str = field(default="")
@@ -4,11 +4,13 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Literal, Optional
 
+from entities.tracking import DirtyTrackingMixin
+
 EstadoTerreno = Literal["DISPONIBLE", "RESERVADO", "VENDIDO"]
 
 
 @dataclass
-class Terreno:
+class Terreno(DirtyTrackingMixin):
     """
     Representa un lote/terreno dentro de un loteo o zona.
     Debe ser coherente con la tabla 'terrenos'.
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Set
+
+_MISSING = object()
+
+
+class DirtyTrackingMixin:
+    """
+    Registro de campos modificados para dataclasses de entidades.
+    Los repositorios llaman a mark_clean() al materializar desde la base; a partir de ahí
+    cada asignación que cambie el valor marca el campo, y changes() alimenta repo.patch()
+    para actualizar sólo esas columnas. Mutaciones in-place (lista.append) no se detectan:
+    reasignar el atributo.
+    """
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if not name.startswith("_") and self.__dict__.get("_tracking"):
+            if self.__dict__.get(name, _MISSING) != value:
+                self.__dict__.setdefault("_dirty", set()).add(name)
+        object.__setattr__(self, name, value)
+
+    def mark_clean(self) -> None:
+        self.__dict__["_dirty"] = set()
+        self.__dict__["_tracking"] = True
+
+    @property
+    def dirty_fields(self) -> Set[str]:
+        return set(self.__dict__.get("_dirty", ()))
+
+    def changes(self) -> Dict[str, Any]:
+        """{campo: valor actual} de los campos modificados desde mark_clean()."""
+        return {name: getattr(self, name) for name in sorted(self.__dict__.get("_dirty", ()))}
@@ -0,0 +1,84 @@
+-- Migración #0012: índices de texto completo (FTS5) para búsqueda de terrenos, edificaciones y reservas
+-- Tablas de contenido externo (no duplican los datos); los triggers las mantienen sincronizadas.
+-- unicode61 + remove_diacritics 2: búsqueda sin distinguir mayúsculas ni acentos (Peñalosa = penalosa).
+-- prefix '2 3': índices de prefijo para búsquedas "mientras se escribe" (jo* -> José).
+
+CREATE VIRTUAL TABLE IF NOT EXISTS terrenos_fts USING fts5(
+    manzana, numero_lote, nomenclatura, ubicacion, observaciones,
+    content = 'terrenos', content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS edificaciones_fts USING fts5(
+    nombre, tipo, observaciones,
+    content = 'edificaciones', content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS reservas_fts USING fts5(
+    cliente, observaciones,
+    content = 'reservas', content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+-- ---------- terrenos ----------
+CREATE TRIGGER IF NOT EXISTS trg_terrenos_fts_ai AFTER INSERT ON terrenos BEGIN
+    INSERT INTO terrenos_fts (rowid, manzana, numero_lote, nomenclatura, ubicacion, observaciones)
+    VALUES (new.id, new.manzana, new.numero_lote, new.nomenclatura, new.ubicacion, new.observaciones);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_terrenos_fts_ad AFTER DELETE ON terrenos BEGIN
+    INSERT INTO terrenos_fts (terrenos_fts, rowid, manzana, numero_lote, nomenclatura, ubicacion, observaciones)
+    VALUES ('delete', old.id, old.manzana, old.numero_lote, old.nomenclatura, old.ubicacion, old.observaciones);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_terrenos_fts_au
+AFTER UPDATE OF manzana, numero_lote, nomenclatura, ubicacion, observaciones ON terrenos BEGIN
+    INSERT INTO terrenos_fts (terrenos_fts, rowid, manzana, numero_lote, nomenclatura, ubicacion, observaciones)
+    VALUES ('delete', old.id, old.manzana, old.numero_lote, old.nomenclatura, old.ubicacion, old.observaciones);
+    INSERT INTO terrenos_fts (rowid, manzana, numero_lote, nomenclatura, ubicacion, observaciones)
+    VALUES (new.id, new.manzana, new.numero_lote, new.nomenclatura, new.ubicacion, new.observaciones);
+END;
+
+-- ---------- edificaciones ----------
+CREATE TRIGGER IF NOT EXISTS trg_edificaciones_fts_ai AFTER INSERT ON edificaciones BEGIN
+    INSERT INTO edificaciones_fts (rowid, nombre, tipo, observaciones)
+    VALUES (new.id, new.nombre, new.tipo, new.observaciones);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_edificaciones_fts_ad AFTER DELETE ON edificaciones BEGIN
+    INSERT INTO edificaciones_fts (edificaciones_fts, rowid, nombre, tipo, observaciones)
+    VALUES ('delete', old.id, old.nombre, old.tipo, old.observaciones);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_edificaciones_fts_au
+AFTER UPDATE OF nombre, tipo, observaciones ON edificaciones BEGIN
+    INSERT INTO edificaciones_fts (edificaciones_fts, rowid, nombre, tipo, observaciones)
+    VALUES ('delete', old.id, old.nombre, old.tipo, old.observaciones);
+    INSERT INTO edificaciones_fts (rowid, nombre, tipo, observaciones)
+    VALUES (new.id, new.nombre, new.tipo, new.observaciones);
+END;
+
+-- ---------- reservas ----------
+CREATE TRIGGER IF NOT EXISTS trg_reservas_fts_ai AFTER INSERT ON reservas BEGIN
+    INSERT INTO reservas_fts (rowid, cliente, observaciones)
+    VALUES (new.id, new.cliente, new.observaciones);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_reservas_fts_ad AFTER DELETE ON reservas BEGIN
+    INSERT INTO reservas_fts (reservas_fts, rowid, cliente, observaciones)
+    VALUES ('delete', old.id, old.cliente, old.observaciones);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_reservas_fts_au
+AFTER UPDATE OF cliente, observaciones ON reservas BEGIN
+    INSERT INTO reservas_fts (reservas_fts, rowid, cliente, observaciones)
+    VALUES ('delete', old.id, old.cliente, old.observaciones);
+    INSERT INTO reservas_fts (rowid, cliente, observaciones)
+    VALUES (new.id, new.cliente, new.observaciones);
+END;
+
+-- Indexar las filas existentes
+INSERT INTO terrenos_fts (terrenos_fts) VALUES ('rebuild');
+INSERT INTO edificaciones_fts (edificaciones_fts) VALUES ('rebuild');
+INSERT INTO reservas_fts (reservas_fts) VALUES ('rebuild');
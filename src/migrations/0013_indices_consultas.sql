@@ -0,0 +1,20 @@
+-- Migración #0013: índices para las consultas frecuentes de los repositorios
+-- (verificados con EXPLAIN QUERY PLAN en tests/test_query_plans.py)
+
+-- Terrenos: control de duplicados (manzana + numero_lote) y filtro por manzana
+CREATE INDEX IF NOT EXISTS idx_terrenos_manzana_lote ON terrenos(manzana, numero_lote);
+-- Terrenos: list_disponibles / filtros por estado (el índice incluye el id, sirve al ORDER BY id)
+CREATE INDEX IF NOT EXISTS idx_terrenos_estado ON terrenos(estado);
+
+-- Reservas: rangos de fecha
+CREATE INDEX IF NOT EXISTS idx_reservas_fecha ON reservas(fecha_reserva);
+
+-- Usuarios: find_all filtra por activo en cada listado
+CREATE INDEX IF NOT EXISTS idx_usuarios_activo ON usuarios(activo);
+
+-- Vínculos edificación-terreno: índice cubriente para la búsqueda inversa (terreno -> edificaciones).
+-- El sentido edificación -> terrenos ya lo cubre UNIQUE (edificacion_id, terreno_id),
+-- por lo que los índices simples de 0006 quedan redundantes.
+CREATE INDEX IF NOT EXISTS idx_et_terreno_edificacion ON edificacion_terreno(terreno_id, edificacion_id);
+DROP INDEX IF EXISTS idx_et_edificacion;
+DROP INDEX IF EXISTS idx_et_terreno;
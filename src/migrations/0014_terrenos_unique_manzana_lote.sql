@@ -0,0 +1,7 @@
+-- Migración #0014: manzana + numero_lote únicos (respaldo de TerrenoService._exists_duplicate)
+-- Reemplaza al índice simple de 0013. Las bases que aplicaron una versión anterior de 0013
+-- tienen además un único por (loteo_id, manzana, numero_lote), implicado por éste: se elimina.
+-- Nota: falla si la base ya tiene duplicados; resolverlos antes de migrar.
+CREATE UNIQUE INDEX IF NOT EXISTS ux_terrenos_manzana_lote ON terrenos(manzana, numero_lote);
+DROP INDEX IF EXISTS idx_terrenos_manzana_lote;
+DROP INDEX IF EXISTS ux_terrenos_loteo_manzana_lote;
@@ -0,0 +1,6 @@
+-- Migración #0015: a lo sumo una reserva ACTIVA por propiedad
+-- Índice único parcial: respaldo en la base de ReservaService.reservar() frente a reservas concurrentes.
+-- Nota: falla si ya existen dos reservas ACTIVA para la misma propiedad; resolverlas antes de migrar.
+CREATE UNIQUE INDEX IF NOT EXISTS ux_reservas_activa_propiedad
+ON reservas(tipo_propiedad, propiedad_id)
+WHERE estado = 'ACTIVA';
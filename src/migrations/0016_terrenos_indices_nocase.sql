@@ -0,0 +1,6 @@
+-- Migración #0016: búsqueda por prefijo de terrenos sin distinguir mayúsculas
+-- (TerrenoRepository.buscar_prefijo): rangos COLLATE NOCASE sobre manzana + lote y nomenclatura.
+-- Los únicos de 0011/0014 siguen siendo BINARY: no cambia qué se considera duplicado.
+CREATE INDEX IF NOT EXISTS idx_terrenos_manzana_lote_nocase
+ON terrenos(manzana COLLATE NOCASE, numero_lote COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_terrenos_nomenclatura_nocase ON terrenos(nomenclatura COLLATE NOCASE);
@@ -0,0 +1,4 @@
+-- Migración #0017: elimina idx_reservas_cliente (versión anterior de 0013)
+-- Ninguna consulta lo usa: la búsqueda por cliente es LIKE '%texto%' (o FTS5, ver BusquedaService)
+-- y sólo agregaba costo a cada escritura de reservas.
+DROP INDEX IF EXISTS idx_reservas_cliente;
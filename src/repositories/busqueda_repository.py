@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from core.database import Database
+from entities.resultado_busqueda import ResultadoBusqueda, TipoResultado
+
+# Por tipo: tabla FTS5, columnas a devolver de la tabla base y tabla base (alias b).
+_FUENTES: Dict[str, tuple[str, str, str]] = {
+    "TERRENO": (
+        "terrenos_fts",
+        "SELECT b.id, 'Mz ' || b.manzana || ' - Lote ' || b.numero_lote AS titulo, b.estado",
+        "terrenos b",
+    ),
+    "EDIFICACION": (
+        "edificaciones_fts",
+        "SELECT b.id, COALESCE(NULLIF(b.nombre, ''), b.tipo || ' #' || b.id) AS titulo, b.estado",
+        "edificaciones b",
+    ),
+    "RESERVA": (
+        "reservas_fts",
+        "SELECT b.id, b.cliente || ' (' || b.tipo_propiedad || ' #' || b.propiedad_id || ')' AS titulo, b.estado",
+        "reservas b",
+    ),
+}
+
+# nomenclatura/cliente pesan más que observaciones
+_PESOS: Dict[str, str] = {
+    "TERRENO": "2.0, 2.0, 4.0, 1.5, 1.0",
+    "EDIFICACION": "3.0, 1.0, 1.0",
+    "RESERVA": "4.0, 1.0",
+}
+
+
+class BusquedaRepository:
+    """Consultas sobre los índices FTS5 (migración 0012). Sólo SQLite."""
+
+    def __init__(self) -> None:
+        self.db = Database()
+
+    def search(
+        self,
+        tipo: TipoResultado,
+        match: str,
+        limit: int = 20,
+        marca_inicio: str = "«",
+        marca_fin: str = "»",
+    ) -> List[ResultadoBusqueda]:
+        """`match` es una expresión FTS5 ya armada (ver BusquedaService._match_expr)."""
+        fts, select, base = _FUENTES[tipo]
+        sql = f"""
+        {select},
+               snippet({fts}, -1, ?, ?, '…', 10) AS snippet,
+               bm25({fts}, {_PESOS[tipo]}) AS score
+        FROM {fts}
+        JOIN {base} ON b.id = {fts}.rowid
+        WHERE {fts} MATCH ?
+        ORDER BY score
+        LIMIT ?
+        """
+        rows = self.db.fetch_all(sql, (marca_inicio, marca_fin, match, int(limit)))
+        return [
+            ResultadoBusqueda(
+                tipo=tipo,
+                id=int(r["id"]),
+                titulo=r["titulo"] or "",
+                snippet=r["snippet"] or "",
+                score=float(r["score"]),
+                estado=r["estado"] or "",
+            )
+            for r in rows
+        ]
+
+    def rebuild(self) -> None:
+        """Reconstruye los índices desde las tablas base (tras cargas masivas o restauraciones)."""
+        with self.db.transaction():
+            for fts, _, _ in _FUENTES.values():
+                self.db.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
 
 from core.database import Database
+from core.pagination import Order, Page, keyset_page, map_page
+from core.query import Filter, build_select, build_update, build_update_many
 from entities.edificacion import Edificacion
 
 
 class EdificacionRepository:
     """Repositorio de Edificacion con manejo de vínculos N:M a Terrenos."""
 
+    PAGE_FILTERS = ("estado", "tipo")
+    PATCH_COLUMNS = (
+        "nombre", "tipo", "superficie_cubierta", "ambientes", "habitaciones", "banios",
+        "cochera", "patio", "pileta", "estado", "observaciones",
+    )
+
     def __init__(self) -> None:
         self.db = Database()
 
@@ -17,7 +25,7 @@ class EdificacionRepository:
     def _row_to_entity(row: dict | None, terrenos_ids: Optional[List[int]] = None) -> Optional[Edificacion]:
         if not row:
             return None
-        return Edificacion(
+        e = Edificacion(
             id=row.get("id"),
             nombre=row.get("nombre"),
             tipo=row.get("tipo") or "CASA",
@@ -33,6 +41,8 @@ class EdificacionRepository:
             created_at=row.get("created_at"),
             terrenos_ids=terrenos_ids or [],
         )
+        e.mark_clean()
+        return e
 
     @staticmethod
     def _rows_to_entities(rows: Iterable[dict]) -> List[Edificacion]:
@@ -44,24 +54,48 @@ class EdificacionRepository:
         rows = self.db.fetch_all(sql, (edificacion_id,))
         return [int(r["terreno_id"]) for r in rows]
 
+    def _get_terrenos_ids_map(self, edificacion_ids: Iterable[int]) -> Dict[int, List[int]]:
+        """Vínculos de varias edificaciones en una consulta (por trozos); cada lista ordenada por terreno_id."""
+        ids = list(dict.fromkeys(int(i) for i in edificacion_ids))
+        result: Dict[int, List[int]] = {eid: [] for eid in ids}
+        if not ids:
+            return result
+        sql = """
+        SELECT edificacion_id, terreno_id FROM edificacion_terreno
+        WHERE edificacion_id IN ({ids})
+        ORDER BY edificacion_id, terreno_id
+        """
+        for r in self.db.fetch_all_in(sql, ids):
+            result[int(r["edificacion_id"])].append(int(r["terreno_id"]))
+        return result
+
+    def _rows_with_links(self, rows: List[dict]) -> List[Edificacion]:
+        links = self._get_terrenos_ids_map(int(r["id"]) for r in rows)
+        result: List[Edificacion] = []
+        for r in rows:
+            e = self._row_to_entity(r, links.get(int(r["id"])))
+            if e:
+                result.append(e)
+        return result
+
     def _replace_terrenos_links(self, edificacion_id: int, terrenos_ids: List[int]) -> None:
-        # Reemplaza el set completo de vínculos en una transacción
-        # (delete faltantes + insert nuevos)
+        # Reemplaza el set completo de vínculos en una transacción:
+        # un DELETE ... IN para los faltantes + un executemany para los nuevos
         existing = set(self._get_terrenos_ids(edificacion_id))
         newset = set(int(t) for t in (terrenos_ids or []))
 
         to_delete = existing - newset
         to_insert = newset - existing
 
-        for tid in to_delete:
-            self.db.execute(
-                "DELETE FROM edificacion_terreno WHERE edificacion_id = ? AND terreno_id = ?",
-                (edificacion_id, tid),
+        with self.db.transaction():
+            self.db.execute_in(
+                "DELETE FROM edificacion_terreno WHERE edificacion_id = ? AND terreno_id IN ({ids})",
+                sorted(to_delete),
+                (edificacion_id,),
             )
-        for tid in to_insert:
-            self.db.execute(
+            self.db.execute_many(
                 "INSERT OR IGNORE INTO edificacion_terreno (edificacion_id, terreno_id) VALUES (?, ?)",
-                (edificacion_id, tid),
+                [(edificacion_id, tid) for tid in sorted(to_insert)],
             )
 
     # ---------- CRUD ----------
@@ -85,14 +119,61 @@ class EdificacionRepository:
             e.estado,
             e.observaciones,
         )
-        self.db.execute(sql, params)
-        row = self.db.fetch_one("SELECT last_insert_rowid() AS id")
-        eid = int(row["id"]) if row else 0
+        with self.db.transaction():
+            self.db.execute(sql, params)
+            row = self.db.fetch_one("SELECT last_insert_rowid() AS id")
+            eid = int(row["id"]) if row else 0
 
-        if eid and e.terrenos_ids:
-            self._replace_terrenos_links(eid, e.terrenos_ids)
+            if eid and e.terrenos_ids:
+                self._replace_terrenos_links(eid, e.terrenos_ids)
         return eid
 
+    def create_many(self, edificaciones: Iterable[Edificacion]) -> List[int]:
+        """Inserta varias edificaciones (y sus vínculos) en una transacción; IDs en el mismo orden."""
+        items = list(edificaciones)
+        sql = """
+        INSERT INTO edificaciones
+        (nombre, tipo, superficie_cubierta, ambientes, habitaciones, banios,
+         cochera, patio, pileta, estado, observaciones)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        params = [
+            (
+                e.nombre,
+                e.tipo,
+                e.superficie_cubierta,
+                e.ambientes,
+                e.habitaciones,
+                e.banios,
+                int(bool(e.cochera)),
+                int(bool(e.patio)),
+                int(bool(e.pileta)),
+                e.estado,
+                e.observaciones,
+            )
+            for e in items
+        ]
+        with self.db.transaction():
+            ids = self.db.insert_many(sql, params)
+            links = [
+                (eid, int(tid))
+                for eid, e in zip(ids, items)
+                for tid in dict.fromkeys(e.terrenos_ids or [])
+            ]
+            self.db.execute_many(
+                "INSERT OR IGNORE INTO edificacion_terreno (edificacion_id, terreno_id) VALUES (?, ?)",
+                links,
+            )
+        return ids
+
+    def exists(self, edificacion_id: int) -> bool:
+        row = self.db.fetch_one("SELECT 1 AS x FROM edificaciones WHERE id = ?", (edificacion_id,))
+        return row is not None
+
+    def existing_ids(self, ids: Iterable[int]) -> set[int]:
+        """IDs de `ids` que existen (una consulta IN por trozo, sin armar entidades)."""
+        return self.db.existing_ids("edificaciones", ids)
+
     def find_by_id(self, edificacion_id: int) -> Optional[Edificacion]:
         row = self.db.fetch_one("SELECT * FROM edificaciones WHERE id = ?", (edificacion_id,))
         if not row:
@@ -102,21 +183,60 @@ class EdificacionRepository:
 
     def find_all(self) -> List[Edificacion]:
         rows = self.db.fetch_all("SELECT * FROM edificaciones ORDER BY id")
-        result: List[Edificacion] = []
-        for r in rows:
-            e = self._row_to_entity(r, self._get_terrenos_ids(int(r["id"])))
-            if e:
-                result.append(e)
-        return result
+        return self._rows_with_links(rows)
+
+    def find_by_ids(self, ids: Iterable[int]) -> List[Edificacion]:
+        """Las edificaciones existentes entre `ids`, por id, con vínculos cargados en lote (IN por trozo)."""
+        unique = list(dict.fromkeys(int(i) for i in ids))
+        rows = self.db.fetch_all_in("SELECT * FROM edificaciones WHERE id IN ({ids})", unique)
+        rows.sort(key=lambda r: int(r["id"]))
+        return self._rows_with_links(rows)
+
+    def iter_all(self, batch_size: int = 500) -> Iterator[Edificacion]:
+        """
+        Como find_all() pero perezoso: memoria constante para exportaciones/jobs.
+        Recorre páginas keyset y carga los vínculos de cada una con su consulta ya terminada:
+        consultar en medio de fetch_iter cerraría el cursor server-side de PostgreSQL.
+        """
+        after_id: Optional[int] = None
+        while True:
+            page = keyset_page(self.db, "edificaciones", after_id=after_id, limit=batch_size)
+            yield from self._rows_with_links(page.items)
+            if not page.has_more:
+                return
+            after_id = page.next_after_id
+
+    def find_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        order: Order = "asc",
+        filters: Optional[Mapping[str, Any]] = None,
+        token: Optional[str] = None,
+        include_total: bool = False,
+    ) -> Page[Edificacion]:
+        """Página keyset por id con vínculos cargados en lote. Filtros: estado, tipo."""
+        page = keyset_page(
+            self.db,
+            "edificaciones",
+            after_id=after_id,
+            token=token,
+            limit=limit,
+            order=order,
+            filters=filters,
+            allowed_filters=self.PAGE_FILTERS,
+            include_total=include_total,
+        )
+        return map_page(page, self._rows_with_links)
+
+    def find_by(self, filters: Iterable[Filter], limit: Optional[int] = None) -> List[Edificacion]:
+        """Listado filtrado en SQL (ver core.query) con vínculos cargados en lote."""
+        sql, params = build_select("edificaciones", filters, order_by="id", limit=limit)
+        return self._rows_with_links(self.db.fetch_all(sql, params))
 
     def list_disponibles(self) -> List[Edificacion]:
         rows = self.db.fetch_all("SELECT * FROM edificaciones WHERE estado = 'DISPONIBLE' ORDER BY id")
-        result: List[Edificacion] = []
-        for r in rows:
-            e = self._row_to_entity(r, self._get_terrenos_ids(int(r["id"])))
-            if e:
-                result.append(e)
-        return result
+        return self._rows_with_links(rows)
 
     def update(self, e: Edificacion) -> None:
         if not e.id:
@@ -141,13 +261,88 @@ class EdificacionRepository:
             e.observaciones,
             e.id,
         )
-        self.db.execute(sql, params)
-        self._replace_terrenos_links(e.id, e.terrenos_ids or [])
+        with self.db.transaction():
+            self.db.execute(sql, params)
+            self._replace_terrenos_links(e.id, e.terrenos_ids or [])
+
+    @staticmethod
+    def _columnas(changes: Mapping[str, Any]) -> Dict[str, Any]:
+        changes = dict(changes)
+        for flag in ("cochera", "patio", "pileta"):
+            if flag in changes:
+                changes[flag] = int(bool(changes[flag]))
+        return changes
+
+    def patch(self, edificacion_id: int, changes: Mapping[str, Any]) -> bool:
+        """
+        Actualiza sólo las columnas de `changes` (p. ej. Edificacion.changes()).
+        Los vínculos se reescriben únicamente si `terrenos_ids` está entre los cambios.
+        """
+        changes = self._columnas(changes)
+        terrenos_ids = changes.pop("terrenos_ids", None)
+        stmt = build_update("edificaciones", edificacion_id, changes, self.PATCH_COLUMNS)
+        with self.db.transaction():
+            applied = stmt is not None and self.db.execute(*stmt) > 0
+            if terrenos_ids is not None:
+                self._replace_terrenos_links(edificacion_id, list(terrenos_ids))
+                applied = True
+        return applied
+
+    def update_many(self, changes_by_id: Mapping[int, Mapping[str, Any]]) -> int:
+        """
+        Como patch() para varias edificaciones ({id: cambios}): un executemany por conjunto de
+        columnas; los vínculos de las que traen `terrenos_ids` se reescriben una por una.
+        Todo en una transacción. Retorna filas de edificaciones afectadas.
+        """
+        columnas = {int(eid): self._columnas(c) for eid, c in changes_by_id.items()}
+        vinculos = {eid: c.pop("terrenos_ids", None) for eid, c in columnas.items()}
+        total = 0
+        with self.db.transaction():
+            for sql, rows in build_update_many("edificaciones", columnas, self.PATCH_COLUMNS):
+                total += self.db.execute_many(sql, rows)
+            for eid, terrenos_ids in vinculos.items():
+                if terrenos_ids is not None:
+                    self._replace_terrenos_links(eid, list(terrenos_ids))
+        return total
+
+    def cambiar_estado_si(
+        self, edificacion_id: int, nuevo: str, desde: Iterable[str], con_terrenos: bool = False
+    ) -> bool:
+        """
+        Transición condicional en una sentencia: sólo cambia si el estado actual está en `desde`
+        (y, con `con_terrenos`, si tiene al menos un terreno vinculado).
+        Retorna False si no se aplicó (id inexistente u otro estado, p. ej. ya reservado por otro).
+        """
+        desde = tuple(desde)
+        marks = ",".join("?" * len(desde))
+        sql = f"UPDATE edificaciones SET estado = ? WHERE id = ? AND estado IN ({marks})"
+        if con_terrenos:
+            sql += " AND EXISTS (SELECT 1 FROM edificacion_terreno et WHERE et.edificacion_id = edificaciones.id)"
+        return self.db.execute(sql, (nuevo, edificacion_id, *desde)) > 0
+
+    def estados_de(self, ids: Iterable[int]) -> Dict[int, tuple[str, bool]]:
+        """{id: (estado, tiene_terrenos)} de los ids existentes (una consulta IN por trozo)."""
+        sql = """
+        SELECT e.id, e.estado,
+               EXISTS (SELECT 1 FROM edificacion_terreno et WHERE et.edificacion_id = e.id) AS con_terrenos
+        FROM edificaciones e
+        WHERE e.id IN ({ids})
+        """
+        rows = self.db.fetch_all_in(sql, list(ids))
+        return {int(r["id"]): (r["estado"], bool(r["con_terrenos"])) for r in rows}
+
+    def cambiar_estado_many(self, ids: Iterable[int], nuevo: str, desde: Iterable[str]) -> int:
+        """Como cambiar_estado_si para un conjunto: un UPDATE ... IN por trozo. Retorna filas cambiadas."""
+        desde = tuple(desde)
+        marks = ",".join("?" * len(desde))
+        sql = f"UPDATE edificaciones SET estado = ? WHERE estado IN ({marks}) AND id IN ({{ids}})"
+        return self.db.execute_in(sql, list(ids), (nuevo, *desde))
 
     def delete(self, edificacion_id: int) -> None:
         # ON DELETE CASCADE en la FK limpia vínculos; igual borramos explícito por claridad
-        self.db.execute("DELETE FROM edificacion_terreno WHERE edificacion_id = ?", (edificacion_id,))
-        self.db.execute("DELETE FROM edificaciones WHERE id = ?", (edificacion_id,))
+        with self.db.transaction():
+            self.db.execute("DELETE FROM edificacion_terreno WHERE edificacion_id = ?", (edificacion_id,))
+            self.db.execute("DELETE FROM edificaciones WHERE id = ?", (edificacion_id,))
 
     # ---------- Consultas útiles ----------
     def list_by_terreno(self, terreno_id: int) -> List[Edificacion]:
@@ -159,10 +354,5 @@ class EdificacionRepository:
         ORDER BY e.id
         """
         rows = self.db.fetch_all(sql, (terreno_id,))
-        result: List[Edificacion] = []
-        for r in rows:
-            e = self._row_to_entity(r, self._get_terrenos_ids(int(r["id"])))
-            if e:
-                result.append(e)
-        return result
+        return self._rows_with_links(rows)
 
@@ -55,10 +55,16 @@ class EdificacionTerrenoRepository:
         a_borrar = actuales - nuevos
         a_insertar = nuevos - actuales
 
-        for tid in a_borrar:
-            self.desvincular(edificacion_id, tid)
-        for tid in a_insertar:
-            self.vincular(edificacion_id, tid)
+        with self.db.transaction():
+            self.db.execute_in(
+                "DELETE FROM edificacion_terreno WHERE edificacion_id = ? AND terreno_id IN ({ids})",
+                sorted(a_borrar),
+                (edificacion_id,),
+            )
+            self.db.execute_many(
+                "INSERT OR IGNORE INTO edificacion_terreno (edificacion_id, terreno_id) VALUES (?, ?)",
+                [(edificacion_id, tid) for tid in sorted(a_insertar)],
+            )
 
     def reemplazar_edificaciones(self, terreno_id: int, nuevas_edificaciones_ids: Iterable[int]) -> None:
         """Reemplaza el conjunto completo de vínculos para un terreno."""
@@ -68,11 +74,14 @@ class EdificacionTerrenoRepository:
         a_borrar = actuales - nuevos
         a_insertar = nuevos - actuales
 
-        for eid in a_borrar:
-            self.db.execute(
-                "DELETE FROM edificacion_terreno WHERE edificacion_id = ? AND terreno_id = ?",
-                (eid, terreno_id),
+        with self.db.transaction():
+            self.db.execute_in(
+                "DELETE FROM edificacion_terreno WHERE terreno_id = ? AND edificacion_id IN ({ids})",
+                sorted(a_borrar),
+                (terreno_id,),
+            )
+            self.db.execute_many(
+                "INSERT OR IGNORE INTO edificacion_terreno (edificacion_id, terreno_id) VALUES (?, ?)",
+                [(eid, terreno_id) for eid in sorted(a_insertar)],
             )
-        for eid in a_insertar:
-            self.vincular(eid, terreno_id)
 
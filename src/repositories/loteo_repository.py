@@ -1,14 +1,17 @@
 from __future__ import annotations
 
-from typing import List, Optional, Iterable
+from typing import Any, Dict, List, Mapping, Optional, Iterable, Iterator
 
 from core.database import Database
+from core.pagination import Order, Page, keyset_page, map_page
 from entities.loteo import Loteo
 
 
 class LoteoRepository:
     """CRUD de Loteo + asignación de Terrenos (vía campo loteo_id en terrenos)."""
 
+    PAGE_FILTERS = ("estado",)
+
     def __init__(self) -> None:
         self.db = Database()
 
@@ -34,19 +37,58 @@ class LoteoRepository:
         rows = self.db.fetch_all("SELECT id FROM terrenos WHERE loteo_id = ? ORDER BY id", (loteo_id,))
         return [int(r["id"]) for r in rows]
 
+    def _terrenos_ids_por_loteo(self, loteo_ids: Optional[Iterable[int]] = None) -> Dict[int, List[int]]:
+        """
+        ids de terrenos agrupados por loteo en una sola consulta (ordenados por id).
+        Sin `loteo_ids` trae todos los asignados; con lista, consulta por trozos IN (...).
+        """
+        if loteo_ids is None:
+            rows = self.db.fetch_all(
+                "SELECT loteo_id, id FROM terrenos WHERE loteo_id IS NOT NULL ORDER BY loteo_id, id"
+            )
+        else:
+            ids = list(dict.fromkeys(int(i) for i in loteo_ids))
+            rows = self.db.fetch_all_in(
+                "SELECT loteo_id, id FROM terrenos WHERE loteo_id IN ({ids}) ORDER BY loteo_id, id", ids
+            )
+        result: Dict[int, List[int]] = {}
+        for r in rows:
+            result.setdefault(int(r["loteo_id"]), []).append(int(r["id"]))
+        return result
+
+    def _rows_with_terrenos(self, rows: List[dict]) -> List[Loteo]:
+        tids = self._terrenos_ids_por_loteo(int(r["id"]) for r in rows)
+        return [self._row_to_entity(r, tids.get(int(r["id"]))) for r in rows]
+
+    def contar_terrenos_por_loteo(self) -> Dict[int, int]:
+        """Cantidad de terrenos asignados por loteo (para listados que no necesitan los ids)."""
+        rows = self.db.fetch_all(
+            "SELECT loteo_id, COUNT(*) AS cantidad FROM terrenos WHERE loteo_id IS NOT NULL GROUP BY loteo_id"
+        )
+        return {int(r["loteo_id"]): int(r["cantidad"]) for r in rows}
+
     # --- CRUD
     def create(self, l: Loteo) -> int:
         sql = """
         INSERT INTO loteos (nombre, ubicacion, municipio, provincia, fecha_inicio, fecha_fin, estado, observaciones)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """
-        self.db.execute(sql, (l.nombre, l.ubicacion, l.municipio, l.provincia, l.fecha_inicio, l.fecha_fin, l.estado, l.observaciones))
-        row = self.db.fetch_one("SELECT last_insert_rowid() AS id")
-        lid = int(row["id"]) if row else 0
-        if lid and l.terrenos_ids:
-            self.reemplazar_terrenos(lid, l.terrenos_ids)
+        with self.db.transaction():
+            self.db.execute(sql, (l.nombre, l.ubicacion, l.municipio, l.provincia, l.fecha_inicio, l.fecha_fin, l.estado, l.observaciones))
+            row = self.db.fetch_one("SELECT last_insert_rowid() AS id")
+            lid = int(row["id"]) if row else 0
+            if lid and l.terrenos_ids:
+                self.reemplazar_terrenos(lid, l.terrenos_ids)
         return lid
 
+    def exists(self, loteo_id: int) -> bool:
+        row = self.db.fetch_one("SELECT 1 AS x FROM loteos WHERE id = ?", (loteo_id,))
+        return row is not None
+
+    def existing_ids(self, ids: Iterable[int]) -> set[int]:
+        """IDs de `ids` que existen (una consulta IN por trozo, sin armar entidades)."""
+        return self.db.existing_ids("loteos", ids)
+
     def find_by_id(self, loteo_id: int) -> Optional[Loteo]:
         row = self.db.fetch_one("SELECT * FROM loteos WHERE id = ?", (loteo_id,))
         if not row:
@@ -54,13 +96,48 @@ class LoteoRepository:
         tids = self._terrenos_ids_de_loteo(loteo_id)
         return self._row_to_entity(row, tids)
 
-    def find_all(self) -> List[Loteo]:
+    def find_all(self, with_terrenos: bool = True) -> List[Loteo]:
+        """Todos los loteos; `with_terrenos=False` omite cargar terrenos_ids (ver contar_terrenos_por_loteo)."""
         rows = self.db.fetch_all("SELECT * FROM loteos ORDER BY id")
-        result: List[Loteo] = []
-        for r in rows:
-            lid = int(r["id"])
-            result.append(self._row_to_entity(r, self._terrenos_ids_de_loteo(lid)))
-        return result
+        tids = self._terrenos_ids_por_loteo() if with_terrenos else {}
+        return [self._row_to_entity(r, tids.get(int(r["id"]))) for r in rows]
+
+    def iter_all(self, batch_size: int = 500) -> Iterator[Loteo]:
+        """
+        Como find_all() pero perezoso.
+        Recorre páginas keyset y carga los vínculos de cada una con su consulta ya terminada:
+        consultar en medio de fetch_iter cerraría el cursor server-side de PostgreSQL.
+        """
+        after_id: Optional[int] = None
+        while True:
+            page = keyset_page(self.db, "loteos", after_id=after_id, limit=batch_size)
+            yield from self._rows_with_terrenos(page.items)
+            if not page.has_more:
+                return
+            after_id = page.next_after_id
+
+    def find_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        order: Order = "asc",
+        filters: Optional[Mapping[str, Any]] = None,
+        token: Optional[str] = None,
+        include_total: bool = False,
+    ) -> Page[Loteo]:
+        """Página keyset por id con terrenos_ids de la página en una consulta. Filtros: estado."""
+        page = keyset_page(
+            self.db,
+            "loteos",
+            after_id=after_id,
+            token=token,
+            limit=limit,
+            order=order,
+            filters=filters,
+            allowed_filters=self.PAGE_FILTERS,
+            include_total=include_total,
+        )
+        return map_page(page, self._rows_with_terrenos)
 
     def update(self, l: Loteo) -> None:
         if not l.id:
@@ -70,14 +147,16 @@ class LoteoRepository:
         SET nombre=?, ubicacion=?, municipio=?, provincia=?, fecha_inicio=?, fecha_fin=?, estado=?, observaciones=?
         WHERE id=?
         """
-        self.db.execute(sql, (l.nombre, l.ubicacion, l.municipio, l.provincia, l.fecha_inicio, l.fecha_fin, l.estado, l.observaciones, l.id))
-        # vínculos
-        self.reemplazar_terrenos(l.id, l.terrenos_ids or [])
+        with self.db.transaction():
+            self.db.execute(sql, (l.nombre, l.ubicacion, l.municipio, l.provincia, l.fecha_inicio, l.fecha_fin, l.estado, l.observaciones, l.id))
+            # vínculos
+            self.reemplazar_terrenos(l.id, l.terrenos_ids or [])
 
     def delete(self, loteo_id: int) -> None:
         # desasignar terrenos del loteo antes de borrar
-        self.db.execute("UPDATE terrenos SET loteo_id=NULL WHERE loteo_id = ?", (loteo_id,))
-        self.db.execute("DELETE FROM loteos WHERE id = ?", (loteo_id,))
+        with self.db.transaction():
+            self.db.execute("UPDATE terrenos SET loteo_id=NULL WHERE loteo_id = ?", (loteo_id,))
+            self.db.execute("DELETE FROM loteos WHERE id = ?", (loteo_id,))
 
     # --- vínculos (vía campo loteo_id en terrenos)
     def reemplazar_terrenos(self, loteo_id: int, nuevos_ids: Iterable[int]) -> None:
@@ -85,8 +164,10 @@ class LoteoRepository:
         nuevos = set(int(t) for t in (nuevos_ids or []))
         a_quitar = actuales - nuevos
         a_agregar = nuevos - actuales
-        if a_quitar:
-            self.db.execute(f"UPDATE terrenos SET loteo_id=NULL WHERE loteo_id=? AND id IN ({','.join('?'*len(a_quitar))})", (loteo_id, *a_quitar))
-        for tid in a_agregar:
-            self.db.execute("UPDATE terrenos SET loteo_id=? WHERE id=?", (loteo_id, tid))
+        with self.db.transaction():
+            # un UPDATE ... IN por trozo en cada sentido, no uno por terreno
+            self.db.execute_in(
+                "UPDATE terrenos SET loteo_id=NULL WHERE loteo_id=? AND id IN ({ids})", sorted(a_quitar), (loteo_id,)
+            )
+            self.db.execute_in("UPDATE terrenos SET loteo_id=? WHERE id IN ({ids})", sorted(a_agregar), (loteo_id,))
 
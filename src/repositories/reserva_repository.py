@@ -1,21 +1,29 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence
 
 from core.database import Database
+from core.pagination import Order, Page, keyset_page, map_page
+from core.query import Filter, build_select, build_update, build_update_many
 from entities.reserva import Reserva
 
 
 class ReservaRepository:
     """Repositorio CRUD para reservas polimórficas (Terreno o Edificación)."""
 
+    PAGE_FILTERS = ("estado", "tipo_propiedad", "propiedad_id")
+    PAGE_SORTS = (("fecha_reserva",),)
+    PATCH_COLUMNS = ("tipo_propiedad", "propiedad_id", "cliente", "fecha_reserva", "monto_reserva", "estado", "observaciones")
+
     def __init__(self) -> None:
         self.db = Database()
 
     def _row_to_entity(self, row: dict | None) -> Optional[Reserva]:
         if not row:
             return None
-        return Reserva(**row)
+        r = Reserva(**row)
+        r.mark_clean()
+        return r
 
     def create(self, r: Reserva) -> int:
         sql = """
@@ -29,6 +37,26 @@ class ReservaRepository:
         row = self.db.fetch_one("SELECT last_insert_rowid() AS id")
         return int(row["id"]) if row else 0
 
+    def create_many(self, reservas: Iterable[Reserva]) -> List[int]:
+        """Inserta varias reservas en una transacción y retorna sus IDs en el mismo orden."""
+        sql = """
+        INSERT INTO reservas (tipo_propiedad, propiedad_id, cliente, fecha_reserva, monto_reserva, estado, observaciones)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        params = [
+            (r.tipo_propiedad, r.propiedad_id, r.cliente, r.fecha_reserva, r.monto_reserva, r.estado, r.observaciones)
+            for r in reservas
+        ]
+        return self.db.insert_many(sql, params)
+
+    def exists(self, rid: int) -> bool:
+        row = self.db.fetch_one("SELECT 1 AS x FROM reservas WHERE id = ?", (rid,))
+        return row is not None
+
+    def existing_ids(self, ids: Iterable[int]) -> set[int]:
+        """IDs de `ids` que existen (una consulta IN por trozo, sin armar entidades)."""
+        return self.db.existing_ids("reservas", ids)
+
     def find_by_id(self, rid: int) -> Optional[Reserva]:
         row = self.db.fetch_one("SELECT * FROM reservas WHERE id = ?", (rid,))
         return self._row_to_entity(row)
@@ -37,6 +65,55 @@ class ReservaRepository:
         rows = self.db.fetch_all("SELECT * FROM reservas ORDER BY id DESC")
         return [self._row_to_entity(r) for r in rows if r]
 
+    def find_by_ids(self, ids: Iterable[int]) -> List[Reserva]:
+        """Las reservas existentes entre `ids`, más recientes primero (un SELECT ... IN por trozo)."""
+        unique = list(dict.fromkeys(int(i) for i in ids))
+        rows = self.db.fetch_all_in("SELECT * FROM reservas WHERE id IN ({ids})", unique)
+        rows.sort(key=lambda r: int(r["id"]), reverse=True)
+        return [self._row_to_entity(r) for r in rows if r]
+
+    def iter_all(self, batch_size: int = 500) -> Iterator[Reserva]:
+        """Como find_all() pero perezoso: memoria constante para exportaciones/reportes."""
+        for row in self.db.fetch_iter("SELECT * FROM reservas ORDER BY id DESC", batch_size=batch_size):
+            r = self._row_to_entity(row)
+            if r is not None:
+                yield r
+
+    def find_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        order: Order = "desc",
+        filters: Optional[Mapping[str, Any]] = None,
+        token: Optional[str] = None,
+        include_total: bool = False,
+        sort: Sequence[str] = (),
+    ) -> Page[Reserva]:
+        """
+        Página keyset por id (por defecto más recientes primero, como find_all), o por
+        (fecha_reserva, id) con sort=("fecha_reserva",) sobre idx_reservas_fecha.
+        Filtros: estado, tipo_propiedad, propiedad_id.
+        """
+        page = keyset_page(
+            self.db,
+            "reservas",
+            after_id=after_id,
+            token=token,
+            limit=limit,
+            order=order,
+            filters=filters,
+            allowed_filters=self.PAGE_FILTERS,
+            include_total=include_total,
+            sort=sort,
+            allowed_sorts=self.PAGE_SORTS,
+        )
+        return map_page(page, lambda rows: [self._row_to_entity(r) for r in rows])
+
+    def find_by(self, filters: Iterable[Filter], limit: Optional[int] = None) -> List[Reserva]:
+        """Listado filtrado en SQL (ver core.query), más recientes primero."""
+        sql, params = build_select("reservas", filters, order_by="id DESC", limit=limit)
+        return [self._row_to_entity(r) for r in self.db.fetch_all(sql, params) if r]
+
     def update(self, r: Reserva) -> None:
         if not r.id:
             raise ValueError("Reserva sin id.")
@@ -50,6 +127,29 @@ class ReservaRepository:
             r.fecha_reserva, r.monto_reserva, r.estado, r.observaciones, r.id
         ))
 
+    def patch(self, rid: int, changes: Mapping[str, Any]) -> bool:
+        """Actualiza sólo las columnas de `changes` (p. ej. Reserva.changes()). False si no hubo cambios."""
+        stmt = build_update("reservas", rid, changes, self.PATCH_COLUMNS)
+        return stmt is not None and self.db.execute(*stmt) > 0
+
+    def update_many(self, changes_by_id: Mapping[int, Mapping[str, Any]]) -> int:
+        """
+        Como patch() para varias reservas ({id: cambios}): un executemany por conjunto de columnas,
+        todo en una transacción. Retorna filas afectadas.
+        """
+        total = 0
+        with self.db.transaction():
+            for sql, rows in build_update_many("reservas", changes_by_id, self.PATCH_COLUMNS):
+                total += self.db.execute_many(sql, rows)
+        return total
+
+    def cambiar_estado_si(self, rid: int, nuevo: str, desde: Iterable[str]) -> bool:
+        """Transición condicional en una sentencia (ver TerrenoRepository.cambiar_estado_si)."""
+        desde = tuple(desde)
+        marks = ",".join("?" * len(desde))
+        sql = f"UPDATE reservas SET estado = ? WHERE id = ? AND estado IN ({marks})"
+        return self.db.execute(sql, (nuevo, rid, *desde)) > 0
+
     def delete(self, rid: int) -> None:
         self.db.execute("DELETE FROM reservas WHERE id=?", (rid,))
 
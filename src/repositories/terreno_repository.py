@@ -1,14 +1,35 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Optional
+import heapq
+import re
+import string
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 from core.database import Database
+from core.pagination import Order, Page, keyset_page, map_page
+from core.query import Filter, build_select, build_update, build_update_many
 from entities.terreno import Terreno
 
+# Cota superior de un rango por prefijo: `col >= p AND col < p || _FIN_PREFIJO` usa el índice
+# (a diferencia de LIKE 'p%', que en SQLite no lo usa con la colación BINARY por defecto).
+_FIN_PREFIJO = "\U0010ffff"
+_PALABRAS_RUIDO = {"mz", "manzana", "lote", "lt"}
+# COLLATE NOCASE de SQLite: sólo pliega las 26 letras ASCII
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _clave_nocase(t: Terreno) -> Tuple[str, str, int]:
+    """Orden de buscar_prefijo en Python, igual al del ORDER BY ... COLLATE NOCASE."""
+    return (t.manzana.translate(_NOCASE), t.numero_lote.translate(_NOCASE), int(t.id or 0))
+
 
 class TerrenoRepository:
     """Repositorio para la entidad Terreno."""
 
+    PAGE_FILTERS = ("estado", "manzana", "loteo_id")
+    PAGE_SORTS = (("manzana", "numero_lote"),)
+    PATCH_COLUMNS = ("manzana", "numero_lote", "superficie", "ubicacion", "nomenclatura", "estado", "observaciones")
+
     def __init__(self) -> None:
         self.db = Database()
 
@@ -17,7 +38,7 @@ class TerrenoRepository:
     def _row_to_entity(row: dict | None) -> Optional[Terreno]:
         if not row:
             return None
-        return Terreno(
+        t = Terreno(
             id=row.get("id"),
             manzana=row.get("manzana") or "",
             numero_lote=row.get("numero_lote") or "",
@@ -28,6 +49,8 @@ class TerrenoRepository:
             observaciones=row.get("observaciones"),
             created_at=row.get("created_at"),
         )
+        t.mark_clean()
+        return t
 
     @staticmethod
     def _rows_to_entities(rows: Iterable[dict]) -> List[Terreno]:
@@ -59,6 +82,27 @@ class TerrenoRepository:
         row = self.db.fetch_one("SELECT last_insert_rowid() AS id")
         return int(row["id"]) if row else 0
 
+    def create_many(self, terrenos: Iterable[Terreno]) -> List[int]:
+        """Inserta varios Terrenos en una transacción y retorna sus IDs en el mismo orden."""
+        sql = """
+        INSERT INTO terrenos (manzana, numero_lote, superficie, ubicacion,
+                              nomenclatura, estado, observaciones)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        params = [
+            (t.manzana, t.numero_lote, t.superficie, t.ubicacion, t.nomenclatura, t.estado, t.observaciones)
+            for t in terrenos
+        ]
+        return self.db.insert_many(sql, params)
+
+    def exists(self, terreno_id: int) -> bool:
+        row = self.db.fetch_one("SELECT 1 AS x FROM terrenos WHERE id = ?", (terreno_id,))
+        return row is not None
+
+    def existing_ids(self, ids: Iterable[int]) -> set[int]:
+        """IDs de `ids` que existen (una consulta IN por trozo, sin armar entidades)."""
+        return self.db.existing_ids("terrenos", ids)
+
     def find_by_id(self, terreno_id: int) -> Optional[Terreno]:
         row = self.db.fetch_one("SELECT * FROM terrenos WHERE id = ?", (terreno_id,))
         return self._row_to_entity(row)
@@ -67,6 +111,122 @@ class TerrenoRepository:
         rows = self.db.fetch_all("SELECT * FROM terrenos ORDER BY id")
         return self._rows_to_entities(rows)
 
+    def find_by_ids(self, ids: Iterable[int]) -> List[Terreno]:
+        """Los terrenos existentes entre `ids`, por id (un SELECT ... IN por trozo, ver fetch_all_in)."""
+        unique = list(dict.fromkeys(int(i) for i in ids))
+        rows = self.db.fetch_all_in("SELECT * FROM terrenos WHERE id IN ({ids})", unique)
+        return sorted(self._rows_to_entities(rows), key=lambda t: t.id)
+
+    def iter_all(self, batch_size: int = 500) -> Iterator[Terreno]:
+        """Como find_all() pero perezoso: memoria constante para exportaciones/jobs."""
+        for row in self.db.fetch_iter("SELECT * FROM terrenos ORDER BY id", batch_size=batch_size):
+            t = self._row_to_entity(row)
+            if t is not None:
+                yield t
+
+    def find_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        order: Order = "asc",
+        filters: Optional[Mapping[str, Any]] = None,
+        token: Optional[str] = None,
+        include_total: bool = False,
+        sort: Sequence[str] = (),
+    ) -> Page[Terreno]:
+        """
+        Página keyset (ver core.pagination): por id, o por (manzana, numero_lote, id) con
+        sort=("manzana", "numero_lote"), sobre el índice único de 0014.
+        Filtros: estado, manzana, loteo_id.
+        """
+        page = keyset_page(
+            self.db,
+            "terrenos",
+            after_id=after_id,
+            token=token,
+            limit=limit,
+            order=order,
+            filters=filters,
+            allowed_filters=self.PAGE_FILTERS,
+            include_total=include_total,
+            sort=sort,
+            allowed_sorts=self.PAGE_SORTS,
+        )
+        return map_page(page, self._rows_to_entities)
+
+    def find_by(self, filters: Iterable[Filter], limit: Optional[int] = None) -> List[Terreno]:
+        """Listado filtrado en SQL (ver core.query); las condiciones con valor None se ignoran."""
+        sql, params = build_select("terrenos", filters, order_by="id", limit=limit)
+        return self._rows_to_entities(self.db.fetch_all(sql, params))
+
+    def buscar_prefijo(
+        self,
+        texto: str,
+        despues_de: Optional[Tuple[str, str, int]] = None,
+        limit: int = 50,
+    ) -> List[Terreno]:
+        """
+        Búsqueda "mientras se escribe" por prefijo, sin distinguir mayúsculas (ASCII),
+        ordenada por (manzana, numero_lote, id).
+        - "A" / "mz A": manzanas que empiezan con A.
+        - "A 1" / "mz A lote 1": manzana A exacta, lotes que empiezan con 1.
+        - Además, nomenclaturas que empiezan con el texto.
+        Cada rama es un rango sobre los índices COLLATE NOCASE (migración 0016) con su propio
+        LIMIT; se mezclan ya ordenadas.
+        Paginación keyset: `despues_de` = (manzana, numero_lote, id) del último resultado
+        (el id desempata lotes que sólo difieren en mayúsculas).
+        """
+        texto = (texto or "").strip()
+        ramas: List[Tuple[str, List[Any]]] = []
+        if not texto:
+            ramas.append(("", []))
+        else:
+            ramas.append(
+                ("nomenclatura COLLATE NOCASE >= ? AND nomenclatura COLLATE NOCASE < ?", [texto, texto + _FIN_PREFIJO])
+            )
+            tokens = [t for t in re.split(r"[\s]+", texto) if t.lower() not in _PALABRAS_RUIDO]
+            if len(tokens) >= 2:
+                lote = " ".join(tokens[1:])
+                ramas.append(
+                    (
+                        "manzana COLLATE NOCASE = ? AND numero_lote COLLATE NOCASE >= ?"
+                        " AND numero_lote COLLATE NOCASE < ?",
+                        [tokens[0], lote, lote + _FIN_PREFIJO],
+                    )
+                )
+            elif tokens:
+                ramas.append(
+                    ("manzana COLLATE NOCASE >= ? AND manzana COLLATE NOCASE < ?", [tokens[0], tokens[0] + _FIN_PREFIJO])
+                )
+
+        resultados: List[List[Terreno]] = []
+        for cond, params in ramas:
+            conds = [cond] if cond else []
+            if despues_de is not None:
+                manzana, numero_lote, tid = despues_de
+                # la cota sobre manzana sola es la que SQLite usa para buscar en el índice;
+                # el row value (con expresiones COLLATE) sólo filtra
+                conds.append("manzana COLLATE NOCASE >= ?")
+                conds.append("(manzana COLLATE NOCASE, numero_lote COLLATE NOCASE, id) > (?, ?, ?)")
+                params = [*params, manzana, manzana, numero_lote, int(tid)]
+            where = f" WHERE {' AND '.join(conds)}" if conds else ""
+            sql = (
+                f"SELECT * FROM terrenos{where}"
+                " ORDER BY manzana COLLATE NOCASE, numero_lote COLLATE NOCASE, id LIMIT ?"
+            )
+            resultados.append(self._rows_to_entities(self.db.fetch_all(sql, (*params, int(limit)))))
+
+        out: List[Terreno] = []
+        vistos: set[int] = set()
+        for t in heapq.merge(*resultados, key=_clave_nocase):
+            if t.id in vistos:
+                continue
+            vistos.add(t.id)
+            out.append(t)
+            if len(out) >= limit:
+                break
+        return out
+
     def find_by_nomenclatura(self, nomenclatura: str) -> Optional[Terreno]:
         """Busca un terreno por nomenclatura exacta (si es no nula)."""
         nom = (nomenclatura or "").strip()
@@ -75,6 +235,19 @@ class TerrenoRepository:
         row = self.db.fetch_one("SELECT * FROM terrenos WHERE nomenclatura = ? LIMIT 1", (nom,))
         return self._row_to_entity(row)
 
+    def exists_by_manzana_lote(self, manzana: str, numero_lote: str, exclude_id: Optional[int] = None) -> bool:
+        """Sondeo por el índice único (manzana, numero_lote); no materializa filas."""
+        if exclude_id is None:
+            row = self.db.fetch_one(
+                "SELECT 1 AS x FROM terrenos WHERE manzana = ? AND numero_lote = ? LIMIT 1", (manzana, numero_lote)
+            )
+        else:
+            row = self.db.fetch_one(
+                "SELECT 1 AS x FROM terrenos WHERE manzana = ? AND numero_lote = ? AND id <> ? LIMIT 1",
+                (manzana, numero_lote, exclude_id),
+            )
+        return row is not None
+
     def list_disponibles(self) -> List[Terreno]:
         rows = self.db.fetch_all("SELECT * FROM terrenos WHERE estado = 'DISPONIBLE' ORDER BY id")
         return self._rows_to_entities(rows)
@@ -102,6 +275,48 @@ class TerrenoRepository:
         )
         self.db.execute(sql, params)
 
+    def patch(self, terreno_id: int, changes: Mapping[str, Any]) -> bool:
+        """Actualiza sólo las columnas de `changes` (p. ej. Terreno.changes()). False si no hubo cambios."""
+        stmt = build_update("terrenos", terreno_id, changes, self.PATCH_COLUMNS)
+        return stmt is not None and self.db.execute(*stmt) > 0
+
+    def update_many(self, changes_by_id: Mapping[int, Mapping[str, Any]]) -> int:
+        """
+        Como patch() para varias terrenos ({id: cambios}): un executemany por conjunto de columnas,
+        todo en una transacción. Retorna filas afectadas.
+        """
+        total = 0
+        with self.db.transaction():
+            for sql, rows in build_update_many("terrenos", changes_by_id, self.PATCH_COLUMNS):
+                total += self.db.execute_many(sql, rows)
+        return total
+
+    def cambiar_estado_si(self, terreno_id: int, nuevo: str, desde: Iterable[str]) -> bool:
+        """
+        Transición condicional en una sentencia: sólo cambia si el estado actual está en `desde`.
+        Retorna False si no se aplicó (id inexistente u otro estado, p. ej. ya reservado por otro).
+        """
+        desde = tuple(desde)
+        marks = ",".join("?" * len(desde))
+        sql = f"UPDATE terrenos SET estado = ? WHERE id = ? AND estado IN ({marks})"
+        return self.db.execute(sql, (nuevo, terreno_id, *desde)) > 0
+
+    def estados_de(self, ids: Iterable[int]) -> Dict[int, str]:
+        """{id: estado} de los ids existentes (una consulta IN por trozo)."""
+        rows = self.db.fetch_all_in("SELECT id, estado FROM terrenos WHERE id IN ({ids})", list(ids))
+        return {int(r["id"]): r["estado"] for r in rows}
+
+    def cambiar_estado_many(self, ids: Iterable[int], nuevo: str, desde: Iterable[str]) -> int:
+        """Como cambiar_estado_si para un conjunto: un UPDATE ... IN por trozo. Retorna filas cambiadas."""
+        desde = tuple(desde)
+        marks = ",".join("?" * len(desde))
+        sql = f"UPDATE terrenos SET estado = ? WHERE estado IN ({marks}) AND id IN ({{ids}})"
+        return self.db.execute_in(sql, list(ids), (nuevo, *desde))
+
+    def asignar_loteo_many(self, ids: Iterable[int], loteo_id: Optional[int]) -> int:
+        """Asigna (o quita, con None) el loteo a un conjunto de terrenos. Retorna filas cambiadas."""
+        return self.db.execute_in("UPDATE terrenos SET loteo_id = ? WHERE id IN ({ids})", list(ids), (loteo_id,))
+
     def delete(self, terreno_id: int) -> None:
         """Eliminación física (simple). Más adelante podemos implementar baja lógica."""
         self.db.execute("DELETE FROM terrenos WHERE id = ?", (terreno_id,))
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Iterable, Iterator, List, Mapping, Optional
 
 from core.database import Database
+from core.pagination import Order, Page, keyset_page, map_page
 from entities.usuario import Usuario
 
 
 class UsuarioRepository:
     """Repositorio para operaciones CRUD sobre la tabla usuarios."""
 
+    PAGE_FILTERS = ("activo", "rol")
+
     def __init__(self) -> None:
         self.db = Database()
 
@@ -47,6 +50,14 @@ class UsuarioRepository:
         row = self.db.fetch_one("SELECT last_insert_rowid() AS id")
         return int(row["id"]) if row else 0
 
+    def exists(self, user_id: int) -> bool:
+        row = self.db.fetch_one("SELECT 1 AS x FROM usuarios WHERE id = ?", (user_id,))
+        return row is not None
+
+    def existing_ids(self, ids: Iterable[int]) -> set[int]:
+        """IDs de `ids` que existen (una consulta IN por trozo, sin armar entidades)."""
+        return self.db.existing_ids("usuarios", ids)
+
     def find_by_id(self, user_id: int) -> Optional[Usuario]:
         """Busca un usuario por ID."""
         row = self.db.fetch_one("SELECT * FROM usuarios WHERE id = ?", (user_id,))
@@ -62,6 +73,35 @@ class UsuarioRepository:
         rows = self.db.fetch_all("SELECT * FROM usuarios WHERE activo = 1 ORDER BY id")
         return [self._row_to_usuario(r) for r in rows]
 
+    def iter_all(self, batch_size: int = 500) -> Iterator[Usuario]:
+        """Como find_all() (sólo activos) pero perezoso."""
+        query = "SELECT * FROM usuarios WHERE activo = 1 ORDER BY id"
+        for row in self.db.fetch_iter(query, batch_size=batch_size):
+            yield self._row_to_usuario(row)
+
+    def find_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        order: Order = "asc",
+        filters: Optional[Mapping[str, Any]] = None,
+        token: Optional[str] = None,
+        include_total: bool = False,
+    ) -> Page[Usuario]:
+        """Página keyset por id; como find_all, sólo activos salvo que se filtre por 'activo'. Filtros: activo, rol."""
+        page = keyset_page(
+            self.db,
+            "usuarios",
+            after_id=after_id,
+            token=token,
+            limit=limit,
+            order=order,
+            filters={"activo": 1, **(filters or {})},
+            allowed_filters=self.PAGE_FILTERS,
+            include_total=include_total,
+        )
+        return map_page(page, lambda rows: [self._row_to_usuario(r) for r in rows])
+
     def update(self, usuario: Usuario) -> None:
         """Actualiza datos de un usuario existente."""
         query = (
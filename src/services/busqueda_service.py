@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import re
+from itertools import zip_longest
+from typing import Iterable, List, Optional
+
+from entities.resultado_busqueda import ResultadoBusqueda, TipoResultado
+from repositories.busqueda_repository import BusquedaRepository
+
+TIPOS: tuple[TipoResultado, ...] = ("TERRENO", "EDIFICACION", "RESERVA")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class BusquedaService:
+    """Búsqueda de texto completo sobre terrenos, edificaciones y reservas."""
+
+    def __init__(self, repo: Optional[BusquedaRepository] = None) -> None:
+        self.repo = repo or BusquedaRepository()
+
+    @staticmethod
+    def _match_expr(texto: str) -> str:
+        """
+        Convierte lo escrito por el usuario en una consulta FTS5 segura:
+        cada palabra como prefijo entre comillas, todas requeridas ("jose"* "pena"*).
+        """
+        tokens = _TOKEN_RE.findall(texto or "")
+        return " ".join(f'"{t}"*' for t in tokens)
+
+    def buscar(
+        self,
+        texto: str,
+        tipos: Optional[Iterable[TipoResultado]] = None,
+        limite: int = 20,
+    ) -> List[ResultadoBusqueda]:
+        """
+        Resultados de los tipos pedidos, cada tipo ordenado por relevancia (bm25) y los tipos
+        intercalados en el orden de `tipos` (1° terreno, 1° edificación, 1° reserva, 2° terreno...):
+        bm25 depende de las estadísticas de cada tabla FTS, así que sus puntajes no se comparan.
+        No distingue mayúsculas ni acentos; el snippet marca las coincidencias con « ».
+        """
+        match = self._match_expr(texto)
+        if not match:
+            return []
+        tipos = tuple(tipos or TIPOS)
+        for t in tipos:
+            if t not in TIPOS:
+                raise ValueError(f"Tipo de búsqueda inválido: {t}")
+        # cada search() ya viene ordenado por bm25 dentro de su tabla
+        por_tipo = [self.repo.search(t, match, limit=limite) for t in tipos]
+        hits = [h for ronda in zip_longest(*por_tipo) for h in ronda if h is not None]
+        return hits[:limite]
+
+    def reindexar(self) -> None:
+        self.repo.rebuild()
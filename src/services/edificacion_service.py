@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from typing import List, Optional, Iterable, Literal
 
+from core import query as q
+from core.events import CREADO, ELIMINADO, cambio, get_event_bus
 from entities.edificacion import Edificacion, TipoEdificacion, EstadoEdificacion
 from repositories.edificacion_repository import EdificacionRepository
 from repositories.terreno_repository import TerrenoRepository
+from services.resultado_masivo import ResultadoMasivo
 
 Estado = Literal["DISPONIBLE", "RESERVADO", "VENDIDO"]
 
@@ -20,6 +23,9 @@ class EdificacionService:
         self.erepo = erepo or EdificacionRepository()
         self.trepo = trepo or TerrenoRepository()
 
+    def _publicar(self, *cambios) -> None:
+        get_event_bus().publicar(cambios, db=self.erepo.db)
+
     # ---------- Validaciones ----------
     def _validate_core(self, e: Edificacion) -> None:
         if e.tipo not in ("CASA", "DUPLEX", "DEPARTAMENTO", "LOCAL", "GALPON"):
@@ -35,8 +41,10 @@ class EdificacionService:
     def _validate_terrenos_exist(self, terrenos_ids: Iterable[int]) -> None:
         if terrenos_ids is None:
             return
-        for tid in terrenos_ids:
-            if not self.trepo.find_by_id(int(tid)):
+        ids = [int(t) for t in terrenos_ids]
+        existentes = self.trepo.existing_ids(ids)
+        for tid in ids:
+            if tid not in existentes:
                 raise ValueError(f"Terreno inexistente (id={tid}).")
 
     # ---------- Reglas de estado ----------
@@ -60,45 +68,81 @@ class EdificacionService:
         """
         e = Edificacion(**datos)
         self._validate_core(e)
-        self._validate_terrenos_exist(e.terrenos_ids)
         if e.estado == "VENDIDO" and not e.terrenos_ids:
             raise ValueError("No se puede vender una edificación sin terrenos asociados.")
-        return self.erepo.create(e)
+        with self.erepo.db.transaction():
+            self._validate_terrenos_exist(e.terrenos_ids)
+            eid = self.erepo.create(e)
+            self._publicar(cambio("EDIFICACION", eid, CREADO))
+        return eid
 
     def obtener(self, eid: int) -> Optional[Edificacion]:
         return self.erepo.find_by_id(eid)
 
+    def obtener_varios(self, ids: Iterable[int]) -> List[Edificacion]:
+        """Las edificaciones existentes entre `ids`, en lote (p. ej. para parchear filas)."""
+        return self.erepo.find_by_ids(ids)
+
     def listar(self) -> List[Edificacion]:
         return self.erepo.find_all()
 
     def listar_disponibles(self) -> List[Edificacion]:
         return self.erepo.list_disponibles()
 
+    def buscar(
+        self,
+        estado: Optional[Estado] = None,
+        tipo: Optional[TipoEdificacion] = None,
+        superficie_min: Optional[float] = None,
+        superficie_max: Optional[float] = None,
+        texto: Optional[str] = None,
+        limite: Optional[int] = None,
+    ) -> List[Edificacion]:
+        """Listado filtrado en la base; `texto` busca en nombre, tipo y observaciones."""
+        return self.erepo.find_by(
+            [
+                q.eq("estado", estado),
+                q.eq("tipo", tipo),
+                q.gte("superficie_cubierta", superficie_min),
+                q.lte("superficie_cubierta", superficie_max),
+                q.contains(("nombre", "tipo", "observaciones"), texto),
+            ],
+            limit=limite,
+        )
+
     # ---------- API de actualización ----------
     def actualizar(self, eid: int, datos: dict) -> None:
-        actual = self.erepo.find_by_id(eid)
-        if not actual:
-            raise ValueError("Edificación no encontrada.")
-        # Merge
-        for k, v in (datos or {}).items():
-            setattr(actual, k, v)
-        self._validate_core(actual)
-        self._validate_terrenos_exist(actual.terrenos_ids)
-        if actual.estado == "VENDIDO" and not actual.terrenos_ids:
-            raise ValueError("Una edificación VENDIDA debe mantener al menos un terreno vinculado.")
-        self.erepo.update(actual)
+        with self.erepo.db.transaction():
+            actual = self.erepo.find_by_id(eid)
+            if not actual:
+                raise ValueError("Edificación no encontrada.")
+            # Merge
+            for k, v in (datos or {}).items():
+                setattr(actual, k, v)
+            self._validate_core(actual)
+            self._validate_terrenos_exist(actual.terrenos_ids)
+            if actual.estado == "VENDIDO" and not actual.terrenos_ids:
+                raise ValueError("Una edificación VENDIDA debe mantener al menos un terreno vinculado.")
+            # claves no actualizables (id, created_at, ...) se ignoran, como hacía update()
+            patchables = (*self.erepo.PATCH_COLUMNS, "terrenos_ids")
+            cambios = {k: v for k, v in actual.changes().items() if k in patchables}
+            self.erepo.patch(actual.id, cambios)
+            if cambios:
+                self._publicar(cambio("EDIFICACION", eid, campos=cambios))
 
     # ---------- Vínculos N:M ----------
     def reemplazar_terrenos(self, eid: int, nuevos_terrenos_ids: Iterable[int]) -> None:
-        e = self.erepo.find_by_id(eid)
-        if not e:
-            raise ValueError("Edificación no encontrada.")
-        nuevos = list(dict.fromkeys(int(t) for t in (nuevos_terrenos_ids or [])))  # sin duplicados
-        self._validate_terrenos_exist(nuevos)
-        if e.estado == "VENDIDO" and not nuevos:
-            raise ValueError("No se puede dejar sin terrenos una edificación VENDIDA.")
-        e.terrenos_ids = nuevos
-        self.erepo.update(e)
+        with self.erepo.db.transaction():
+            e = self.erepo.find_by_id(eid)
+            if not e:
+                raise ValueError("Edificación no encontrada.")
+            nuevos = list(dict.fromkeys(int(t) for t in (nuevos_terrenos_ids or [])))  # sin duplicados
+            self._validate_terrenos_exist(nuevos)
+            if e.estado == "VENDIDO" and not nuevos:
+                raise ValueError("No se puede dejar sin terrenos una edificación VENDIDA.")
+            e.terrenos_ids = nuevos
+            self.erepo.patch(e.id, e.changes())
+            self._publicar(cambio("EDIFICACION", eid, campos=("terrenos_ids",)))
 
     def agregar_terreno(self, eid: int, terreno_id: int) -> None:
         e = self.erepo.find_by_id(eid)
@@ -106,8 +150,9 @@ class EdificacionService:
             raise ValueError("Edificación no encontrada.")
         self._validate_terrenos_exist([terreno_id])
         if terreno_id not in e.terrenos_ids:
-            e.terrenos_ids.append(int(terreno_id))
-            self.erepo.update(e)
+            e.terrenos_ids = [*e.terrenos_ids, int(terreno_id)]
+            self.erepo.patch(e.id, e.changes())
+            self._publicar(cambio("EDIFICACION", eid, campos=("terrenos_ids",)))
 
     def quitar_terreno(self, eid: int, terreno_id: int) -> None:
         e = self.erepo.find_by_id(eid)
@@ -117,19 +162,49 @@ class EdificacionService:
             if e.estado == "VENDIDO" and len(e.terrenos_ids) <= 1:
                 raise ValueError("No se puede quitar el último terreno de una edificación VENDIDA.")
             e.terrenos_ids = [t for t in e.terrenos_ids if t != int(terreno_id)]
-            self.erepo.update(e)
+            self.erepo.patch(e.id, e.changes())
+            self._publicar(cambio("EDIFICACION", eid, campos=("terrenos_ids",)))
 
     # ---------- Estado ----------
     def cambiar_estado(self, eid: int, nuevo_estado: Estado) -> None:
+        """Una sola sentencia condicional; la edificación sólo se lee si la transición no se aplicó."""
+        desde = tuple(a for a in ("DISPONIBLE", "RESERVADO", "VENDIDO") if self._can_transition(a, nuevo_estado))
+        if desde and self.erepo.cambiar_estado_si(eid, nuevo_estado, desde, con_terrenos=nuevo_estado == "VENDIDO"):
+            self._publicar(cambio("EDIFICACION", eid, campos=("estado",)))
+            return
         e = self.erepo.find_by_id(eid)
         if not e:
             raise ValueError("Edificación no encontrada.")
         if not self._can_transition(e.estado, nuevo_estado):
             raise ValueError(f"Transición de estado inválida: {e.estado} → {nuevo_estado}")
-        if nuevo_estado == "VENDIDO" and not e.terrenos_ids:
-            raise ValueError("Para marcar como VENDIDO debe haber al menos un terreno vinculado.")
-        e.estado = nuevo_estado
-        self.erepo.update(e)
+        raise ValueError("Para marcar como VENDIDO debe haber al menos un terreno vinculado.")
+
+    def cambiar_estado_many(self, ids: Iterable[int], nuevo_estado: Estado) -> ResultadoMasivo:
+        """
+        Cambia el estado de varias edificaciones en una transacción (una lectura + un UPDATE
+        condicional por trozo). Reporta por id las que no admiten la transición.
+        """
+        desde = tuple(a for a in ("DISPONIBLE", "RESERVADO", "VENDIDO") if self._can_transition(a, nuevo_estado))
+        if not desde:
+            raise ValueError(f"Estado inválido: {nuevo_estado}")
+        ids = list(dict.fromkeys(int(i) for i in ids))
+        res = ResultadoMasivo()
+        with self.erepo.db.transaction(immediate=True):
+            estados = self.erepo.estados_de(ids)
+            for eid in ids:
+                if eid not in estados:
+                    res.rechazados[eid] = "Edificación no encontrada."
+                    continue
+                actual, con_terrenos = estados[eid]
+                if actual not in desde:
+                    res.rechazados[eid] = f"Transición de estado inválida: {actual} → {nuevo_estado}"
+                elif nuevo_estado == "VENDIDO" and not con_terrenos:
+                    res.rechazados[eid] = "Para marcar como VENDIDO debe haber al menos un terreno vinculado."
+                else:
+                    res.aplicados.append(eid)
+            self.erepo.cambiar_estado_many(res.aplicados, nuevo_estado, desde)
+            self._publicar(*(cambio("EDIFICACION", eid, campos=("estado",)) for eid in res.aplicados))
+        return res
 
     # ---------- Eliminación ----------
     def eliminar(self, eid: int) -> None:
@@ -139,4 +214,5 @@ class EdificacionService:
         if e.estado == "VENDIDO":
             raise ValueError("No se puede eliminar una edificación VENDIDA.")
         self.erepo.delete(eid)
+        self._publicar(cambio("EDIFICACION", eid, ELIMINADO))
 
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.events import Cambio, get_event_bus
+from entities.edificacion import Edificacion
+from entities.terreno import Terreno
+from repositories.edificacion_repository import EdificacionRepository
+from repositories.terreno_repository import TerrenoRepository
+
+TIPOS = ("TERRENO", "EDIFICACION")
+
+# columnas que forman cada etiqueta: cambios en otras no la invalidan
+_CAMPOS_ETIQUETA = {
+    "TERRENO": ("manzana", "numero_lote", "superficie"),
+    "EDIFICACION": ("tipo", "superficie_cubierta", "terrenos_ids"),
+}
+
+
+def etiqueta_terreno(t: Terreno) -> str:
+    return f"{t.id} | Mz {t.manzana} · Lote {t.numero_lote} · {t.superficie} m²"
+
+
+def etiqueta_edificacion(e: Edificacion) -> str:
+    terrs = ",".join(str(x) for x in (e.terrenos_ids or []))
+    sup = "" if e.superficie_cubierta is None else f"{e.superficie_cubierta} m²"
+    return f"{e.id} | {e.tipo} {sup} · Terrenos [{terrs}]"
+
+
+class IndicePropiedades:
+    """
+    Etiquetas "ID | descripción" de terrenos y edificaciones, por (tipo, id), compartidas
+    por las pantallas (combos y listas de selección).
+    - Cada tipo se arma con una sola consulta la primera vez que se pide.
+    - Escucha los cambios que publican los servicios (ver al_cambiar): sólo las filas
+      invalidadas se releen (en una consulta IN) en el próximo acceso; un cambio sin id
+      descarta el tipo entero.
+    - Es seguro entre hilos (las pantallas lo consultan desde el pool de AsyncLoader).
+    """
+
+    def __init__(
+        self,
+        trepo: Optional[TerrenoRepository] = None,
+        erepo: Optional[EdificacionRepository] = None,
+    ) -> None:
+        self.trepo = trepo or TerrenoRepository()
+        self.erepo = erepo or EdificacionRepository()
+        self._lock = threading.RLock()
+        self._labels: Dict[str, Dict[int, str]] = {}  # sólo tipos ya construidos
+        self._dirty: Dict[str, Set[int]] = {}
+
+    def etiquetas(self, tipo: str) -> List[Tuple[int, str]]:
+        """(id, etiqueta) de todas las propiedades del tipo, ordenadas por id."""
+        with self._lock:
+            return sorted(self._ensure(tipo).items())
+
+    def mapa(self, tipo: str) -> Dict[int, str]:
+        with self._lock:
+            return dict(self._ensure(tipo))
+
+    def etiqueta(self, tipo: str, pid: int) -> Optional[str]:
+        with self._lock:
+            return self._ensure(tipo).get(int(pid))
+
+    def invalidar(self, tipo: str, pid: Optional[int] = None) -> None:
+        with self._lock:
+            if tipo not in self._labels:
+                return  # nada cacheado todavía
+            if pid is None:
+                del self._labels[tipo]
+                self._dirty.pop(tipo, None)
+            else:
+                self._dirty.setdefault(tipo, set()).add(int(pid))
+
+    def al_cambiar(self, cambios: List[Cambio]) -> None:
+        """Handler del bus de eventos: invalida las etiquetas afectadas."""
+        for c in cambios:
+            campos = _CAMPOS_ETIQUETA.get(c.entidad)
+            if campos is not None and c.toca(campos):
+                self.invalidar(c.entidad, c.id)
+
+    # ---------- internos ----------
+    def _ensure(self, tipo: str) -> Dict[int, str]:
+        labels = self._labels.get(tipo)
+        if labels is None:
+            labels = dict(self._cargar(tipo))
+            self._labels[tipo] = labels
+            self._dirty.pop(tipo, None)
+        dirty = self._dirty.pop(tipo, None)
+        if dirty:
+            for pid in dirty:
+                labels.pop(pid, None)  # si fue eliminada, no vuelve
+            labels.update(self._cargar(tipo, sorted(dirty)))
+        return labels
+
+    def _cargar(self, tipo: str, ids: Optional[List[int]] = None) -> Iterable[Tuple[int, str]]:
+        if tipo == "TERRENO":
+            terrenos = self.trepo.find_all() if ids is None else self.trepo.find_by_ids(ids)
+            return [(int(t.id), etiqueta_terreno(t)) for t in terrenos if t.id is not None]
+        if tipo == "EDIFICACION":
+            edificaciones = self.erepo.find_all() if ids is None else self.erepo.find_by_ids(ids)
+            return [(int(e.id), etiqueta_edificacion(e)) for e in edificaciones if e.id is not None]
+        raise ValueError("tipo_propiedad inválido.")
+
+
+_indice: Optional[IndicePropiedades] = None
+_indice_lock = threading.Lock()
+
+
+def get_indice_propiedades() -> IndicePropiedades:
+    """Instancia compartida por pantallas y servicios."""
+    global _indice
+    with _indice_lock:
+        if _indice is None:
+            _indice = IndicePropiedades()
+            get_event_bus().suscribir(TIPOS, _indice.al_cambiar)
+        return _indice
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from typing import List, Optional, Iterable, Literal
+from typing import List, Optional, Iterable, Literal, Tuple
 
+from core.events import CREADO, ELIMINADO, cambio, get_event_bus
 from entities.loteo import Loteo
 from repositories.loteo_repository import LoteoRepository
 from repositories.terreno_repository import TerrenoRepository
@@ -14,27 +15,45 @@ class LoteoService:
         self.lrepo = lrepo or LoteoRepository()
         self.trepo = trepo or TerrenoRepository()
 
+    def _publicar(self, *cambios) -> None:
+        get_event_bus().publicar(cambios, db=self.lrepo.db)
+
     def _validate(self, l: Loteo) -> None:
         if l.estado not in ("ACTIVO","PAUSADO","CERRADO"):
             raise ValueError("Estado de loteo inválido.")
         # validar existencia de terrenos elegidos
-        for tid in l.terrenos_ids or []:
-            if not self.trepo.find_by_id(int(tid)):
+        self._validate_terrenos_exist(l.terrenos_ids or [])
+
+    def _validate_terrenos_exist(self, terrenos_ids: Iterable[int]) -> None:
+        """Una consulta por lote de ids en lugar de un find_by_id por terreno."""
+        ids = [int(t) for t in terrenos_ids]
+        existentes = self.trepo.existing_ids(ids)
+        for tid in ids:
+            if tid not in existentes:
                 raise ValueError(f"Terreno inexistente (id={tid}).")
 
     def crear(self, datos: dict) -> int:
         l = Loteo(**datos)
-        self._validate(l)
-        return self.lrepo.create(l)
+        with self.lrepo.db.transaction():
+            self._validate(l)
+            lid = self.lrepo.create(l)
+            self._publicar(
+                cambio("LOTEO", lid, CREADO),
+                *(cambio("TERRENO", tid, campos=("loteo_id",)) for tid in dict.fromkeys(l.terrenos_ids or [])),
+            )
+            return lid
 
     def actualizar(self, loteo_id: int, datos: dict) -> None:
-        actual = self.lrepo.find_by_id(loteo_id)
-        if not actual:
-            raise ValueError("Loteo no encontrado.")
-        for k, v in (datos or {}).items():
-            setattr(actual, k, v)
-        self._validate(actual)
-        self.lrepo.update(actual)
+        with self.lrepo.db.transaction():
+            actual = self.lrepo.find_by_id(loteo_id)
+            if not actual:
+                raise ValueError("Loteo no encontrado.")
+            for k, v in (datos or {}).items():
+                setattr(actual, k, v)
+            self._validate(actual)
+            self.lrepo.update(actual)
+            # update() reasigna terrenos: también cambian los que salieron del loteo
+            self._publicar(cambio("LOTEO", loteo_id), cambio("TERRENO", None, campos=("loteo_id",)))
 
     def obtener(self, loteo_id: int) -> Optional[Loteo]:
         return self.lrepo.find_by_id(loteo_id)
@@ -42,15 +61,25 @@ class LoteoService:
     def listar(self) -> List[Loteo]:
         return self.lrepo.find_all()
 
+    def listar_con_cantidad(self) -> List[Tuple[Loteo, int]]:
+        """Loteos con la cantidad de terrenos asignados, sin cargar las listas de ids."""
+        cantidades = self.lrepo.contar_terrenos_por_loteo()
+        return [(l, cantidades.get(int(l.id or 0), 0)) for l in self.lrepo.find_all(with_terrenos=False)]
+
     def eliminar(self, loteo_id: int) -> None:
         # regla: permitir borrar, desasignando primero todos los terrenos
         self.lrepo.delete(loteo_id)
+        self._publicar(cambio("LOTEO", loteo_id, ELIMINADO), cambio("TERRENO", None, campos=("loteo_id",)))
 
     # vínculos
     def reemplazar_terrenos(self, loteo_id: int, nuevos_ids: Iterable[int]) -> None:
-        # valida y delega
-        for tid in (nuevos_ids or []):
-            if not self.trepo.find_by_id(int(tid)):
-                raise ValueError(f"Terreno inexistente (id={tid}).")
-        self.lrepo.reemplazar_terrenos(loteo_id, list(dict.fromkeys(int(t) for t in (nuevos_ids or []))))
+        # valida y delega en una sola unidad de trabajo
+        nuevos = list(dict.fromkeys(int(t) for t in (nuevos_ids or [])))
+        with self.lrepo.db.transaction():
+            self._validate_terrenos_exist(nuevos)
+            self.lrepo.reemplazar_terrenos(loteo_id, nuevos)
+            self._publicar(
+                cambio("LOTEO", loteo_id),  # cambia la cantidad de terrenos, que no es una columna
+                cambio("TERRENO", None, campos=("loteo_id",)),
+            )
 
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
-from typing import List, Optional, Literal
+import re
+from typing import Iterable, List, Optional, Literal
 
-from entities.reserva import Reserva
+from core import query as q
+from core.database import unique_violation
+from core.events import CREADO, ELIMINADO, cambio, get_event_bus
+from entities.reserva import Reserva, TipoPropiedad
 from repositories.reserva_repository import ReservaRepository
 from repositories.terreno_repository import TerrenoRepository
 from repositories.edificacion_repository import EdificacionRepository
 
 Estado = Literal["ACTIVA", "CANCELADA", "CONFIRMADA"]
 
+# "TERRENO #12", "edificacion #3" o "#12": la referencia que muestra el listado
+_REF_PROPIEDAD = re.compile(r"^(TERRENO|EDIFICACION)?\s*#\s*(\d+)$", re.IGNORECASE)
+
 
 class ReservaService:
     """Reglas de negocio para Reservas."""
@@ -20,46 +27,188 @@ class ReservaService:
 
     def _validate(self, r: Reserva) -> None:
         if r.tipo_propiedad == "TERRENO":
-            if not self.trepo.find_by_id(r.propiedad_id):
+            if not self.trepo.exists(r.propiedad_id):
                 raise ValueError(f"Terreno {r.propiedad_id} inexistente.")
         elif r.tipo_propiedad == "EDIFICACION":
-            if not self.erepo.find_by_id(r.propiedad_id):
+            if not self.erepo.exists(r.propiedad_id):
                 raise ValueError(f"Edificación {r.propiedad_id} inexistente.")
 
+    def _publicar(self, *cambios) -> None:
+        get_event_bus().publicar(cambios, db=self.repo.db)
+
+    def _prepo(self, tipo_propiedad: str):
+        return self.trepo if tipo_propiedad == "TERRENO" else self.erepo
+
+    @staticmethod
+    def _raise_if_activa_duplicada(exc: BaseException) -> None:
+        # única violación de unicidad posible en reservas: ux_reservas_activa_propiedad
+        if unique_violation(exc) is not None:
+            raise ValueError("La propiedad ya tiene una reserva activa.") from exc
+
+    def _create(self, r: Reserva) -> int:
+        try:
+            return self.repo.create(r)
+        except Exception as exc:
+            self._raise_if_activa_duplicada(exc)
+            raise
+
     def crear(self, datos: dict) -> int:
+        """Alta; una reserva ACTIVA bloquea la propiedad (se delega en reservar())."""
         r = Reserva(**datos)
-        self._validate(r)
-        return self.repo.create(r)
+        if r.estado == "ACTIVA":
+            return self.reservar(datos)
+        with self.repo.db.transaction():
+            self._validate(r)
+            rid = self._create(r)
+            self._publicar(cambio("RESERVA", rid, CREADO))
+            return rid
+
+    def reservar(self, datos: dict) -> int:
+        """
+        Reserva atómica: en una transacción pasa la propiedad de DISPONIBLE a RESERVADO con un
+        UPDATE condicional y crea la reserva ACTIVA. Si otro agente la reservó antes, el UPDATE
+        no afecta filas y se informa sin insertar nada; el índice único parcial de reservas
+        ACTIVA (migración 0015) cubre cualquier carrera restante.
+        """
+        r = Reserva(**{**datos, "estado": "ACTIVA"})
+        prepo = self._prepo(r.tipo_propiedad)
+        with self.repo.db.transaction(immediate=True):
+            if not prepo.cambiar_estado_si(r.propiedad_id, "RESERVADO", ("DISPONIBLE",)):
+                self._validate(r)  # distingue "inexistente" de "no disponible"
+                raise ValueError("La propiedad no está disponible para reservar.")
+            rid = self._create(r)
+            self._publicar(
+                cambio("RESERVA", rid, CREADO),
+                cambio(r.tipo_propiedad, r.propiedad_id, campos=("estado",)),
+            )
+            return rid
 
     def listar(self) -> List[Reserva]:
         return self.repo.find_all()
 
+    def buscar(
+        self,
+        estado: Optional[Estado] = None,
+        tipo_propiedad: Optional[TipoPropiedad] = None,
+        propiedad_id: Optional[int] = None,
+        fecha_desde: Optional[str] = None,
+        fecha_hasta: Optional[str] = None,
+        texto: Optional[str] = None,
+        limite: Optional[int] = None,
+    ) -> List[Reserva]:
+        """
+        Listado filtrado en la base, más recientes primero (los criterios en None no filtran).
+        Fechas en formato ISO (YYYY-MM-DD), inclusive.
+        `texto` busca en cliente, tipo e id de propiedad, fecha, monto, estado y observaciones;
+        una referencia "TIPO #id" (o "#id") filtra por esa propiedad.
+        """
+        ref = _REF_PROPIEDAD.match((texto or "").strip())
+        if ref:
+            tipo_propiedad = tipo_propiedad or (ref.group(1) or "").upper() or None
+            propiedad_id = int(ref.group(2))
+            texto = None
+        return self.repo.find_by(
+            [
+                q.eq("estado", estado),
+                q.eq("tipo_propiedad", tipo_propiedad),
+                q.eq("propiedad_id", propiedad_id),
+                q.gte("fecha_reserva", fecha_desde or None),
+                q.lte("fecha_reserva", fecha_hasta or None),
+                q.contains(
+                    (
+                        "cliente",
+                        "tipo_propiedad",
+                        "propiedad_id",
+                        "fecha_reserva",
+                        "monto_reserva",
+                        "estado",
+                        "observaciones",
+                    ),
+                    texto,
+                ),
+            ],
+            limit=limite,
+        )
+
     def obtener(self, rid: int) -> Optional[Reserva]:
         return self.repo.find_by_id(rid)
 
+    def obtener_varias(self, ids: Iterable[int]) -> List[Reserva]:
+        """Las reservas existentes entre `ids`, en lote (p. ej. para parchear filas)."""
+        return self.repo.find_by_ids(ids)
+
+    def _ocupar(self, r: Reserva) -> None:
+        """DISPONIBLE -> RESERVADO para la propiedad de `r` (misma regla que reservar())."""
+        if not self._prepo(r.tipo_propiedad).cambiar_estado_si(r.propiedad_id, "RESERVADO", ("DISPONIBLE",)):
+            raise ValueError("La propiedad no está disponible para reservar.")
+
+    def _liberar(self, tipo_propiedad: str, propiedad_id: int) -> bool:
+        """RESERVADO -> DISPONIBLE; False si la propiedad ya no estaba reservada (p. ej. vendida)."""
+        return self._prepo(tipo_propiedad).cambiar_estado_si(propiedad_id, "DISPONIBLE", ("RESERVADO",))
+
     def actualizar(self, rid: int, datos: dict) -> None:
-        r = self.repo.find_by_id(rid)
-        if not r:
-            raise ValueError("Reserva no encontrada.")
-        for k, v in (datos or {}).items():
-            setattr(r, k, v)
-        self._validate(r)
-        self.repo.update(r)
+        """
+        Modifica la reserva y, en la misma transacción, el estado de las propiedades afectadas:
+        - dejar de estar ACTIVA (p. ej. pasar a CANCELADA) libera la propiedad, como cancelar();
+        - pasar a ACTIVA, o mover una reserva ACTIVA a otra propiedad, reserva la nueva
+          (DISPONIBLE -> RESERVADO, como reservar()) y libera la anterior.
+        Pasar de ACTIVA a CONFIRMADA no toca la propiedad, igual que confirmar().
+        """
+        with self.repo.db.transaction(immediate=True):
+            r = self.repo.find_by_id(rid)
+            if not r:
+                raise ValueError("Reserva no encontrada.")
+            antes = (r.tipo_propiedad, r.propiedad_id) if r.estado == "ACTIVA" else None
+            for k, v in (datos or {}).items():
+                setattr(r, k, v)
+            self._validate(r)
+            # claves no actualizables (id, created_at, ...) se ignoran, como hacía update()
+            cambios = {k: v for k, v in r.changes().items() if k in self.repo.PATCH_COLUMNS}
+            despues = (r.tipo_propiedad, r.propiedad_id) if r.estado == "ACTIVA" else None
+            publicar = []
+            if antes != despues:
+                if antes is not None and r.estado != "CONFIRMADA" and self._liberar(*antes):
+                    publicar.append(cambio(antes[0], antes[1], campos=("estado",)))
+                if despues is not None:
+                    self._ocupar(r)
+                    publicar.append(cambio(r.tipo_propiedad, r.propiedad_id, campos=("estado",)))
+            try:
+                self.repo.patch(r.id, cambios)
+            except Exception as exc:
+                self._raise_if_activa_duplicada(exc)
+                raise
+            if cambios:
+                publicar.insert(0, cambio("RESERVA", rid, campos=cambios))
+            self._publicar(*publicar)
 
     def cancelar(self, rid: int) -> None:
-        r = self.repo.find_by_id(rid)
-        if not r:
-            raise ValueError("Reserva no encontrada.")
-        r.estado = "CANCELADA"
-        self.repo.update(r)
+        """Cancela la reserva; si estaba ACTIVA libera la propiedad (RESERVADO -> DISPONIBLE)."""
+        with self.repo.db.transaction():
+            r = self.repo.find_by_id(rid)
+            if not r:
+                raise ValueError("Reserva no encontrada.")
+            # condicionado al estado leído: si otro la cambió entre medio, no se pisa
+            if not self.repo.cambiar_estado_si(rid, "CANCELADA", (r.estado,)):
+                raise ValueError("La reserva cambió de estado; vuelva a intentar.")
+            publicar = [cambio("RESERVA", rid, campos=("estado",))]
+            if r.estado == "ACTIVA":
+                if self._liberar(r.tipo_propiedad, r.propiedad_id):
+                    publicar.append(cambio(r.tipo_propiedad, r.propiedad_id, campos=("estado",)))
+            self._publicar(*publicar)
 
     def confirmar(self, rid: int) -> None:
-        r = self.repo.find_by_id(rid)
-        if not r:
+        """Una sola sentencia: cualquier reserva existente pasa a CONFIRMADA (misma regla que antes)."""
+        if not self.repo.cambiar_estado_si(rid, "CONFIRMADA", ("ACTIVA", "CONFIRMADA", "CANCELADA")):
             raise ValueError("Reserva no encontrada.")
-        r.estado = "CONFIRMADA"
-        self.repo.update(r)
+        self._publicar(cambio("RESERVA", rid, campos=("estado",)))
 
     def eliminar(self, rid: int) -> None:
-        self.repo.delete(rid)
+        """Baja; si la reserva estaba ACTIVA libera la propiedad en la misma transacción."""
+        with self.repo.db.transaction(immediate=True):
+            r = self.repo.find_by_id(rid)
+            self.repo.delete(rid)
+            publicar = [cambio("RESERVA", rid, ELIMINADO)]
+            if r and r.estado == "ACTIVA" and self._liberar(r.tipo_propiedad, r.propiedad_id):
+                publicar.append(cambio(r.tipo_propiedad, r.propiedad_id, campos=("estado",)))
+            self._publicar(*publicar)
 
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class ResultadoMasivo:
+    """Reporte por id de una operación masiva (cambio de estado, asignación de loteo)."""
+
+    aplicados: List[int] = field(default_factory=list)
+    rechazados: Dict[int, str] = field(default_factory=dict)  # id -> motivo
+
+    @property
+    def ok(self) -> bool:
+        return not self.rechazados
+
+    def resumen(self, max_detalle: int = 10) -> str:
+        lineas = [f"{len(self.aplicados)} aplicados, {len(self.rechazados)} rechazados."]
+        for rid, motivo in list(self.rechazados.items())[:max_detalle]:
+            lineas.append(f"  #{rid}: {motivo}")
+        if len(self.rechazados) > max_detalle:
+            lineas.append(f"  ... y {len(self.rechazados) - max_detalle} más.")
+        return "\n".join(lineas)
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import List, Optional, Literal
+from typing import Iterable, List, Optional, Literal, Tuple
 
+from core import query as q
+from core.database import unique_violation
+from core.events import CREADO, ELIMINADO, cambio, get_event_bus
 from entities.terreno import Terreno
+from repositories.loteo_repository import LoteoRepository
 from repositories.terreno_repository import TerrenoRepository
+from services.resultado_masivo import ResultadoMasivo
 
 
 EstadoTerreno = Literal["DISPONIBLE", "RESERVADO", "VENDIDO"]
@@ -12,8 +17,9 @@ EstadoTerreno = Literal["DISPONIBLE", "RESERVADO", "VENDIDO"]
 class TerrenoService:
     """Lógica de negocio para Terreno: validaciones, búsquedas y estados."""
 
-    def __init__(self, repo: Optional[TerrenoRepository] = None) -> None:
+    def __init__(self, repo: Optional[TerrenoRepository] = None, lrepo: Optional[LoteoRepository] = None) -> None:
         self.repo = repo or TerrenoRepository()
+        self.lrepo = lrepo or LoteoRepository()
 
     # ---------- Validaciones ----------
     def _validate(self, t: Terreno) -> None:
@@ -25,20 +31,39 @@ class TerrenoService:
             raise ValueError("estado inválido.")
 
     def _exists_duplicate(self, manzana: str, numero_lote: str, exclude_id: Optional[int] = None) -> bool:
-        all_rows = self.repo.find_all()
-        for r in all_rows:
-            if r.manzana == manzana and r.numero_lote == numero_lote and r.id != exclude_id:
-                return True
-        return False
+        return self.repo.exists_by_manzana_lote(manzana, numero_lote, exclude_id=exclude_id)
+
+    def _publicar(self, *cambios) -> None:
+        get_event_bus().publicar(cambios, db=self.repo.db)
+
+    @staticmethod
+    def _raise_if_duplicate(exc: BaseException, msg_lote: str) -> None:
+        """
+        Traduce violaciones de los índices únicos (p. ej. dos altas concurrentes que pasaron
+        el sondeo) a los mismos ValueError que la validación previa.
+        """
+        causa = unique_violation(exc)
+        if causa is None:
+            return
+        if "nomenclatura" in causa:
+            raise ValueError("Ya existe un terreno con esa nomenclatura.") from exc
+        raise ValueError(msg_lote) from exc
 
     # ---------- API ----------
     def crear(self, datos: dict) -> int:
         """Crea un Terreno validando duplicados (manzana+numero_lote)."""
         t = Terreno(**datos)
         self._validate(t)
+        msg = "Ya existe un terreno con esa manzana y número de lote."
         if self._exists_duplicate(t.manzana, t.numero_lote):
-            raise ValueError("Ya existe un terreno con esa manzana y número de lote.")
-        return self.repo.create(t)
+            raise ValueError(msg)
+        try:
+            tid = self.repo.create(t)
+        except Exception as exc:
+            self._raise_if_duplicate(exc, msg)
+            raise
+        self._publicar(cambio("TERRENO", tid, CREADO))
+        return tid
 
     def actualizar(self, terreno_id: int, datos: dict) -> None:
         actual = self.repo.find_by_id(terreno_id)
@@ -47,13 +72,26 @@ class TerrenoService:
         for k, v in datos.items():
             setattr(actual, k, v)
         self._validate(actual)
+        msg = "Otro terreno con la misma manzana y número de lote ya existe."
         if self._exists_duplicate(actual.manzana, actual.numero_lote, exclude_id=actual.id):
-            raise ValueError("Otro terreno con la misma manzana y número de lote ya existe.")
-        self.repo.update(actual)
+            raise ValueError(msg)
+        # claves no actualizables (id, created_at, ...) se ignoran, como hacía update()
+        cambios = {k: v for k, v in actual.changes().items() if k in self.repo.PATCH_COLUMNS}
+        try:
+            self.repo.patch(actual.id, cambios)
+        except Exception as exc:
+            self._raise_if_duplicate(exc, msg)
+            raise
+        if cambios:
+            self._publicar(cambio("TERRENO", actual.id, campos=cambios))
 
     def obtener(self, terreno_id: int) -> Optional[Terreno]:
         return self.repo.find_by_id(terreno_id)
 
+    def obtener_varios(self, ids: Iterable[int]) -> List[Terreno]:
+        """Los terrenos existentes entre `ids`, en lote (p. ej. para parchear filas)."""
+        return self.repo.find_by_ids(ids)
+
     def listar(self) -> List[Terreno]:
         return self.repo.find_all()
 
@@ -63,8 +101,53 @@ class TerrenoService:
     def eliminar(self, terreno_id: int) -> None:
         """Eliminación simple. (Más adelante: baja lógica si se requiere.)"""
         self.repo.delete(terreno_id)
+        self._publicar(
+            cambio("TERRENO", terreno_id, ELIMINADO),
+            # vínculos con edificaciones (cascada) y la cantidad por loteo: no se sabe cuáles
+            cambio("EDIFICACION", None, campos=("terrenos_ids",)),
+            cambio("LOTEO", None),
+        )
 
     # ---------- Búsquedas ----------
+    def buscar(
+        self,
+        estado: Optional[EstadoTerreno] = None,
+        manzana: Optional[str] = None,
+        loteo_id: Optional[int] = None,
+        superficie_min: Optional[float] = None,
+        superficie_max: Optional[float] = None,
+        texto: Optional[str] = None,
+        limite: Optional[int] = None,
+    ) -> List[Terreno]:
+        """
+        Listado filtrado en la base (los criterios en None no filtran).
+        `texto` busca en manzana, número de lote, nomenclatura, ubicación y observaciones.
+        """
+        return self.repo.find_by(
+            [
+                q.eq("estado", estado),
+                q.eq("manzana", (manzana or "").strip() or None),
+                q.eq("loteo_id", loteo_id),
+                q.gte("superficie", superficie_min),
+                q.lte("superficie", superficie_max),
+                q.contains(("manzana", "numero_lote", "nomenclatura", "ubicacion", "observaciones"), texto),
+            ],
+            limit=limite,
+        )
+
+    def sugerir(
+        self,
+        texto: str,
+        despues_de: Optional[Tuple[str, str, int]] = None,
+        limite: int = 50,
+    ) -> List[Terreno]:
+        """
+        Sugerencias para selectores: prefijo de manzana, "manzana lote" o nomenclatura, sin
+        distinguir mayúsculas, ordenadas por manzana y lote. Para la página siguiente pasar
+        `despues_de` = (manzana, numero_lote, id) del último terreno recibido.
+        """
+        return self.repo.buscar_prefijo(texto, despues_de=despues_de, limit=limite)
+
     def buscar_por_nomenclatura(self, nomenclatura: str) -> Optional[Terreno]:
         """Devuelve un Terreno por nomenclatura exacta; None si no existe o string vacío."""
         return self.repo.find_by_nomenclatura(nomenclatura)
@@ -93,16 +176,74 @@ class TerrenoService:
         return self.crear(payload)
 
     # ---------- Reglas de estado ----------
+    # estados desde los que se puede pasar a cada estado
+    _TRANSICIONES = {
+        "DISPONIBLE": ("DISPONIBLE", "RESERVADO"),
+        "RESERVADO": ("DISPONIBLE",),
+        "VENDIDO": ("DISPONIBLE", "RESERVADO", "VENDIDO"),
+    }
+
     def cambiar_estado(self, terreno_id: int, nuevo_estado: EstadoTerreno) -> None:
+        """Una sola sentencia condicional; el terreno sólo se lee si la transición no se aplicó."""
+        if nuevo_estado not in self._TRANSICIONES:
+            raise ValueError("estado inválido.")
+        if self.repo.cambiar_estado_si(terreno_id, nuevo_estado, self._TRANSICIONES[nuevo_estado]):
+            self._publicar(cambio("TERRENO", terreno_id, campos=("estado",)))
+            return
         t = self.repo.find_by_id(terreno_id)
         if not t:
             raise ValueError("Terreno no encontrado.")
-        if nuevo_estado not in ("DISPONIBLE", "RESERVADO", "VENDIDO"):
-            raise ValueError("estado inválido.")
-        if t.estado == "VENDIDO" and nuevo_estado != "VENDIDO":
+        if t.estado == "VENDIDO":
             raise ValueError("No se puede revertir un terreno VENDIDO.")
-        if nuevo_estado == "RESERVADO" and t.estado != "DISPONIBLE":
-            raise ValueError("Sólo se puede reservar un terreno DISPONIBLE.")
-        t.estado = nuevo_estado
-        self.repo.update(t)
+        raise ValueError("Sólo se puede reservar un terreno DISPONIBLE.")
 
+    # ---------- Operaciones masivas ----------
+    def cambiar_estado_many(self, ids: Iterable[int], nuevo_estado: EstadoTerreno) -> ResultadoMasivo:
+        """
+        Cambia el estado de varios terrenos en una transacción: una lectura de estados y un
+        UPDATE condicional por trozo de ids. Los que no admiten la transición quedan en
+        `rechazados` con el mismo motivo que cambiar_estado(); el resto se aplica.
+        """
+        if nuevo_estado not in self._TRANSICIONES:
+            raise ValueError("estado inválido.")
+        desde = self._TRANSICIONES[nuevo_estado]
+        ids = list(dict.fromkeys(int(i) for i in ids))
+        res = ResultadoMasivo()
+        with self.repo.db.transaction(immediate=True):
+            estados = self.repo.estados_de(ids)
+            for tid in ids:
+                actual = estados.get(tid)
+                if actual is None:
+                    res.rechazados[tid] = "Terreno no encontrado."
+                elif actual not in desde:
+                    res.rechazados[tid] = (
+                        "No se puede revertir un terreno VENDIDO."
+                        if actual == "VENDIDO"
+                        else "Sólo se puede reservar un terreno DISPONIBLE."
+                    )
+                else:
+                    res.aplicados.append(tid)
+            self.repo.cambiar_estado_many(res.aplicados, nuevo_estado, desde)
+            self._publicar(*(cambio("TERRENO", tid, campos=("estado",)) for tid in res.aplicados))
+        return res
+
+    def asignar_loteo_many(self, ids: Iterable[int], loteo_id: Optional[int]) -> ResultadoMasivo:
+        """Asigna varios terrenos a un loteo (None = quitar del loteo) en una transacción."""
+        ids = list(dict.fromkeys(int(i) for i in ids))
+        res = ResultadoMasivo()
+        with self.repo.db.transaction():
+            if loteo_id is not None and not self.lrepo.exists(loteo_id):
+                raise ValueError("Loteo no encontrado.")
+            existentes = self.repo.existing_ids(ids)
+            for tid in ids:
+                if tid in existentes:
+                    res.aplicados.append(tid)
+                else:
+                    res.rechazados[tid] = "Terreno no encontrado."
+            self.repo.asignar_loteo_many(res.aplicados, loteo_id)
+            if res.aplicados:
+                self._publicar(
+                    *(cambio("TERRENO", tid, campos=("loteo_id",)) for tid in res.aplicados),
+                    cambio("LOTEO", None),
+                )
+        return res
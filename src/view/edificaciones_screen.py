@@ -5,13 +5,17 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Any, Optional, List
 
+from core.events import Cambio, resumir
 from core.frame_manager import BaseScreen
 from view.widgets.base_table import BaseTable
 from view.widgets.base_form import BaseForm
+from view.widgets.terreno_picker import TerrenoPicker
 from services.edificacion_service import EdificacionService
 from services.terreno_service import TerrenoService
 from entities.edificacion import Edificacion
 
+_CAMPOS_TABLA = ("tipo", "superficie_cubierta", "terrenos_ids")
+
 
 class EdificacionesScreen(BaseScreen):
     """
@@ -25,12 +29,10 @@ class EdificacionesScreen(BaseScreen):
         self.svc = EdificacionService()
         self.tsvc = TerrenoService()
         self._selected_id: Optional[int] = None
-        self._current_terrenos: List[int] = []
-        self._terrenos_all: dict[int, str] = {}
 
         self._build_ui()
-        self._load_terrenos_cache()
         self._load_table()
+        self.escuchar("EDIFICACION", self._on_cambios_edificaciones)
 
     # ---------------- UI ----------------
     def _build_ui(self) -> None:
@@ -47,6 +49,18 @@ class EdificacionesScreen(BaseScreen):
         entry_buscar.pack(side="left", padx=5)
         entry_buscar.bind("<KeyRelease>", lambda e: self.tbl.filter_rows(self.var_buscar.get()))
 
+        # Cambio de estado sobre la selección (Ctrl/Shift + clic para elegir varias)
+        ttk.Button(top, text="Aplicar", command=self._aplicar_estado_seleccion).pack(side="right")
+        self.var_estado_masivo = tk.StringVar()
+        ttk.Combobox(
+            top,
+            textvariable=self.var_estado_masivo,
+            values=["DISPONIBLE", "RESERVADO", "VENDIDO"],
+            width=12,
+            state="readonly",
+        ).pack(side="right", padx=5)
+        ttk.Label(top, text="Estado selección:").pack(side="right")
+
         # Tabla
         left = ttk.Frame(self)
         left.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
@@ -55,10 +69,10 @@ class EdificacionesScreen(BaseScreen):
             parent=left,
             columns=[
                 ("tipo", "Tipo", 120),
-                ("superficie_cubierta", "Sup. Cubierta (m²)", 160),
+                ("superficie_cubierta", "Sup. Cubierta (m²)", 160, "number"),
                 ("terrenos", "Terrenos", 200),
             ],
-            multiselect=False,
+            multiselect=True,
             height=18,
             on_select=self._on_select_table,
         )
@@ -92,25 +106,13 @@ class EdificacionesScreen(BaseScreen):
         self.form.add_combobox("estado", "Estado:", ["DISPONIBLE", "RESERVADO", "VENDIDO"], readonly=True)
         self.form.add_entry("observaciones", "Observaciones:")
 
-        # Selector múltiple de Terrenos (disponibles/seleccionados)
+        # Selector de Terrenos (búsqueda por prefijo / seleccionados)
         terr_box = ttk.LabelFrame(right, text="Terrenos asociados", padding=6)
         terr_box.grid(row=1, column=0, sticky="nsew", pady=(8, 0))
         terr_box.columnconfigure(0, weight=1)
-        terr_box.columnconfigure(1, weight=0)
-        terr_box.columnconfigure(2, weight=1)
-
-        self.list_disp = tk.Listbox(terr_box, selectmode=tk.EXTENDED, height=10)
-        self.list_disp.grid(row=0, column=0, sticky="nsew")
 
-        btns = ttk.Frame(terr_box)
-        btns.grid(row=0, column=1, padx=6)
-        ttk.Button(btns, text=">", width=3, command=self._move_to_selected).grid(row=0, column=0, pady=2)
-        ttk.Button(btns, text=">>", width=3, command=self._move_all_to_selected).grid(row=1, column=0, pady=2)
-        ttk.Button(btns, text="<", width=3, command=self._move_to_available).grid(row=2, column=0, pady=2)
-        ttk.Button(btns, text="<<", width=3, command=self._move_all_to_available).grid(row=3, column=0, pady=2)
-
-        self.list_sel = tk.Listbox(terr_box, selectmode=tk.EXTENDED, height=10)
-        self.list_sel.grid(row=0, column=2, sticky="nsew")
+        self.picker = TerrenoPicker(terr_box, svc=self.tsvc)
+        self.picker.grid(row=0, column=0, columnspan=3, sticky="nsew")
 
         # Acción para buscar/crear por nomenclatura y vincular al formulario
         ttk.Button(
@@ -147,46 +149,6 @@ class EdificacionesScreen(BaseScreen):
         sup = "" if e.superficie_cubierta is None else e.superficie_cubierta
         return (str(e.id), [e.tipo, sup, f"[{terrs}]"])
 
-    def _load_terrenos_cache(self) -> None:
-        self._terrenos_all = {}
-        try:
-            for t in self.tsvc.listar():
-                if t.id is None:
-                    continue
-                label = f"{t.id} | Mz {t.manzana} · Lote {t.numero_lote} · {t.superficie} m²"
-                self._terrenos_all[int(t.id)] = label
-        except Exception:
-            self._terrenos_all = {}
-
-    def _refresh_terrenos_lists(self) -> None:
-        disp_ids = [tid for tid in self._terrenos_all.keys() if tid not in set(self._current_terrenos)]
-        sel_ids = list(self._current_terrenos)
-
-        self.list_disp.delete(0, tk.END)
-        for tid in sorted(disp_ids):
-            self.list_disp.insert(tk.END, self._terrenos_all[tid])
-
-        self.list_sel.delete(0, tk.END)
-        for tid in sorted(sel_ids):
-            self.list_sel.insert(tk.END, self._terrenos_all.get(tid, str(tid)))
-
-    def _labels_to_ids(self, items: List[str]) -> List[int]:
-        ids: List[int] = []
-        for lab in items:
-            try:
-                ids.append(int(lab.split("|", 1)[0].strip()))
-            except Exception:
-                continue
-        return ids
-
-    def _move_to_selected(self) -> None:
-        items = [self.list_disp.get(i) for i in self.list_disp.curselection()]
-        ids = self._labels_to_ids(items)
-        for tid in ids:
-            if tid not in self._current_terrenos:
-                self._current_terrenos.append(tid)
-        self._refresh_terrenos_lists()
-
     def _open_terreno_lookup(self) -> None:
         """Abre un diálogo para ingresar nomenclatura y vincular o crear Terreno."""
         try:
@@ -201,36 +163,30 @@ class EdificacionesScreen(BaseScreen):
         TerrenoLookupDialog(self, self.tsvc, on_chosen)
 
     def _on_terreno_selected(self, terreno_id: int) -> None:
-        """Agrega el terreno seleccionado/creado a la selección actual y refresca listas."""
+        """Agrega el terreno seleccionado/creado a la selección actual."""
         try:
             tid = int(terreno_id)
         except Exception:
             return
-        if tid not in self._current_terrenos:
-            self._current_terrenos.append(tid)
-            # Recargar cache por si se creó un nuevo Terreno y reflejar etiquetas
-            self._load_terrenos_cache()
-            self._refresh_terrenos_lists()
-
-    def _move_all_to_selected(self) -> None:
-        self._current_terrenos = list(self._terrenos_all.keys())
-        self._refresh_terrenos_lists()
-
-    def _move_to_available(self) -> None:
-        items = [self.list_sel.get(i) for i in self.list_sel.curselection()]
-        ids = set(self._labels_to_ids(items))
-        self._current_terrenos = [tid for tid in self._current_terrenos if tid not in ids]
-        self._refresh_terrenos_lists()
-
-    def _move_all_to_available(self) -> None:
-        self._current_terrenos = []
-        self._refresh_terrenos_lists()
+        self.picker.add_ids([tid])
+        self.picker.refresh()  # por si se creó un Terreno que entra en la búsqueda actual
 
     def _load_table(self) -> None:
-        rows: List[tuple[str, list[Any]]] = []
-        for e in self.svc.listar():
-            rows.append(self._row_from_edificacion(e))
-        self.tbl.load_rows(rows)
+        def consultar() -> List[tuple[str, list[Any]]]:
+            return [self._row_from_edificacion(e) for e in self.svc.listar()]
+
+        self.load_async("tabla", consultar, self.tbl.load_rows)
+
+    def _on_cambios_edificaciones(self, cambios: List[Cambio]) -> None:
+        """Cambios publicados por los servicios (esta u otra pantalla): parchea sólo esas filas."""
+        p = resumir(cambios, "EDIFICACION", campos=_CAMPOS_TABLA)
+        if p.recargar:
+            self._load_table()
+            return
+        if p.quitar:
+            self.tbl.remove_rows([str(i) for i in p.quitar])
+        if p.actualizar:
+            self.tbl.upsert_rows([self._row_from_edificacion(e) for e in self.svc.obtener_varios(p.actualizar)])
 
     def _on_select_table(self, ids: list[str]) -> None:
         if not ids:
@@ -240,7 +196,6 @@ class EdificacionesScreen(BaseScreen):
         if not e:
             return
         self._selected_id = e.id
-        self._current_terrenos = list(e.terrenos_ids or [])
         self.form.set_values(
             {
                 "nombre": e.nombre or "",
@@ -256,7 +211,7 @@ class EdificacionesScreen(BaseScreen):
                 "observaciones": e.observaciones or "",
             }
         )
-        self._refresh_terrenos_lists()
+        self.picker.set_ids(e.terrenos_ids or [])
 
     def _collect_form(self) -> dict:
         data = self.form.get_values()
@@ -294,16 +249,15 @@ class EdificacionesScreen(BaseScreen):
             out["estado"] = data.get("estado")
         out["observaciones"] = (str(data.get("observaciones") or "").strip() or None)
         # Terrenos seleccionados
-        out["terrenos_ids"] = list(dict.fromkeys(int(t) for t in self._current_terrenos))
+        out["terrenos_ids"] = self.picker.get_ids()
         return out
 
     # ---------------- Acciones ----------------
     def _nuevo(self) -> None:
         self._selected_id = None
-        self._current_terrenos = []
         self.form.clear()
         self.form.set_values({"tipo": "CASA", "estado": "DISPONIBLE"})
-        self._refresh_terrenos_lists()
+        self.picker.set_ids([])
 
     def _guardar(self) -> None:
         if not self.form.validate():
@@ -314,7 +268,6 @@ class EdificacionesScreen(BaseScreen):
                 self.svc.actualizar(self._selected_id, data)
             else:
                 self._selected_id = self.svc.crear(data)
-            self._load_table()
             messagebox.showinfo("Éxito", "Edificación guardada correctamente.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -328,10 +281,30 @@ class EdificacionesScreen(BaseScreen):
         try:
             self.svc.eliminar(self._selected_id)
             self._nuevo()
-            self._load_table()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def _aplicar_estado_seleccion(self) -> None:
+        estado = self.var_estado_masivo.get()
+        if not estado:
+            messagebox.showwarning("Atención", "Elija el estado a aplicar.")
+            return
+        ids = [int(i) for i in self.tbl.selected_ids()]
+        if not ids:
+            messagebox.showwarning("Atención", "Seleccione una o más edificaciones.")
+            return
+        if not messagebox.askyesno("Confirmar", f"¿Pasar {len(ids)} edificación(es) a {estado}?"):
+            return
+        try:
+            res = self.svc.cambiar_estado_many(ids, estado)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if res.ok:
+            messagebox.showinfo("Resultado", res.resumen())
+        else:
+            messagebox.showwarning("Resultado", res.resumen())
+
     def _volver(self) -> None:
         if hasattr(self.app, "go_back"):
             self.app.go_back()
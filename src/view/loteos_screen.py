@@ -5,26 +5,24 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import List, Optional
 
+from core.events import Cambio, resumir
+from core.frame_manager import BaseScreen
 from services.loteo_service import LoteoService
-from services.terreno_service import TerrenoService
+from view.widgets.terreno_picker import TerrenoPicker
 
 
-class LoteosScreen(tk.Frame):
-    """ABM de Loteos con doble Listbox para asignar Terrenos."""
+class LoteosScreen(BaseScreen):
+    """ABM de Loteos con selector por búsqueda para asignar Terrenos."""
 
     def __init__(self, parent: tk.Misc, app: Optional[object] = None) -> None:
         super().__init__(parent)
         self.app = app
         self.lsvc = LoteoService()
-        self.tsvc = TerrenoService()
         self.selected_id: Optional[int] = None
 
-        # cache de terrenos: id -> etiqueta
-        self._terrenos_all: dict[int, str] = {}
-
         self._build_ui()
-        self._load_terrenos_cache()
         self._load_data()
+        self.escuchar("LOTEO", self._on_cambios_loteos)
 
     # --------------- UI ---------------
     def _build_ui(self) -> None:
@@ -50,7 +48,7 @@ class LoteosScreen(tk.Frame):
             "municipio": "Municipio",
             "provincia": "Provincia",
             "estado": "Estado",
-            "terr": "Terrenos",
+            "terr": "Cant. terrenos",
         }
         for c in cols:
             self.tree.heading(c, text=headers[c])
@@ -108,26 +106,14 @@ class LoteosScreen(tk.Frame):
         ttk.Label(form, text="Observaciones:").grid(row=7, column=0, sticky="ne", pady=3)
         ttk.Entry(form, textvariable=self.vars["observaciones"], width=28).grid(row=7, column=1, sticky="we")
 
-        # Selector múltiple de Terrenos
+        # Selector de Terrenos (búsqueda por prefijo / asignados)
         box = ttk.LabelFrame(form, text="Terrenos asociados", padding=6)
         box.grid(row=8, column=0, columnspan=2, sticky="nsew", pady=(8, 4))
         box.columnconfigure(0, weight=1)
-        box.columnconfigure(1, weight=0)
-        box.columnconfigure(2, weight=1)
-        box.rowconfigure(1, weight=1)
-
-        ttk.Label(box, text="Disponibles").grid(row=0, column=0)
-        ttk.Label(box, text="Asignados").grid(row=0, column=2)
+        box.rowconfigure(0, weight=1)
 
-        self.lb_disp = tk.Listbox(box, selectmode="extended", height=8, exportselection=False)
-        self.lb_sel = tk.Listbox(box, selectmode="extended", height=8, exportselection=False)
-        self.lb_disp.grid(row=1, column=0, sticky="nsew", padx=(0, 6))
-        self.lb_sel.grid(row=1, column=2, sticky="nsew", padx=(6, 0))
-
-        mid = ttk.Frame(box)
-        mid.grid(row=1, column=1, sticky="ns")
-        ttk.Button(mid, text=">>", width=3, command=self._add_selected).grid(row=0, column=0, pady=2)
-        ttk.Button(mid, text="<<", width=3, command=self._remove_selected).grid(row=1, column=0, pady=2)
+        self.picker = TerrenoPicker(box, height=8)
+        self.picker.grid(row=0, column=0, sticky="nsew")
 
         # Botones finales
         btns = ttk.Frame(form)
@@ -137,58 +123,45 @@ class LoteosScreen(tk.Frame):
         ttk.Button(btns, text="Eliminar", command=self._eliminar).grid(row=0, column=2, padx=4)
         ttk.Button(btns, text="Volver", command=self._volver).grid(row=0, column=3, padx=4)
 
-    # --------------- Helpers de datos ---------------
-    def _load_terrenos_cache(self) -> None:
-        self._terrenos_all.clear()
-        for t in self.tsvc.listar():
-            label = f"ID {t.id} · Mz {t.manzana} · Lote {t.numero_lote} · {t.superficie} m2"
-            self._terrenos_all[int(t.id)] = label
-
-    def _refresh_terrenos_lists(self, selected_ids: List[int] | None) -> None:
-        selected = set(selected_ids or [])
-        self.lb_disp.delete(0, tk.END)
-        self.lb_sel.delete(0, tk.END)
-        for tid, label in sorted(self._terrenos_all.items()):
-            if tid in selected:
-                self.lb_sel.insert(tk.END, f"{tid} | {label}")
-            else:
-                self.lb_disp.insert(tk.END, f"{tid} | {label}")
-
-    def _parse_listbox_ids(self, lb: tk.Listbox) -> List[int]:
-        ids: List[int] = []
-        for i in range(lb.size()):
-            item = lb.get(i)
-            tid = int(item.split("|", 1)[0].strip())
-            ids.append(tid)
-        return ids
-
-    def _selected_ids_from_listbox(self, lb: tk.Listbox) -> List[int]:
-        ids: List[int] = []
-        for i in lb.curselection():
-            item = lb.get(i)
-            tid = int(item.split("|", 1)[0].strip())
-            ids.append(tid)
-        return ids
-
     # --------------- Carga/Lista ---------------
     def _load_data(self) -> None:
+        self.load_async("tabla", self.lsvc.listar_con_cantidad, self._fill_tree)
+
+    def _fill_tree(self, loteos) -> None:
         for r in self.tree.get_children():
             self.tree.delete(r)
-        for l in self.lsvc.listar():
-            terrs = ",".join(str(t) for t in (l.terrenos_ids or []))
-            self.tree.insert(
-                "",
-                "end",
-                iid=l.id,
-                values=(
-                    l.nombre,
-                    l.ubicacion or "",
-                    l.municipio or "",
-                    l.provincia or "",
-                    l.estado or "ACTIVO",
-                    terrs,
-                ),
-            )
+        for l, cantidad in loteos:
+            self.tree.insert("", "end", iid=l.id, values=self._values_loteo(l, cantidad))
+
+    @staticmethod
+    def _values_loteo(l, cantidad: int) -> tuple:
+        return (
+            l.nombre,
+            l.ubicacion or "",
+            l.municipio or "",
+            l.provincia or "",
+            l.estado or "ACTIVO",
+            cantidad,
+        )
+
+    def _on_cambios_loteos(self, cambios: List[Cambio]) -> None:
+        """Cambios publicados por los servicios: reescribe sólo esas filas (los loteos son pocos)."""
+        p = resumir(cambios, "LOTEO", max_filas=20)
+        if p.recargar:
+            self._load_data()
+            return
+        for lid in p.quitar:
+            if self.tree.exists(lid):
+                self.tree.delete(lid)
+        for lid in p.actualizar:
+            l = self.lsvc.obtener(lid)
+            if l is None:
+                continue
+            values = self._values_loteo(l, len(l.terrenos_ids or []))
+            if self.tree.exists(lid):
+                self.tree.item(lid, values=values)
+            else:
+                self.tree.insert("", "end", iid=l.id, values=values)
 
     def _on_select(self, _event=None) -> None:
         sel = self.tree.selection()
@@ -208,7 +181,7 @@ class LoteosScreen(tk.Frame):
         self.vars["fecha_fin"].set(l.fecha_fin or "")
         self.vars["estado"].set(l.estado or "ACTIVO")
         self.vars["observaciones"].set(l.observaciones or "")
-        self._refresh_terrenos_lists(l.terrenos_ids)
+        self.picker.set_ids(l.terrenos_ids or [])
 
     # --------------- Acciones ---------------
     def _nuevo(self) -> None:
@@ -217,7 +190,7 @@ class LoteosScreen(tk.Frame):
             if isinstance(v, tk.StringVar):
                 v.set("")
         self.vars["estado"].set("ACTIVO")
-        self._refresh_terrenos_lists([])
+        self.picker.set_ids([])
 
     def _guardar(self) -> None:
         datos = {
@@ -229,7 +202,7 @@ class LoteosScreen(tk.Frame):
             "fecha_fin": (self.vars["fecha_fin"].get().strip() or None),
             "estado": self.vars["estado"].get().strip() or "ACTIVO",
             "observaciones": (self.vars["observaciones"].get().strip() or None),
-            "terrenos_ids": self._parse_listbox_ids(self.lb_sel),
+            "terrenos_ids": self.picker.get_ids(),
         }
         try:
             if self.selected_id:
@@ -237,7 +210,6 @@ class LoteosScreen(tk.Frame):
             else:
                 new_id = self.lsvc.crear(datos)
                 self.selected_id = new_id
-            self._load_data()
             messagebox.showinfo("Éxito", "Loteo guardado correctamente.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -250,7 +222,6 @@ class LoteosScreen(tk.Frame):
             return
         try:
             self.lsvc.eliminar(self.selected_id)
-            self._load_data()
             self._nuevo()
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -267,20 +238,3 @@ class LoteosScreen(tk.Frame):
                 self.app.show_screen(DashboardScreen)  # type: ignore[attr-defined]
             except Exception:
                 pass
-
-    # --------------- Listbox actions ---------------
-    def _add_selected(self) -> None:
-        for i in list(self.lb_disp.curselection()):
-            item = self.lb_disp.get(i)
-            self.lb_sel.insert(tk.END, item)
-        # remove from left after adding
-        for i in reversed(self.lb_disp.curselection()):
-            self.lb_disp.delete(i)
-
-    def _remove_selected(self) -> None:
-        for i in list(self.lb_sel.curselection()):
-            item = self.lb_sel.get(i)
-            self.lb_disp.insert(tk.END, item)
-        for i in reversed(self.lb_sel.curselection()):
-            self.lb_sel.delete(i)
-
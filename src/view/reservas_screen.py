@@ -5,12 +5,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Any, List, Tuple, Optional
 
+from core.events import Cambio, resumir
 from core.frame_manager import BaseScreen
 from view.widgets.base_table import BaseTable
 from view.widgets.base_form import BaseForm
 from services.reserva_service import ReservaService
-from services.terreno_service import TerrenoService
-from services.edificacion_service import EdificacionService
+from services.indice_propiedades import get_indice_propiedades
 
 
 class ReservasScreen(BaseScreen):
@@ -25,15 +25,19 @@ class ReservasScreen(BaseScreen):
         super().__init__(parent)
         self.app = app
         self.rsvc = ReservaService()
-        self.tsvc = TerrenoService()
-        self.esvc = EdificacionService()
 
         self.selected_id: Optional[int] = None
+        self.indice = get_indice_propiedades()
         self._cache_prop: List[Tuple[int, str]] = []  # (id, etiqueta "ID | ...")
+        self._cache_tipo: Optional[str] = None  # tipo cargado en el combo
+        self.filtro_delay_ms = 200
+        self._filtro_job: Optional[str] = None
 
         self._build_ui()
         self._load_propiedades_cache()
         self._load_table()
+        self.escuchar("RESERVA", self._on_cambios_reservas)
+        self.escuchar(("TERRENO", "EDIFICACION"), self._on_cambios_propiedades)
 
     # ---------------- UI ----------------
     def _build_ui(self) -> None:
@@ -48,7 +52,7 @@ class ReservasScreen(BaseScreen):
         self.var_buscar = tk.StringVar()
         entry_buscar = ttk.Entry(filter_frame, textvariable=self.var_buscar, width=30)
         entry_buscar.pack(side="left", padx=5)
-        entry_buscar.bind("<KeyRelease>", lambda e: self._filtrar_reservas())
+        entry_buscar.bind("<KeyRelease>", lambda e: self._programar_filtro())
 
         ttk.Label(filter_frame, text="Estado:").pack(side="left", padx=(10, 0))
         self.var_estado = tk.StringVar()
@@ -72,13 +76,14 @@ class ReservasScreen(BaseScreen):
                 ("tipo", "Tipo", 100),
                 ("prop", "Propiedad", 160),
                 ("cliente", "Cliente", 160),
-                ("fecha", "Fecha", 110),
-                ("monto", "Monto", 110),
+                ("fecha", "Fecha", 110, "date"),
+                ("monto", "Monto", 110, "number"),
                 ("estado", "Estado", 110),
             ],
             multiselect=False,
             height=18,
             on_select=self._on_select_table,
+            virtual=True,  # puede haber decenas de miles de reservas
         )
         self.tbl.pack(fill="both", expand=True)
 
@@ -149,30 +154,27 @@ class ReservasScreen(BaseScreen):
             return "Monto inválido."
         return None
 
-    def _load_propiedades_cache(self) -> None:
+    def _load_propiedades_cache(self, seleccionar: Optional[int] = None) -> None:
+        """Recarga el combo de propiedades en segundo plano; `seleccionar` fija la etiqueta al terminar."""
         tipo = self.form.get_values().get("tipo_propiedad") or "TERRENO"
-        self._cache_prop.clear()
-        labels: List[str] = []
-        try:
-            if tipo == "TERRENO":
-                for t in self.tsvc.listar():
-                    lab = f"{t.id} | Mz {t.manzana} · Lote {t.numero_lote} · {t.superficie} m²"
-                    if t.id is not None:
-                        self._cache_prop.append((int(t.id), lab))
-                        labels.append(lab)
-            else:
-                for e in self.esvc.listar():
-                    terrs = ",".join(str(x) for x in (e.terrenos_ids or []))
-                    sup = "" if e.superficie_cubierta is None else f"{e.superficie_cubierta} m²"
-                    lab = f"{e.id} | {e.tipo} {sup} · Terrenos [{terrs}]"
-                    if e.id is not None:
-                        self._cache_prop.append((int(e.id), lab))
-                        labels.append(lab)
-        except Exception as ex:
+
+        def aplicar(props: List[Tuple[int, str]]) -> None:
+            self._cache_prop = props
+            self._cache_tipo = tipo
+            self.cb_prop["values"] = [lab for _id, lab in props]
+            self.form.set_values({"propiedad_id": ""})
+            for _id, lab in props:
+                if _id == seleccionar:
+                    self.form.set_values({"propiedad_id": lab})
+                    break
+
+        def fallo(ex: BaseException) -> None:
+            self._cache_prop = []
+            self._cache_tipo = None
+            self.cb_prop["values"] = []
             messagebox.showerror("Error", f"No se pudieron cargar propiedades: {ex}")
-            labels = []
-        self.cb_prop["values"] = labels
-        self.form.set_values({"propiedad_id": ""})
+
+        self.load_async("propiedades", lambda: self.indice.etiquetas(tipo), aplicar, fallo)
 
     def _label_to_id(self, label: str) -> Optional[int]:
         try:
@@ -188,12 +190,29 @@ class ReservasScreen(BaseScreen):
         )
 
     def _load_table(self) -> None:
-        rows: List[tuple[str, list[Any]]] = []
-        for r in self.rsvc.listar():
-            rows.append(self._row_from_reserva(r))
-        self.tbl.load_rows(rows)
         self._filtrar_reservas()
 
+    def _on_cambios_reservas(self, cambios: List[Cambio]) -> None:
+        """Cambios publicados por los servicios: parchea sólo esas filas."""
+        p = resumir(cambios, "RESERVA")
+        if p.actualizar and (self.var_estado.get() or self.var_buscar.get().strip()):
+            # con filtro activo la fila nueva/modificada puede no corresponder: lo decide la base
+            p.recargar = True
+        if p.recargar:
+            self._filtrar_reservas()
+            return
+        if p.quitar:
+            self.tbl.remove_rows([str(i) for i in p.quitar])
+        if p.actualizar:
+            self.tbl.upsert_rows([self._row_from_reserva(r) for r in self.rsvc.obtener_varias(p.actualizar)])
+
+    def _on_cambios_propiedades(self, cambios: List[Cambio]) -> None:
+        """Altas/bajas/ediciones de propiedades: refresca las opciones del combo sin tocar la elegida."""
+        if self._cache_tipo is None or not any(c.entidad == self._cache_tipo for c in cambios):
+            return
+        self._cache_prop = self.indice.etiquetas(self._cache_tipo)  # sólo relee lo invalidado
+        self.cb_prop["values"] = [lab for _id, lab in self._cache_prop]
+
     def _on_select_table(self, ids: list[str]) -> None:
         if not ids:
             return
@@ -212,12 +231,11 @@ class ReservasScreen(BaseScreen):
                 "observaciones": r.observaciones or "",
             }
         )
-        # recargar opciones de propiedades y fijar label
-        self._load_propiedades_cache()
-        for _id, lab in self._cache_prop:
-            if _id == r.propiedad_id:
-                self.form.set_values({"propiedad_id": lab})
-                break
+        # fijar label: si el combo ya tiene ese tipo, basta un lookup en el índice
+        if self._cache_tipo == r.tipo_propiedad:
+            self.form.set_values({"propiedad_id": self.indice.etiqueta(r.tipo_propiedad, r.propiedad_id) or ""})
+        else:
+            self._load_propiedades_cache(seleccionar=r.propiedad_id)
 
     def _collect_form(self) -> dict:
         data = self.form.get_values()
@@ -241,16 +259,27 @@ class ReservasScreen(BaseScreen):
             "observaciones": (str(data.get("observaciones") or "").strip() or None),
         }
 
+    def _programar_filtro(self) -> None:
+        """Filtra con demora (como BaseTable.filter_rows): cada tecla reprograma la consulta."""
+        if self._filtro_job is not None:
+            self.after_cancel(self._filtro_job)
+        self._filtro_job = self.after(self.filtro_delay_ms, self._filtrar_reservas)
+
     def _filtrar_reservas(self) -> None:
-        estado = (self.var_estado.get() or "").strip().lower()
-        q = (self.var_buscar.get() or "").strip().lower()
-        # aplicar primer filtro de texto
-        self.tbl.filter_rows(q)
-        if estado:
-            self.tbl._filtered_rows = [
-                r for r in self.tbl._filtered_rows if estado in str(r[1][-1]).lower()
-            ]
-            self.tbl._refresh_tree()
+        """
+        Estado y texto se filtran en la base (ReservaService.buscar), no sobre la tabla cargada.
+        Una consulta nueva reemplaza a la anterior (misma clave): sólo se pinta la última.
+        """
+        if self._filtro_job is not None:
+            self.after_cancel(self._filtro_job)
+            self._filtro_job = None
+        estado = (self.var_estado.get() or "").strip().upper() or None
+        texto = (self.var_buscar.get() or "").strip()
+
+        def consultar() -> List[tuple[str, list[Any]]]:
+            return [self._row_from_reserva(r) for r in self.rsvc.buscar(estado=estado, texto=texto)]
+
+        self.load_async("tabla", consultar, self.tbl.load_rows)
 
     # ------------- Acciones -------------
     def _nuevo(self) -> None:
@@ -266,9 +295,11 @@ class ReservasScreen(BaseScreen):
             datos = self._collect_form()
             if self.selected_id:
                 self.rsvc.actualizar(self.selected_id, datos)
+            elif datos["estado"] == "ACTIVA":
+                # bloquea la propiedad (DISPONIBLE -> RESERVADO) en la misma transacción
+                self.selected_id = self.rsvc.reservar(datos)
             else:
                 self.selected_id = self.rsvc.crear(datos)
-            self._load_table()
             messagebox.showinfo("Éxito", "Reserva guardada correctamente.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -279,7 +310,6 @@ class ReservasScreen(BaseScreen):
             return
         try:
             self.rsvc.confirmar(self.selected_id)
-            self._load_table()
             self.form.set_values({"estado": "CONFIRMADA"})
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -290,7 +320,6 @@ class ReservasScreen(BaseScreen):
             return
         try:
             self.rsvc.cancelar(self.selected_id)
-            self._load_table()
             self.form.set_values({"estado": "CANCELADA"})
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -304,7 +333,6 @@ class ReservasScreen(BaseScreen):
         try:
             self.rsvc.eliminar(self.selected_id)
             self._nuevo()
-            self._load_table()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
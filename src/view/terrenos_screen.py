@@ -5,12 +5,18 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Any, Optional, List
 
+from core.events import Cambio, resumir
 from core.frame_manager import BaseScreen
 from view.widgets.base_table import BaseTable
 from view.widgets.base_form import BaseForm
+from services.loteo_service import LoteoService
+from services.resultado_masivo import ResultadoMasivo
 from services.terreno_service import TerrenoService
 from entities.terreno import Terreno
 
+# columnas de la tabla: cambios en otros campos (p. ej. loteo_id) no la tocan
+_CAMPOS_TABLA = ("manzana", "numero_lote", "superficie", "nomenclatura", "estado")
+
 
 class TerrenosScreen(BaseScreen):
     """
@@ -21,10 +27,15 @@ class TerrenosScreen(BaseScreen):
         super().__init__(parent)
         self.app = app
         self.svc = TerrenoService()
+        self.lsvc = LoteoService()
         self._selected_id: Optional[int] = None
+        self._loteos: dict[str, Optional[int]] = {}
 
         self._build_ui()
+        self._load_loteos()
         self._load_table()
+        self.escuchar("TERRENO", self._on_cambios_terrenos)
+        self.escuchar("LOTEO", lambda _cambios: self._load_loteos())
 
     # ---------------- UI ----------------
     def _build_ui(self) -> None:
@@ -41,6 +52,23 @@ class TerrenosScreen(BaseScreen):
         entry_buscar.pack(side="left", padx=5)
         entry_buscar.bind("<KeyRelease>", lambda e: self.tbl.filter_rows(self.var_buscar.get()))
 
+        # Acciones sobre la selección (Ctrl/Shift + clic para elegir varios)
+        ttk.Button(top, text="Asignar", command=self._asignar_loteo_seleccion).pack(side="right")
+        self.var_loteo_masivo = tk.StringVar()
+        self.cmb_loteo_masivo = ttk.Combobox(top, textvariable=self.var_loteo_masivo, width=22, state="readonly")
+        self.cmb_loteo_masivo.pack(side="right", padx=5)
+        ttk.Label(top, text="Loteo:").pack(side="right", padx=(10, 0))
+        ttk.Button(top, text="Aplicar", command=self._aplicar_estado_seleccion).pack(side="right")
+        self.var_estado_masivo = tk.StringVar()
+        ttk.Combobox(
+            top,
+            textvariable=self.var_estado_masivo,
+            values=["DISPONIBLE", "RESERVADO", "VENDIDO"],
+            width=12,
+            state="readonly",
+        ).pack(side="right", padx=5)
+        ttk.Label(top, text="Estado selección:").pack(side="right")
+
         # Tabla
         left = ttk.Frame(self)
         left.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
@@ -50,12 +78,14 @@ class TerrenosScreen(BaseScreen):
             columns=[
                 ("manzana", "Manzana", 100),
                 ("lote", "Lote", 90),
-                ("superficie", "Superficie (m²)", 140),
+                ("superficie", "Superficie (m²)", 140, "number"),
                 ("nomenclatura", "Nomenclatura", 180),
+                ("estado", "Estado", 110),
             ],
-            multiselect=False,
+            multiselect=True,
             height=18,
             on_select=self._on_select_table,
+            secondary_sort=("manzana", "lote"),
         )
         self.tbl.pack(fill="both", expand=True)
 
@@ -95,13 +125,49 @@ class TerrenosScreen(BaseScreen):
         return None
 
     def _row_from_terreno(self, t: Terreno) -> tuple[str, list[Any]]:
-        return (str(t.id), [t.manzana, t.numero_lote, t.superficie, t.nomenclatura or ""])
+        return (str(t.id), [t.manzana, t.numero_lote, t.superficie, t.nomenclatura or "", t.estado])
+
+    def _load_loteos(self) -> None:
+        def consultar() -> dict[str, Optional[int]]:
+            loteos: dict[str, Optional[int]] = {"(sin loteo)": None}
+            for l, cant in self.lsvc.listar_con_cantidad():
+                loteos[f"{l.nombre} ({cant})"] = l.id
+            return loteos
+
+        def aplicar(loteos: dict[str, Optional[int]]) -> None:
+            self._loteos = loteos
+            self.cmb_loteo_masivo.configure(values=list(loteos))
+
+        self.load_async("loteos", consultar, aplicar)
+
+    def _selected_ids(self) -> List[int]:
+        ids = [int(i) for i in self.tbl.selected_ids()]
+        if not ids:
+            messagebox.showwarning("Atención", "Seleccione uno o más terrenos.")
+        return ids
+
+    def _show_resultado(self, res: ResultadoMasivo) -> None:
+        if res.ok:
+            messagebox.showinfo("Resultado", res.resumen())
+        else:
+            messagebox.showwarning("Resultado", res.resumen())
 
     def _load_table(self) -> None:
-        rows: List[tuple[str, list[Any]]] = []
-        for t in self.svc.listar():
-            rows.append(self._row_from_terreno(t))
-        self.tbl.load_rows(rows)
+        def consultar() -> List[tuple[str, list[Any]]]:
+            return [self._row_from_terreno(t) for t in self.svc.listar()]
+
+        self.load_async("tabla", consultar, self.tbl.load_rows)
+
+    def _on_cambios_terrenos(self, cambios: List[Cambio]) -> None:
+        """Cambios publicados por los servicios (esta u otra pantalla): parchea sólo esas filas."""
+        p = resumir(cambios, "TERRENO", campos=_CAMPOS_TABLA)
+        if p.recargar:
+            self._load_table()
+            return
+        if p.quitar:
+            self.tbl.remove_rows([str(i) for i in p.quitar])
+        if p.actualizar:
+            self.tbl.upsert_rows([self._row_from_terreno(t) for t in self.svc.obtener_varios(p.actualizar)])
 
     def _on_select_table(self, ids: list[str]) -> None:
         if not ids:
@@ -153,7 +219,6 @@ class TerrenosScreen(BaseScreen):
                 self.svc.actualizar(self._selected_id, data)
             else:
                 self._selected_id = self.svc.crear(data)
-            self._load_table()
             messagebox.showinfo("Éxito", "Terreno guardado correctamente.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -167,10 +232,39 @@ class TerrenosScreen(BaseScreen):
         try:
             self.svc.eliminar(self._selected_id)
             self._nuevo()
-            self._load_table()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def _aplicar_estado_seleccion(self) -> None:
+        estado = self.var_estado_masivo.get()
+        if not estado:
+            messagebox.showwarning("Atención", "Elija el estado a aplicar.")
+            return
+        ids = self._selected_ids()
+        if not ids or not messagebox.askyesno("Confirmar", f"¿Pasar {len(ids)} terreno(s) a {estado}?"):
+            return
+        try:
+            res = self.svc.cambiar_estado_many(ids, estado)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self._show_resultado(res)
+
+    def _asignar_loteo_seleccion(self) -> None:
+        label = self.var_loteo_masivo.get()
+        if not label:
+            messagebox.showwarning("Atención", "Elija el loteo.")
+            return
+        ids = self._selected_ids()
+        if not ids or not messagebox.askyesno("Confirmar", f"¿Asignar {len(ids)} terreno(s) a {label}?"):
+            return
+        try:
+            res = self.svc.asignar_loteo_many(ids, self._loteos.get(label))
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self._show_resultado(res)
+
     def _volver(self) -> None:
         if hasattr(self.app, "go_back"):
             self.app.go_back()
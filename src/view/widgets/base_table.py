@@ -3,37 +3,57 @@ from __future__ import annotations
 
 import tkinter as tk
 from tkinter import ttk
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from view.widgets.table_source import ListSource, TableSource
 
 SortFunc = Callable[[Any], Any]
 
+_SHIFT_OR_CONTROL = 0x0001 | 0x0004
+
 
 class BaseTable(ttk.Frame):
     """
     Tabla base sobre ttk.Treeview con:
     - Definición declarativa de columnas
-    - Ordenamiento por columna (toggle asc/desc)
-    - Carga eficiente de filas
+    - Ordenamiento por columna (toggle asc/desc) según el tipo declarado de la columna
+      ("text" con colación española, "number", "date"); la columna ordenada antes queda
+      como criterio secundario, más las de `secondary_sort`
+    - Carga eficiente de filas: los cambios se aplican como diferencia (detach/move/item),
+      sin borrar y reinsertar todo el Treeview; upsert_rows/remove_rows tocan sólo esas filas
+    - Filtro por texto con demora (debounce) contra claves precalculadas por fila
     - Selección de una o varias filas
+    - Modo virtual (virtual=True o source=...): el Treeview tiene sólo tantos items como
+      filas entran en pantalla y se reciclan al desplazarse; las filas salen de un
+      TableSource (ListSource en memoria o PagedSource por páginas). La selección se
+      guarda por iid de fila, así sobrevive al scroll.
     """
 
     def __init__(
         self,
         parent: tk.Widget,
-        columns: List[Tuple[str, str, int]],  # (id_col, header, width)
+        columns: List[Tuple[Any, ...]],  # (id_col, header, width[, tipo]); tipo por defecto "text"
         multiselect: bool = False,
         height: int = 15,
         on_select: Optional[Callable[[List[str]], None]] = None,
+        virtual: bool = False,
+        source: Optional[TableSource] = None,
+        filter_delay_ms: int = 200,
+        secondary_sort: Sequence[str] = (),
     ) -> None:
         super().__init__(parent)
         self._columns = columns
         self._on_select = on_select
         self._sort_state: Dict[str, bool] = {}  # legacy; not used in new visual sort
         self._headers: Dict[str, str] = {c[0]: c[1] for c in columns}
+        self._kinds: List[str] = [c[3] if len(c) > 3 else "text" for c in columns]
+        self._secondary_sort = tuple(secondary_sort)
         self._sort_col: Optional[str] = None
         self._sort_desc: bool = False
-        self._all_rows: List[Tuple[str, List[Any]]] = []
-        self._filtered_rows: List[Tuple[str, List[Any]]] = []
+        self._sort_then: Tuple[int, ...] = ()
+        self._query = ""
+        self.filter_delay_ms = filter_delay_ms
+        self._filter_job: Optional[str] = None
 
         # Treeview
         selectmode = "extended" if multiselect else "browse"
@@ -46,45 +66,141 @@ class BaseTable(ttk.Frame):
         )
         self.tree.pack(fill="both", expand=True)
 
-        # Scrollbars
-        vs = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        # Scrollbars (en modo virtual la vertical refleja el dataset, no los items del Treeview)
+        self._virtual = virtual or source is not None
+        vs = ttk.Scrollbar(self, orient="vertical", command=self._on_vscroll if self._virtual else self.tree.yview)
         hs = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vs.set, xscrollcommand=hs.set)
+        self._vs = vs
+        if self._virtual:
+            self.tree.configure(xscrollcommand=hs.set)
+        else:
+            self.tree.configure(yscrollcommand=vs.set, xscrollcommand=hs.set)
 
         vs.pack(side="right", fill="y")
         hs.pack(side="bottom", fill="x")
 
         # Configurar columnas
-        for col_id, header, width in columns:
+        for col_id, header, width, *_kind in columns:
             self.tree.heading(col_id, text=header, command=lambda c=col_id: self._on_column_click(c))
             self.tree.column(col_id, width=width, stretch=True)
 
         # Bind selección
         self.tree.bind("<<TreeviewSelect>>", self._emit_selection)
 
+        # Dataset (en modo normal siempre un ListSource; define qué items se ven y en qué orden)
+        self._source: TableSource = source if source is not None else ListSource(kinds=self._kinds)
+
+        # Estado del modo virtual
+        self._first = 0  # índice del dataset mostrado en el primer item
+        self._slots: List[str] = []  # items reciclados del Treeview
+        self._slot_rows: Dict[str, str] = {}  # item -> iid de la fila que muestra
+        self._selected: Dict[str, None] = {}  # iids de fila seleccionados (orden de selección)
+        self._click_replaces = False
+        if self._virtual:
+            self._ensure_slots(height)
+            self.tree.bind("<Configure>", self._on_resize, add="+")
+            self.tree.bind("<ButtonPress-1>", self._on_click, add="+")
+            for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.tree.bind(seq, self._on_wheel)
+            self.tree.bind("<Up>", lambda e: self._on_key(-1))
+            self.tree.bind("<Down>", lambda e: self._on_key(1))
+            self.tree.bind("<Prior>", lambda e: self._on_key(-max(1, len(self._slots) - 1)))
+            self.tree.bind("<Next>", lambda e: self._on_key(max(1, len(self._slots) - 1)))
+            self._render()
+
         # Legacy cache (not used by new API); kept for compatibility
         self._rows_cache: List[Tuple[str, List[Any]]] = []  # (iid, values)
 
     # ---------- API ----------
     def clear(self) -> None:
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
+        self.load_rows([])
         self._rows_cache = []
 
     def load_rows(self, rows: Iterable[Tuple[str, List[Any]]]) -> None:
-        """Carga filas y guarda el dataset original para búsquedas/ordenamientos."""
+        """
+        Reemplaza el dataset conservando filtro y orden actuales.
+        Sólo se tocan los items que cambian: se borran los que ya no están, se insertan
+        los nuevos y se actualizan los valores distintos.
+        """
         data = list(rows or [])
-        self._all_rows = data
-        self._filtered_rows = list(self._all_rows)
-        self._sort_col = None
-        self._sort_desc = False
-        self._refresh_tree()
+        source = ListSource(data, query=self._query, order=self._order(), kinds=self._kinds, then=self._sort_then)
+        if self._virtual:
+            self._source = source
+            self._selected = {iid: None for iid in self._selected if iid in source}
+            self._render()
+            return
+        # en modo normal el Treeview tiene un item (visible o separado) por fila del origen
+        old: ListSource = self._source  # type: ignore[assignment]
+        gone = [iid for iid in old.all_iids() if iid not in source]
+        if gone:
+            self.tree.delete(*gone)
+        for iid, values in data:
+            if iid not in old:
+                self._insert_detached(iid, values)
+            elif old.get(iid) != values:
+                self.tree.item(iid, values=values)
+        self._source = source
+        self._apply_view()
+
+    def upsert_rows(self, rows: Iterable[Tuple[str, List[Any]]]) -> None:
+        """Actualiza o agrega filas puntuales (p. ej. tras guardar) sin recargar el dataset."""
+        data = list(rows or [])
+        if not isinstance(self._source, ListSource):
+            # origen paginado: se relee la ventana
+            getattr(self._source, "invalidate", lambda: None)()
+            self.refresh()
+            return
+        self._source.upsert(data)
+        if self._virtual:
+            self._render()
+            return
+        for iid, values in data:
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values)
+            else:
+                self._insert_detached(iid, values)
+        self._apply_view()
+
+    def remove_rows(self, iids: Iterable[str]) -> None:
+        ids = [str(i) for i in iids]
+        for iid in ids:
+            self._selected.pop(iid, None)
+        if not isinstance(self._source, ListSource):
+            getattr(self._source, "invalidate", lambda: None)()
+            self.refresh()
+            return
+        self._source.remove(ids)
+        if self._virtual:
+            self._render()
+            return
+        existing = [iid for iid in ids if self.tree.exists(iid)]
+        if existing:
+            self.tree.delete(*existing)
 
     def add_row(self, iid: str, values: List[Any]) -> None:
-        self.tree.insert("", "end", iid=iid, values=values)
+        self.upsert_rows([(iid, values)])
         self._rows_cache.append((iid, values))
 
+    def set_source(self, source: TableSource) -> None:
+        """Modo virtual: reemplaza el origen de datos (vuelve al inicio y limpia la selección)."""
+        self._source = source
+        self._first = 0
+        self._selected.clear()
+        self._sort_col = None
+        self._sort_desc = False
+        self._sort_then = ()
+        self._query = ""
+        self._reset_headings()
+        self._render()
+
+    def refresh(self) -> None:
+        """Modo virtual: vuelve a pedir la ventana visible (p. ej. tras PagedSource.invalidate())."""
+        if self._virtual:
+            self._render()
+
     def selected_ids(self) -> List[str]:
+        if self._virtual:
+            return list(self._selected)
         return list(self.tree.selection())
 
     def selected_first_id(self) -> Optional[str]:
@@ -95,42 +211,198 @@ class BaseTable(ttk.Frame):
     def _col_index(self, col_id: str) -> int:
         return [c[0] for c in self._columns].index(col_id)
 
-    def _refresh_tree(self) -> None:
-        self.tree.delete(*self.tree.get_children())
-        for iid, values in self._filtered_rows:
-            self.tree.insert("", "end", iid=iid, values=values)
+    def _insert_detached(self, iid: str, values: List[Any]) -> None:
+        # nace separado: _apply_view lo engancha directo en su posición (si pasa el filtro)
+        self.tree.insert("", "end", iid=iid, values=values)
+        self.tree.detach(iid)
+
+    def _order(self) -> Tuple[Optional[int], bool]:
+        return (self._col_index(self._sort_col) if self._sort_col else None, self._sort_desc)
+
+    def _apply_view(self) -> None:
+        """
+        Lleva el Treeview al orden del origen como diferencia: separa (detach) los items
+        que dejaron de verse y reubica con move() sólo lo necesario.
+        """
+        order = self._source.iids()  # type: ignore[attr-defined]
+        attached = self.tree.get_children()
+        wanted = set(order)
+        hidden = [iid for iid in attached if iid not in wanted]
+        if hidden:
+            self.tree.detach(*hidden)
+        kept = [iid for iid in attached if iid in wanted]
+        kept_set = set(kept)
+        if kept == [iid for iid in order if iid in kept_set]:
+            # mismo orden relativo (filtro): basta con reenganchar los que aparecen
+            for pos, iid in enumerate(order):
+                if iid not in kept_set:
+                    self.tree.move(iid, "", pos)
+        else:
+            for pos, iid in enumerate(order):
+                self.tree.move(iid, "", pos)
 
     def filter_rows(self, query: str) -> None:
-        q = (query or "").strip().lower()
-        if not q:
-            self._filtered_rows = list(self._all_rows)
+        """Filtra con demora: cada tecla reprograma el filtro y sólo se aplica el último texto."""
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(self.filter_delay_ms, lambda: self._apply_query(query))
+
+    def _apply_query(self, query: str) -> None:
+        self._filter_job = None
+        self._query = query or ""
+        self._source.set_query(self._query)
+        if self._virtual:
+            self._first = 0
+            self._render()
         else:
-            self._filtered_rows = [
-                r for r in self._all_rows if any(q in str(cell).lower() for cell in r[1])
-            ]
-        # keep current sort, if any
-        if self._sort_col is not None:
-            self._apply_sort(self._sort_col, self._sort_desc)
-        self._refresh_tree()
-
-    def _apply_sort(self, col_id: str, desc: bool) -> None:
-        idx = self._col_index(col_id)
-        self._filtered_rows.sort(key=lambda r: str(r[1][idx]).lower(), reverse=desc)
+            self._apply_view()
 
     def _on_column_click(self, col_id: str) -> None:
         if self._sort_col == col_id:
             self._sort_desc = not self._sort_desc
         else:
+            # el orden anterior pasa a desempatar (orden estable por varias columnas)
+            previous = (self._sort_col,) if self._sort_col else ()
+            self._sort_then = tuple(
+                self._col_index(c) for c in dict.fromkeys(previous + self._secondary_sort) if c != col_id
+            )
             self._sort_col = col_id
             self._sort_desc = False
-        self._apply_sort(col_id, self._sort_desc)
-        self._refresh_tree()
+        self._source.set_order(self._col_index(col_id), self._sort_desc, then=self._sort_then)
+        if self._virtual:
+            self._first = 0
+            self._render()
+        else:
+            self._apply_view()
         arrow = " ↓" if self._sort_desc else " ↑"
+        self._reset_headings()
+        self.tree.heading(col_id, text=self._headers.get(col_id, col_id) + arrow)
+
+    def _reset_headings(self) -> None:
         for c in self.tree["columns"]:
             self.tree.heading(c, text=self._headers.get(c, c))
-        self.tree.heading(col_id, text=self._headers.get(col_id, col_id) + arrow)
+
+    # ---------- Modo virtual ----------
+    def _ensure_slots(self, count: int) -> None:
+        count = max(1, count)
+        while len(self._slots) < count:
+            slot = f"__slot{len(self._slots)}"
+            self.tree.insert("", "end", iid=slot, values=())
+            self._slots.append(slot)
+        while len(self._slots) > count:
+            slot = self._slots.pop()
+            self._slot_rows.pop(slot, None)
+            self.tree.delete(slot)
+
+    def _render(self) -> None:
+        """Vuelca la ventana [first, first + slots) del origen sobre los items reciclados."""
+        total = len(self._source)
+        self._first = max(0, min(self._first, total - len(self._slots)))
+        rows = self._source.rows(self._first, len(self._slots))
+        chosen: List[str] = []
+        for pos, slot in enumerate(self._slots):
+            if pos < len(rows):
+                iid, values = rows[pos]
+                self._slot_rows[slot] = iid
+                self.tree.item(slot, values=values)
+                self.tree.move(slot, "", pos)  # reengancha si estaba oculto
+                if iid in self._selected:
+                    chosen.append(slot)
+            else:
+                self._slot_rows.pop(slot, None)
+                self.tree.detach(slot)
+        self.tree.selection_set(chosen)
+        if total > 0:
+            self._vs.set(self._first / total, min(1.0, (self._first + len(self._slots)) / total))
+        else:
+            self._vs.set(0.0, 1.0)
+
+    def _scroll_to(self, first: int) -> None:
+        first = max(0, min(first, len(self._source) - len(self._slots)))
+        if first != self._first:
+            self._first = first
+            self._render()
+
+    def _on_vscroll(self, *args: str) -> None:
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self._source)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                step *= max(1, len(self._slots) - 1)
+            self._scroll_to(self._first + step)
+
+    def _on_wheel(self, event: tk.Event) -> str:
+        if getattr(event, "num", None) == 4:
+            step = -3
+        elif getattr(event, "num", None) == 5:
+            step = 3
+        else:
+            delta = getattr(event, "delta", 0)
+            step = -3 if delta > 0 else 3
+        self._scroll_to(self._first + step)
+        return "break"
+
+    def _on_key(self, step: int) -> Optional[str]:
+        """Flechas/RePág/AvPág en el borde de la ventana desplazan el dataset en lugar de frenar."""
+        focus = self.tree.focus()
+        visible = [s for s in self._slots if s in self._slot_rows]
+        if not visible or focus not in visible:
+            return None
+        pos = visible.index(focus)
+        if abs(step) == 1 and 0 <= pos + step < len(visible):
+            return None  # dentro de la ventana: comportamiento normal del Treeview
+        target = max(0, min(self._first + pos + step, len(self._source) - 1))
+        if target < self._first:
+            self._scroll_to(target)
+        elif target >= self._first + len(self._slots):
+            self._scroll_to(target - len(self._slots) + 1)
+        slot = self._slots[target - self._first]
+        self._selected = {self._slot_rows[slot]: None}
+        self._render()
+        self.tree.focus(slot)
+        self._emit_selection()
+        return "break"
+
+    def _on_resize(self, event: tk.Event) -> None:
+        bbox = self.tree.bbox(self._slots[0]) if self._slots and self._slots[0] in self._slot_rows else ""
+        if bbox:
+            header, row_h = bbox[1], bbox[3]
+        else:
+            row_h = 20
+            header = row_h + 4
+        count = max(1, (event.height - header) // max(1, row_h))
+        if count != len(self._slots):
+            self._ensure_slots(count)
+            self._render()
+
+    def _on_click(self, event: tk.Event) -> None:
+        # Clic sin Shift/Ctrl reemplaza la selección, incluida la que quedó fuera de pantalla
+        self._click_replaces = not (event.state & _SHIFT_OR_CONTROL)
+
+    def _sync_selection(self) -> bool:
+        """Pasa la selección de los items visibles al conjunto de iids; True si cambió."""
+        before = list(self._selected)
+        chosen = set(self.tree.selection())
+        visible_chosen = [self._slot_rows[s] for s in self._slots if s in chosen and s in self._slot_rows]
+        if self._click_replaces or str(self.tree.cget("selectmode")) == "browse":
+            if visible_chosen or self._click_replaces:
+                self._selected = {}
+        self._click_replaces = False
+        for slot, iid in self._slot_rows.items():
+            if slot in chosen:
+                self._selected.setdefault(iid, None)
+            else:
+                self._selected.pop(iid, None)
+        return list(self._selected) != before
 
     # ---------- Internos ----------
     def _emit_selection(self, _evt=None) -> None:
+        # En modo virtual, _render() re-selecciona items y el Treeview vuelve a avisar:
+        # sólo se propaga si cambió la selección de filas.
+        if self._virtual and _evt is not None and not self._sync_selection():
+            return
         if self._on_select:
             self._on_select(self.selected_ids())
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Claves de ordenamiento por tipo de columna para BaseTable.
+- text: colación española sin locale del sistema (sin acentos ni mayúsculas, ñ entre n y o)
+  y orden natural de números ("Lote 2" antes que "Lote 10").
+- number: valor numérico (acepta coma decimal); vacíos/no numéricos al final.
+- date: fecha ISO (YYYY-MM-DD) o dd/mm/yyyy; vacías/ inválidas al final.
+Todas devuelven claves comparables entre sí dentro de la misma columna.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Tuple
+
+ColumnKind = str  # "text" | "number" | "date"
+
+_DIGITS = re.compile(r"(\d+)")
+_DMY = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _fold(text: str) -> str:
+    if text.isascii():
+        return text.lower()
+    # ñ es letra propia en español: se marca para que quede entre n y o ("n~" > "nz")
+    text = unicodedata.normalize("NFC", text).casefold().replace("ñ", "n~")
+    return "".join(c for c in unicodedata.normalize("NFD", text) if not unicodedata.combining(c))
+
+
+def spanish_key(value: Any) -> Tuple[Any, ...]:
+    if value is None:
+        return ((1,),)
+    text = str(value).strip()
+    if not text:
+        return ((1,),)
+    parts = _DIGITS.split(_fold(text))
+    natural = tuple(int(p) if i % 2 else p for i, p in enumerate(parts))
+    # desempate determinista entre variantes con/sin acento o mayúsculas
+    return ((0,), natural, text)
+
+
+def number_key(value: Any) -> Tuple[int, float]:
+    if isinstance(value, bool):
+        return (0, float(value))
+    if isinstance(value, (int, float)):
+        return (0, float(value))
+    try:
+        return (0, float(str(value).strip().replace(",", ".")))
+    except (TypeError, ValueError):
+        return (1, 0.0)
+
+
+def date_key(value: Any) -> Tuple[int, str]:
+    if isinstance(value, (date, datetime)):
+        return (0, value.isoformat()[:10])
+    text = str(value or "").strip()
+    if _ISO.match(text):
+        return (0, text[:10])
+    m = _DMY.match(text)
+    if m:
+        d, mth, y = m.groups()
+        return (0, f"{y}-{int(mth):02d}-{int(d):02d}")
+    return (1, "")
+
+
+SORT_KEYS: Dict[ColumnKind, Callable[[Any], Any]] = {
+    "text": spanish_key,
+    "number": number_key,
+    "date": date_key,
+}
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Orígenes de datos para BaseTable en modo virtual.
+La tabla sólo pide la ventana visible (`rows(start, count)`); filtrar y ordenar
+se delega al origen, que decide si lo hace en memoria o en la base.
+No dependen de Tk, así que se pueden probar sin display.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+from view.widgets.collation import SORT_KEYS, ColumnKind, spanish_key
+
+Row = Tuple[str, List[Any]]  # (iid estable, valores por columna)
+
+_KEY_SEP = "\x1f"  # separa celdas: una búsqueda no matchea a caballo entre dos columnas
+
+
+def search_key(values: Sequence[Any]) -> str:
+    """Clave normalizada de una fila para filtrar por texto; se calcula una vez al cargarla."""
+    return _KEY_SEP.join(str(v).lower() for v in values)
+
+
+class TableSource(Protocol):
+    def __len__(self) -> int: ...
+
+    def rows(self, start: int, count: int) -> List[Row]: ...
+
+    def set_query(self, query: str) -> None: ...
+
+    def set_order(self, col_index: Optional[int], desc: bool = False, then: Sequence[int] = ()) -> None: ...
+
+
+class ListSource:
+    """
+    Dataset en memoria (lo usa BaseTable en ambos modos).
+    - Filtra por subcadena sin distinguir mayúsculas contra una clave precalculada por fila.
+    - Ordena con claves tipadas por columna (ver collation.SORT_KEYS), calculadas una vez
+      por carga y sólo para las columnas que se ordenan.
+    - Cachea la permutación ordenada por (columna, secundarias, sentido): volver a un orden
+      ya visto es gratis y alternar asc/desc es una inversión O(n), estable ante empates.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[Row] = (),
+        query: str = "",
+        order: Tuple[Optional[int], bool] = (None, False),
+        kinds: Sequence[ColumnKind] = (),
+        then: Sequence[int] = (),
+    ) -> None:
+        self._kinds = tuple(kinds)
+        self._iids: List[str] = []
+        self._values: List[List[Any]] = []
+        self._keys: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._sort_keys: Dict[int, List[Any]] = {}
+        self._perms: Dict[Tuple[int, Tuple[int, ...], bool], List[int]] = {}
+        self._query = (query or "").strip().lower()
+        self._order = order
+        self._then = tuple(then)
+        self._view: List[int] = []
+        self._put(rows)
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def __contains__(self, iid: object) -> bool:
+        return iid in self._pos
+
+    def rows(self, start: int, count: int) -> List[Row]:
+        window = self._view[max(0, start) : max(0, start) + max(0, count)]
+        return [(self._iids[i], self._values[i]) for i in window]
+
+    def iids(self) -> List[str]:
+        """iids visibles, en el orden en que se muestran."""
+        return [self._iids[i] for i in self._view]
+
+    def all_iids(self) -> List[str]:
+        """Todos los iids cargados, incluidos los que el filtro oculta."""
+        return list(self._iids)
+
+    def get(self, iid: str) -> Optional[List[Any]]:
+        pos = self._pos.get(iid)
+        return None if pos is None else self._values[pos]
+
+    def append(self, row: Row) -> None:
+        self.upsert([row])
+
+    def upsert(self, rows: Iterable[Row]) -> None:
+        """Actualiza las filas existentes (por iid) y agrega al final las nuevas."""
+        self._put(rows)
+        self._rebuild()
+
+    def remove(self, iids: Iterable[str]) -> None:
+        drop = {i for i in iids if i in self._pos}
+        if not drop:
+            return
+        keep = [p for p, iid in enumerate(self._iids) if iid not in drop]
+        self._iids = [self._iids[p] for p in keep]
+        self._values = [self._values[p] for p in keep]
+        self._keys = [self._keys[p] for p in keep]
+        self._pos = {iid: p for p, iid in enumerate(self._iids)}
+        self._sort_keys = {c: [ks[p] for p in keep] for c, ks in self._sort_keys.items()}
+        self._perms.clear()
+        self._rebuild()
+
+    def set_query(self, query: str) -> None:
+        self._query = (query or "").strip().lower()
+        self._rebuild()
+
+    def set_order(self, col_index: Optional[int], desc: bool = False, then: Sequence[int] = ()) -> None:
+        """Orden por `col_index`; `then` son columnas secundarias para desempatar (mismo sentido)."""
+        self._order = (col_index, desc)
+        self._then = tuple(c for c in dict.fromkeys(then) if c != col_index)
+        self._rebuild()
+
+    # ---------- internos ----------
+    def _put(self, rows: Iterable[Row]) -> None:
+        changed = False
+        for iid, values in rows or []:
+            pos = self._pos.get(iid)
+            if pos is None:
+                pos = self._pos[iid] = len(self._iids)
+                self._iids.append(iid)
+                self._values.append(values)
+                self._keys.append(search_key(values))
+                for col, ks in self._sort_keys.items():
+                    ks.append(self._sort_key(col, values))
+            else:
+                self._values[pos] = values
+                self._keys[pos] = search_key(values)
+                for col, ks in self._sort_keys.items():
+                    ks[pos] = self._sort_key(col, values)
+            changed = True
+        if changed:
+            self._perms.clear()
+
+    def _sort_key(self, col: int, values: Sequence[Any]) -> Any:
+        kind = self._kinds[col] if col < len(self._kinds) else "text"
+        return SORT_KEYS.get(kind, spanish_key)(values[col] if col < len(values) else None)
+
+    def _column_keys(self, col: int) -> List[Any]:
+        ks = self._sort_keys.get(col)
+        if ks is None:
+            # los valores se repiten mucho (estados, tipos, fechas): una clave por valor distinto
+            memo: Dict[Any, Any] = {}
+            ks = []
+            for values in self._values:
+                raw = values[col] if col < len(values) else None
+                try:
+                    k = memo[raw]
+                except KeyError:
+                    k = memo[raw] = self._sort_key(col, values)
+                except TypeError:  # celda no hasheable
+                    k = self._sort_key(col, values)
+                ks.append(k)
+            self._sort_keys[col] = ks
+        return ks
+
+    def _perm(self, col: int, desc: bool) -> List[int]:
+        cache_key = (col, self._then, desc)
+        perm = self._perms.get(cache_key)
+        if perm is not None:
+            return perm
+        cols = [self._column_keys(c) for c in (col, *self._then)]
+        if len(cols) == 1:
+            ks = cols[0]
+        else:
+            ks = list(zip(*cols))
+        asc = self._perms.get((col, self._then, False))
+        if asc is None:
+            # sorted() es estable: los empates conservan el orden de carga
+            asc = sorted(range(len(ks)), key=ks.__getitem__)
+            self._perms[(col, self._then, False)] = asc
+        if not desc:
+            return asc
+        perm = self._perms[cache_key] = _reverse_stable(asc, ks)
+        return perm
+
+    def _rebuild(self) -> None:
+        col, desc = self._order
+        base: Iterable[int] = range(len(self._iids)) if col is None else self._perm(col, desc)
+        q = self._query
+        if q:
+            keys = self._keys
+            self._view = [i for i in base if q in keys[i]]
+        else:
+            self._view = list(base)
+
+
+def _reverse_stable(asc: List[int], keys: Sequence[Any]) -> List[int]:
+    """Invierte un orden ascendente en O(n) manteniendo el orden original dentro de cada empate."""
+    out: List[int] = []
+    end = len(asc)
+    while end > 0:
+        start = end - 1
+        k = keys[asc[start]]
+        while start > 0 and keys[asc[start - 1]] == k:
+            start -= 1
+        out.extend(asc[start:end])
+        end = start
+    return out
+
+
+class PagedSource:
+    """
+    Dataset remoto leído por páginas bajo demanda (p. ej. LIMIT/OFFSET contra la base).
+    - `count(query)` devuelve el total filtrado.
+    - `fetch(offset, limit, query, order)` devuelve las filas; `order` es (col_index, desc) o None.
+    Mantiene en memoria sólo las últimas `max_pages` páginas leídas.
+    """
+
+    def __init__(
+        self,
+        count: Callable[[str], int],
+        fetch: Callable[[int, int, str, Optional[Tuple[int, bool]]], List[Row]],
+        page_size: int = 200,
+        max_pages: int = 10,
+    ) -> None:
+        self._count_fn = count
+        self._fetch_fn = fetch
+        self.page_size = max(1, int(page_size))
+        self.max_pages = max(1, int(max_pages))
+        self._query = ""
+        self._order: Optional[Tuple[int, bool]] = None
+        self._pages: "OrderedDict[int, List[Row]]" = OrderedDict()
+        self._len: Optional[int] = None
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = int(self._count_fn(self._query))
+        return self._len
+
+    def rows(self, start: int, count: int) -> List[Row]:
+        start = max(0, start)
+        end = min(len(self), start + max(0, count))
+        out: List[Row] = []
+        if end <= start:
+            return out
+        for page in range(start // self.page_size, (end - 1) // self.page_size + 1):
+            data = self._page(page)
+            base = page * self.page_size
+            out.extend(data[max(0, start - base) : end - base])
+        return out
+
+    def set_query(self, query: str) -> None:
+        self._query = (query or "").strip()
+        self.invalidate()
+
+    def set_order(self, col_index: Optional[int], desc: bool = False, then: Sequence[int] = ()) -> None:
+        # el orden secundario queda a criterio de `fetch` (p. ej. ORDER BY col, id)
+        self._order = None if col_index is None else (col_index, desc)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Descarta páginas y total (p. ej. tras guardar); se releen al próximo rows()."""
+        self._pages.clear()
+        self._len = None
+
+    def _page(self, page: int) -> List[Row]:
+        data = self._pages.get(page)
+        if data is None:
+            data = list(self._fetch_fn(page * self.page_size, self.page_size, self._query, self._order))
+            self._pages[page] = data
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return data
+
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.frame_manager import AsyncLoader
+from entities.terreno import Terreno
+from services.indice_propiedades import etiqueta_terreno
+from services.terreno_service import TerrenoService
+
+
+class TerrenoPicker(ttk.Frame):
+    """
+    Selector de terrenos escalable (reemplaza al par de Listbox con todos los terrenos):
+    - Búsqueda mientras se escribe (con demora) por manzana, "manzana lote" o nomenclatura,
+      resuelta con rangos de índice (TerrenoService.sugerir).
+    - Resultados paginados: se pide la página siguiente al acercarse al final del scroll.
+    - La lista de seleccionados se modifica de a una entrada: agregar/quitar no reinserta nada más.
+    - Las consultas (búsqueda, páginas y etiquetas de ids que no están en los resultados) corren
+      fuera del hilo de Tk con un AsyncLoader propio: sólo se pide lo que se va a mostrar.
+    """
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        svc: Optional[TerrenoService] = None,
+        on_change: Optional[Callable[[List[int]], None]] = None,
+        height: int = 10,
+        page_size: int = 50,
+        delay_ms: int = 250,
+    ) -> None:
+        super().__init__(parent)
+        self.svc = svc or TerrenoService()
+        self.on_change = on_change
+        self.page_size = page_size
+        self.delay_ms = delay_ms
+
+        # resultados de la búsqueda en curso
+        self._texto = ""
+        self._res_ids: List[int] = []
+        self._res_pos: Dict[int, int] = {}
+        self._cursor: Optional[Tuple[str, str, int]] = None
+        self._agotado = False
+        self._pagina_pedida = False
+        self._job: Optional[str] = None
+
+        # seleccionados (orden de alta); los que todavía muestran el id esperan su etiqueta
+        self._sel_ids: List[int] = []
+        self._sel_set: set[int] = set()
+        self._sin_etiqueta: set[int] = set()
+
+        self.loader = AsyncLoader(self)
+
+        self._build_ui(height)
+        self._buscar()
+
+    # ---------- UI ----------
+    def _build_ui(self, height: int) -> None:
+        self.columnconfigure(0, weight=1)
+        self.columnconfigure(3, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        self.var_buscar = tk.StringVar()
+        entry = ttk.Entry(self, textvariable=self.var_buscar)
+        entry.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 4))
+        entry.bind("<KeyRelease>", lambda _e: self._programar_busqueda())
+        entry.bind("<Return>", lambda _e: self._buscar())
+        ttk.Label(self, text="Manzana, 'manzana lote' o nomenclatura").grid(
+            row=0, column=2, columnspan=2, sticky="w", padx=6, pady=(0, 4)
+        )
+
+        self.lb_res = tk.Listbox(self, selectmode=tk.EXTENDED, height=height, exportselection=False)
+        self.lb_res.grid(row=1, column=0, sticky="nsew")
+        vs = ttk.Scrollbar(self, orient="vertical", command=self.lb_res.yview)
+        vs.grid(row=1, column=1, sticky="ns")
+        self._vs_res = vs
+        self.lb_res.configure(yscrollcommand=self._on_res_scroll)
+        self.lb_res.bind("<Double-Button-1>", lambda _e: self._agregar_seleccion())
+
+        btns = ttk.Frame(self)
+        btns.grid(row=1, column=2, padx=6)
+        ttk.Button(btns, text=">", width=3, command=self._agregar_seleccion).grid(row=0, column=0, pady=2)
+        ttk.Button(btns, text="<", width=3, command=self._quitar_seleccion).grid(row=1, column=0, pady=2)
+        ttk.Button(btns, text="<<", width=3, command=self.clear).grid(row=2, column=0, pady=2)
+
+        self.lb_sel = tk.Listbox(self, selectmode=tk.EXTENDED, height=height, exportselection=False)
+        self.lb_sel.grid(row=1, column=3, sticky="nsew")
+        self.lb_sel.bind("<Double-Button-1>", lambda _e: self._quitar_seleccion())
+
+    # ---------- API ----------
+    def get_ids(self) -> List[int]:
+        return list(self._sel_ids)
+
+    def set_ids(self, ids: Iterable[int]) -> None:
+        """Reemplaza la selección (p. ej. al elegir otra fila) sin notificar on_change."""
+        previos = self._sel_set
+        self._sel_ids = []
+        self._sel_set = set()
+        self.lb_sel.delete(0, tk.END)
+        for tid in previos:
+            self._marcar(tid, False)
+        self._agregar(ids)
+
+    def add_ids(self, ids: Iterable[int]) -> None:
+        if self._agregar(ids):
+            self._notificar()
+
+    def remove_ids(self, ids: Iterable[int]) -> None:
+        if self._quitar(ids):
+            self._notificar()
+
+    def clear(self) -> None:
+        if self._sel_ids:
+            self._quitar(list(self._sel_ids))
+            self._notificar()
+
+    def refresh(self) -> None:
+        """Repite la búsqueda actual (p. ej. tras crear un terreno)."""
+        self._buscar()
+
+    def destroy(self) -> None:
+        self.loader.cancel()
+        super().destroy()
+
+    # ---------- Selección ----------
+    def _agregar(self, ids: Iterable[int]) -> bool:
+        nuevos = [int(i) for i in dict.fromkeys(ids) if int(i) not in self._sel_set]
+        if not nuevos:
+            return False
+        for tid in nuevos:
+            self._sel_ids.append(tid)
+            self._sel_set.add(tid)
+            pos = self._res_pos.get(tid)
+            if pos is None:
+                # fuera de los resultados: se muestra el id hasta que llegue la etiqueta
+                self._sin_etiqueta.add(tid)
+                self.lb_sel.insert(tk.END, str(tid))
+            else:
+                self.lb_sel.insert(tk.END, self.lb_res.get(pos))
+            self._marcar(tid, True)
+        if self._sin_etiqueta:
+            self._pedir_etiquetas()
+        return True
+
+    def _pedir_etiquetas(self) -> None:
+        # un pedido nuevo reemplaza al anterior y lleva también sus ids
+        ids = list(self._sin_etiqueta)
+        self.loader.submit(
+            "etiquetas",
+            lambda: {int(t.id): etiqueta_terreno(t) for t in self.svc.obtener_varios(ids)},
+            self._poner_etiquetas,
+        )
+
+    def _poner_etiquetas(self, etiquetas: Dict[int, str]) -> None:
+        self._sin_etiqueta -= set(etiquetas)
+        pos = {tid: i for i, tid in enumerate(self._sel_ids)}
+        for tid, texto in etiquetas.items():
+            if tid in pos:
+                self.lb_sel.delete(pos[tid])
+                self.lb_sel.insert(pos[tid], texto)
+
+    def _quitar(self, ids: Iterable[int]) -> bool:
+        fuera = {int(i) for i in ids} & self._sel_set
+        if not fuera:
+            return False
+        # borrar de atrás hacia adelante para que los índices sigan valiendo
+        for pos in reversed([p for p, tid in enumerate(self._sel_ids) if tid in fuera]):
+            self.lb_sel.delete(pos)
+        self._sel_ids = [tid for tid in self._sel_ids if tid not in fuera]
+        self._sel_set -= fuera
+        self._sin_etiqueta -= fuera
+        for tid in fuera:
+            self._marcar(tid, False)
+        return True
+
+    def _marcar(self, tid: int, elegido: bool) -> None:
+        pos = self._res_pos.get(tid)
+        if pos is not None:
+            self.lb_res.itemconfig(pos, foreground="gray" if elegido else "")
+
+    def _agregar_seleccion(self) -> None:
+        self.add_ids(self._res_ids[i] for i in self.lb_res.curselection())
+
+    def _quitar_seleccion(self) -> None:
+        self.remove_ids([self._sel_ids[i] for i in self.lb_sel.curselection()])
+
+    def _notificar(self) -> None:
+        if self.on_change:
+            self.on_change(self.get_ids())
+
+    # ---------- Búsqueda ----------
+    def _programar_busqueda(self) -> None:
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self._job = self.after(self.delay_ms, self._buscar)
+
+    def _buscar(self) -> None:
+        self._job = None
+        self._texto = self.var_buscar.get().strip()
+        self._res_ids = []
+        self._res_pos = {}
+        self._cursor = None
+        self._agotado = False
+        self.lb_res.delete(0, tk.END)
+        self._cargar_pagina()
+
+    def _cargar_pagina(self) -> None:
+        # búsqueda y páginas comparten clave: una búsqueda nueva descarta la página en vuelo
+        if self._agotado:
+            self._pagina_pedida = False
+            return
+        self._pagina_pedida = True
+        texto, cursor, limite = self._texto, self._cursor, self.page_size
+        self.loader.submit(
+            "buscar",
+            lambda: self.svc.sugerir(texto, despues_de=cursor, limite=limite),
+            self._pintar_pagina,
+        )
+
+    def _pintar_pagina(self, terrenos: List[Terreno]) -> None:
+        self._pagina_pedida = False
+        if len(terrenos) < self.page_size:
+            self._agotado = True
+        if terrenos:
+            ult = terrenos[-1]
+            self._cursor = (ult.manzana, ult.numero_lote, int(ult.id))
+        for t in terrenos:
+            tid = int(t.id)
+            self._res_pos[tid] = len(self._res_ids)
+            self._res_ids.append(tid)
+            self.lb_res.insert(tk.END, etiqueta_terreno(t))
+            if tid in self._sel_set:
+                self._marcar(tid, True)
+
+    def _on_res_scroll(self, first: str, last: str) -> None:
+        self._vs_res.set(first, last)
+        # cerca del final: traer la página siguiente
+        if not self._agotado and not self._pagina_pedida and float(last) >= 0.9:
+            self._cargar_pagina()
@@ -14,6 +14,14 @@ TEST_DB_DIR = Path("tests/.tmp")
 TEST_DB_PATH = TEST_DB_DIR / "test.sqlite3"
 
 
+def _remove_test_db() -> None:
+    # En modo WAL quedan los archivos -wal/-shm junto a la base; un -wal viejo no debe
+    # reaplicarse sobre una base nueva.
+    for path in (TEST_DB_PATH, Path(f"{TEST_DB_PATH}-wal"), Path(f"{TEST_DB_PATH}-shm")):
+        if path.exists():
+            path.unlink()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def test_database():
     # Create temp folder
@@ -26,8 +34,7 @@ def test_database():
 
     # Ensure a clean DB per test session
     try:
-        if TEST_DB_PATH.exists():
-            TEST_DB_PATH.unlink()
+        _remove_test_db()
     except Exception:
         pass
 
@@ -37,9 +44,11 @@ def test_database():
     yield
 
     # Cleanup (comment out to keep DB for inspection)
+    from core.database import close_all_connections
+
+    close_all_connections()
     try:
-        if TEST_DB_PATH.exists():
-            TEST_DB_PATH.unlink()
+        _remove_test_db()
         if TEST_DB_DIR.exists() and not any(TEST_DB_DIR.iterdir()):
             TEST_DB_DIR.rmdir()
     except Exception:
@@ -0,0 +1,112 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.frame_manager import AsyncLoader, BaseScreen
+
+
+class FakeWidget:
+    """Sustituye a Tk: after() sólo anota el callback; el test decide cuándo correrlo."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, _ms, fn):
+        self.callbacks.append(fn)
+
+    def drain(self, loader, timeout=5.0):
+        # simula el mainloop hasta que el loader deja de programar polls
+        limit = time.monotonic() + timeout
+        while self.callbacks:
+            assert time.monotonic() < limit, "el loader no terminó"
+            self.callbacks.pop(0)()
+            time.sleep(0.005)
+
+
+@pytest.fixture
+def pool():
+    ex = ThreadPoolExecutor(max_workers=2)
+    yield ex
+    ex.shutdown(wait=True)
+
+
+def test_entrega_en_hilo_de_tk_y_avisa_busy(pool):
+    w = FakeWidget()
+    busy = []
+    loader = AsyncLoader(w, on_busy=busy.append, executor=pool)
+    hilos, resultados = [], []
+
+    def trabajo():
+        hilos.append(threading.current_thread().name)
+        return 42
+
+    loader.submit("x", trabajo, lambda v: resultados.append((v, threading.current_thread().name)))
+    assert resultados == []  # nada se entrega fuera del poll
+    w.drain(loader)
+    assert resultados == [(42, threading.current_thread().name)]
+    assert hilos and hilos[0] != threading.current_thread().name
+    assert busy == [True, False]
+    assert not loader.busy
+
+
+def test_misma_clave_solo_entrega_el_ultimo(pool):
+    w = FakeWidget()
+    loader = AsyncLoader(w, executor=pool)
+    liberar = threading.Event()
+    recibidos = []
+
+    loader.submit("tabla", lambda: liberar.wait(5) and "viejo", recibidos.append)
+    for n in range(5):
+        loader.submit("tabla", lambda n=n: f"tecla {n}", recibidos.append)
+    liberar.set()
+    w.drain(loader)
+    assert recibidos == ["tecla 4"]
+
+
+def test_cancel_descarta_y_errores_van_a_on_error(pool):
+    w = FakeWidget()
+    busy = []
+    loader = AsyncLoader(w, on_busy=busy.append, executor=pool)
+    recibidos, errores = [], []
+
+    loader.submit("a", lambda: "a", recibidos.append)
+    loader.cancel()
+    assert busy == [True, False]
+    w.drain(loader)
+    assert recibidos == []
+
+    def falla():
+        raise ValueError("sin conexión")
+
+    loader.submit("b", falla, recibidos.append, errores.append)
+    loader.submit("c", lambda: "c", recibidos.append)
+    w.drain(loader)
+    assert recibidos == ["c"]
+    assert [str(e) for e in errores] == ["sin conexión"]
+
+
+def test_pantalla_oculta_antes_de_cargar_retoma_al_mostrarse(pool):
+    w = FakeWidget()
+    # sin Tk: sólo la lógica de BaseScreen, con un loader sobre el widget falso
+    screen = BaseScreen.__new__(BaseScreen)
+    screen._loader = AsyncLoader(w, executor=pool)
+    liberar = threading.Event()
+    recibidos = []
+
+    screen.load_async("ya", lambda: "listo", recibidos.append)
+    w.drain(screen.loader)
+    assert recibidos == ["listo"]
+
+    screen.load_async("tabla", lambda: liberar.wait(5) and "filas", recibidos.append)
+    screen.cancel_loads()  # el usuario se fue antes de que termine la primera carga
+    liberar.set()
+    w.drain(screen.loader)
+    assert recibidos == ["listo"]
+
+    screen.resume_loads()  # FrameManager al volver a mostrarla
+    w.drain(screen.loader)
+    assert recibidos == ["listo", "filas"]
+    screen.resume_loads()  # ya entregada: no se repite
+    assert not screen.loader.busy
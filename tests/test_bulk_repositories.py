@@ -0,0 +1,98 @@
+import pytest
+
+from entities.edificacion import Edificacion
+from entities.reserva import Reserva
+from entities.terreno import Terreno
+from repositories.edificacion_repository import EdificacionRepository
+from repositories.reserva_repository import ReservaRepository
+from repositories.terreno_repository import TerrenoRepository
+
+
+def test_create_many_returns_ids_in_order():
+    trepo = TerrenoRepository()
+    lotes = [Terreno(manzana="BK", numero_lote=str(i), superficie=100.0 + i) for i in range(50)]
+    ids = trepo.create_many(lotes)
+    assert len(ids) == 50
+    for tid, lote in zip(ids, lotes):
+        t = trepo.find_by_id(tid)
+        assert t is not None and t.numero_lote == lote.numero_lote
+    assert trepo.create_many([]) == []
+
+
+def test_edificacion_and_reserva_create_many():
+    trepo = TerrenoRepository()
+    erepo = EdificacionRepository()
+    rrepo = ReservaRepository()
+    t1, t2 = trepo.create_many(
+        [Terreno(manzana="BK2", numero_lote="1", superficie=200.0), Terreno(manzana="BK2", numero_lote="2", superficie=210.0)]
+    )
+    eids = erepo.create_many(
+        [
+            Edificacion(tipo="CASA", superficie_cubierta=80.0, terrenos_ids=[t1]),
+            Edificacion(tipo="LOCAL", superficie_cubierta=60.0, terrenos_ids=[t1, t2]),
+        ]
+    )
+    assert erepo.find_by_id(eids[0]).terrenos_ids == [t1]
+    assert erepo.find_by_id(eids[1]).terrenos_ids == [t1, t2]
+
+    rids = rrepo.create_many(
+        [
+            Reserva(tipo_propiedad="TERRENO", propiedad_id=t2, cliente="A", fecha_reserva="2025-01-01", monto_reserva=1.0),
+            Reserva(tipo_propiedad="EDIFICACION", propiedad_id=eids[0], cliente="B", fecha_reserva="2025-01-02", monto_reserva=2.0),
+        ]
+    )
+    assert [rrepo.find_by_id(r).cliente for r in rids] == ["A", "B"]
+
+
+def test_find_by_ids_parte_la_lista_en_trozos(monkeypatch):
+    import core.database
+
+    trepo, erepo, rrepo = TerrenoRepository(), EdificacionRepository(), ReservaRepository()
+    tids = trepo.create_many([Terreno(manzana="BK3", numero_lote=str(i), superficie=100.0) for i in range(7)])
+    eids = erepo.create_many([Edificacion(nombre=f"E{i}", terrenos_ids=[tids[i]]) for i in range(3)])
+    rids = rrepo.create_many(
+        [
+            Reserva(tipo_propiedad="TERRENO", propiedad_id=t, cliente="C", fecha_reserva="2025-01-01", monto_reserva=1.0, estado="CANCELADA")
+            for t in tids[:4]
+        ]
+    )
+    monkeypatch.setattr(core.database, "SQLITE_MAX_VARIABLES", 3)  # fuerza varios IN por consulta
+
+    pedidos = [*reversed(tids), 999_999, tids[0]]
+    assert [t.id for t in trepo.find_by_ids(pedidos)] == tids
+    assert [(e.id, e.terrenos_ids) for e in erepo.find_by_ids([*eids, 999_999])] == [
+        (eid, [tids[i]]) for i, eid in enumerate(eids)
+    ]
+    assert [r.id for r in rrepo.find_by_ids(rids)] == sorted(rids, reverse=True)
+    assert trepo.find_by_ids([]) == []
+
+
+def test_update_many_agrupa_por_columnas():
+    trepo, erepo, rrepo = TerrenoRepository(), EdificacionRepository(), ReservaRepository()
+    tids = trepo.create_many([Terreno(manzana="BK4", numero_lote=str(i), superficie=100.0) for i in range(3)])
+
+    n = trepo.update_many({tids[0]: {"estado": "VENDIDO"}, tids[1]: {"estado": "VENDIDO"}, tids[2]: {"superficie": 150.0}})
+    assert n == 3
+    assert [(t.estado, t.superficie) for t in trepo.find_by_ids(tids)] == [
+        ("VENDIDO", 100.0),
+        ("VENDIDO", 100.0),
+        ("DISPONIBLE", 150.0),
+    ]
+    assert trepo.update_many({tids[0]: {}}) == 0
+    with pytest.raises(ValueError, match="no actualizables"):
+        trepo.update_many({tids[0]: {"id": 1}})
+
+    eids = erepo.create_many([Edificacion(nombre=f"BK4-{i}", terrenos_ids=[tids[i]]) for i in range(2)])
+    erepo.update_many({eids[0]: {"cochera": True, "terrenos_ids": [tids[1], tids[2]]}, eids[1]: {"cochera": True}})
+    e0, e1 = erepo.find_by_ids(eids)
+    assert (e0.cochera, e0.terrenos_ids) == (True, [tids[1], tids[2]])
+    assert (e1.cochera, e1.terrenos_ids) == (True, [tids[1]])
+
+    rids = rrepo.create_many(
+        [
+            Reserva(tipo_propiedad="TERRENO", propiedad_id=t, cliente="C", fecha_reserva="2025-01-01", monto_reserva=1.0, estado="CANCELADA")
+            for t in tids[:2]
+        ]
+    )
+    assert rrepo.update_many({rid: {"monto_reserva": 2.0} for rid in rids}) == 2
+    assert {r.monto_reserva for r in rrepo.find_by_ids(rids)} == {2.0}
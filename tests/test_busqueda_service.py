@@ -0,0 +1,52 @@
+from entities.reserva import Reserva
+from entities.terreno import Terreno
+from repositories.reserva_repository import ReservaRepository
+from repositories.terreno_repository import TerrenoRepository
+from services.busqueda_service import BusquedaService
+
+
+def test_busqueda_sin_acentos_ni_mayusculas_entre_tipos():
+    trepo = TerrenoRepository()
+    tid = trepo.create(Terreno(manzana="FT", numero_lote="1", superficie=90.0, ubicacion="Barrio Peñalosa Norte"))
+    rid = ReservaRepository().create(
+        Reserva(tipo_propiedad="TERRENO", propiedad_id=tid, cliente="José Peñalosa", fecha_reserva="2025-01-01", monto_reserva=5.0)
+    )
+    svc = BusquedaService()
+
+    hits = svc.buscar("PENALOSA")
+    assert {(h.tipo, h.id) for h in hits} >= {("TERRENO", tid), ("RESERVA", rid)}
+    reserva = next(h for h in hits if h.tipo == "RESERVA")
+    assert "«Peñalosa»" in reserva.snippet
+
+    assert [h.id for h in svc.buscar("jos pena", tipos=["RESERVA"])] == [rid]
+    assert svc.buscar('"; DROP') == []
+
+
+def test_triggers_mantienen_indice_en_update_y_delete():
+    trepo = TerrenoRepository()
+    tid = trepo.create(Terreno(manzana="FT", numero_lote="2", superficie=90.0, observaciones="esquina arbolada"))
+    svc = BusquedaService()
+    assert [h.id for h in svc.buscar("arbolada")] == [tid]
+
+    t = trepo.find_by_id(tid)
+    t.observaciones = "frente al parque"
+    trepo.update(t)
+    assert svc.buscar("arbolada") == []
+    assert [h.id for h in svc.buscar("parque", tipos=["TERRENO"])] == [tid]
+
+    trepo.delete(tid)
+    assert svc.buscar("parque", tipos=["TERRENO"]) == []
+
+
+def test_tipos_se_intercalan_por_ranking_propio():
+    trepo = TerrenoRepository()
+    t1 = trepo.create(Terreno(manzana="FT", numero_lote="3", superficie=90.0, observaciones="zarzal zarzal"))
+    t2 = trepo.create(Terreno(manzana="FT", numero_lote="4", superficie=90.0, observaciones="zarzal y otras cosas más"))
+    rid = ReservaRepository().create(
+        Reserva(tipo_propiedad="TERRENO", propiedad_id=t1, cliente="Zarzal", fecha_reserva="2025-01-01", monto_reserva=5.0)
+    )
+    svc = BusquedaService()
+
+    hits = svc.buscar("zarzal")
+    assert [(h.tipo, h.id) for h in hits] == [("TERRENO", t1), ("RESERVA", rid), ("TERRENO", t2)]
+    assert [h.tipo for h in svc.buscar("zarzal", limite=2)] == ["TERRENO", "RESERVA"]
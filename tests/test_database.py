@@ -0,0 +1,95 @@
+import threading
+
+from core.database import Database, get_connection_manager
+from repositories.terreno_repository import TerrenoRepository
+from repositories.reserva_repository import ReservaRepository
+from entities.terreno import Terreno
+
+
+def test_repositories_share_thread_connection():
+    trepo = TerrenoRepository()
+    rrepo = ReservaRepository()
+
+    with trepo.db._connection() as c1, rrepo.db._connection() as c2:
+        assert c1 is c2
+
+
+def test_each_thread_gets_its_own_connection():
+    db = Database()
+    with db._connection() as main_conn:
+        pass
+
+    seen = []
+
+    def worker():
+        with Database()._connection() as conn:
+            seen.append(conn)
+            assert Database().fetch_one("SELECT 1 AS uno")["uno"] == 1
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+
+    assert seen and seen[0] is not main_conn
+    # la conexión del hilo terminado se desaloja al abrir la próxima
+    get_connection_manager()._evict_dead_threads()
+    assert get_connection_manager().stats()["sqlite_threads"] == 1
+
+
+def test_connect_close_keeps_shared_connection_open():
+    db = Database()
+    db.connect()
+    conn = db.conn
+    db.close()
+    assert db.conn is None
+    # la conexión física sigue disponible para otros repositorios
+    assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_transaction_commits_once_and_rolls_back_on_error():
+    db = Database()
+    trepo = TerrenoRepository()
+    with db.transaction():
+        tid = trepo.create(Terreno(manzana="TX", numero_lote="1", superficie=100.0))
+        assert db.in_transaction()
+    assert not db.in_transaction()
+    assert trepo.find_by_id(tid) is not None
+
+    try:
+        with db.transaction():
+            tid2 = trepo.create(Terreno(manzana="TX", numero_lote="2", superficie=100.0))
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert trepo.find_by_id(tid2) is None
+
+
+def test_nested_transaction_uses_savepoint():
+    db = Database()
+    trepo = TerrenoRepository()
+    with db.transaction():
+        outer = trepo.create(Terreno(manzana="TX", numero_lote="3", superficie=100.0))
+        try:
+            with db.transaction():
+                inner = trepo.create(Terreno(manzana="TX", numero_lote="4", superficie=100.0))
+                raise ValueError("inner")
+        except ValueError:
+            pass
+    assert trepo.find_by_id(outer) is not None
+    assert trepo.find_by_id(inner) is None
+
+
+def test_fetch_iter_streams_in_batches():
+    db = Database()
+    trepo = TerrenoRepository()
+    with db.transaction():
+        for i in range(7):
+            trepo.create(Terreno(manzana="IT", numero_lote=str(i), superficie=50.0))
+
+    rows = db.fetch_iter("SELECT * FROM terrenos WHERE manzana = ? ORDER BY id", ("IT",), batch_size=3)
+    first = next(rows)
+    assert first["manzana"] == "IT"
+    assert len(list(rows)) == 6
+
+    lazy = trepo.iter_all(batch_size=2)
+    assert [t.id for t in lazy] == [t.id for t in trepo.find_all()]
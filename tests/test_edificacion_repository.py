@@ -0,0 +1,96 @@
+import pytest
+
+from core.query_monitor import get_query_monitor
+from entities.edificacion import Edificacion
+from entities.terreno import Terreno
+from repositories.edificacion_repository import EdificacionRepository
+from repositories.edificacion_terreno_repository import EdificacionTerrenoRepository
+from repositories.terreno_repository import TerrenoRepository
+
+
+def test_listados_cargan_vinculos_en_una_consulta():
+    trepo = TerrenoRepository()
+    erepo = EdificacionRepository()
+    t1, t2, t3 = trepo.create_many(
+        [Terreno(manzana="NQ", numero_lote=str(i), superficie=100.0) for i in range(3)]
+    )
+    eids = erepo.create_many(
+        [
+            Edificacion(tipo="CASA", terrenos_ids=[t3, t1]),
+            Edificacion(tipo="LOCAL", terrenos_ids=[t2]),
+            Edificacion(tipo="GALPON"),
+        ]
+    )
+
+    events = []
+    monitor = get_query_monitor()
+    monitor.add_hook(events.append)
+    try:
+        todas = {e.id: e for e in erepo.find_all()}
+        por_terreno = erepo.list_by_terreno(t1)
+        disponibles = {e.id for e in erepo.list_disponibles()}
+        lazy = {e.id: e.terrenos_ids for e in erepo.iter_all(batch_size=2)}
+    finally:
+        monitor.remove_hook(events.append)
+
+    # mismo orden que antes: terrenos_ids ordenados por terreno_id
+    assert todas[eids[0]].terrenos_ids == [t1, t3]
+    assert todas[eids[1]].terrenos_ids == [t2]
+    assert todas[eids[2]].terrenos_ids == []
+    assert [e.id for e in por_terreno] == [eids[0]]
+    assert set(eids) <= disponibles
+    assert lazy[eids[0]] == [t1, t3]
+    # find_all + list_by_terreno + list_disponibles: 2 consultas c/u (sin N+1)
+    per_row = [e for e in events if e.sql.startswith("SELECT terreno_id FROM edificacion_terreno")]
+    assert per_row == []
+
+
+def test_reemplazo_de_vinculos_set_based():
+    trepo = TerrenoRepository()
+    erepo = EdificacionRepository()
+    etrepo = EdificacionTerrenoRepository()
+    tids = trepo.create_many([Terreno(manzana="SB", numero_lote=str(i), superficie=100.0) for i in range(6)])
+    eid = erepo.create(Edificacion(nombre="Casa SB", terrenos_ids=tids[:3]))
+
+    events = []
+    monitor = get_query_monitor()
+    monitor.add_hook(events.append)
+    try:
+        etrepo.reemplazar_terrenos(eid, tids[2:])
+    finally:
+        monitor.remove_hook(events.append)
+    assert etrepo.terrenos_ids_de_edificacion(eid) == tids[2:]
+    writes = [e for e in events if e.sql.startswith(("DELETE", "INSERT"))]
+    assert len(writes) == 2  # un DELETE ... IN + un executemany
+
+    etrepo.reemplazar_edificaciones(tids[0], [eid])
+    assert etrepo.edificaciones_ids_de_terreno(tids[0]) == [eid]
+    etrepo.reemplazar_edificaciones(tids[0], [])
+    assert etrepo.edificaciones_ids_de_terreno(tids[0]) == []
+
+
+def test_patch_no_relee_vinculos_si_no_cambiaron():
+    from services.edificacion_service import EdificacionService
+
+    tid = TerrenoRepository().create(Terreno(manzana="SB", numero_lote="V", superficie=100.0))
+    svc = EdificacionService()
+    eid = svc.crear({"tipo": "CASA", "terrenos_ids": [tid]})
+
+    events = []
+    monitor = get_query_monitor()
+    monitor.add_hook(events.append)
+    try:
+        svc.actualizar(eid, {"observaciones": "pintada"})
+        svc.cambiar_estado(eid, "VENDIDO")
+    finally:
+        monitor.remove_hook(events.append)
+    assert not any(e.sql.startswith(("DELETE FROM edificacion_terreno", "INSERT")) for e in events)
+    writes = [e.sql for e in events if e.sql.startswith("UPDATE")]
+    assert writes[0] == "UPDATE edificaciones SET observaciones = ? WHERE id = ?"
+    assert len(writes) == 2
+    e = svc.obtener(eid)
+    assert (e.observaciones, e.estado, e.terrenos_ids) == ("pintada", "VENDIDO", [tid])
+
+    sin_terrenos = svc.crear({"tipo": "LOCAL"})
+    with pytest.raises(ValueError, match="al menos un terreno"):
+        svc.cambiar_estado(sin_terrenos, "VENDIDO")
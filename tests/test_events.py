@@ -0,0 +1,172 @@
+import threading
+
+import pytest
+
+from core.database import Database
+from core.events import (
+    CREADO,
+    ELIMINADO,
+    ColaCambios,
+    EventBus,
+    cambio,
+    fusionar,
+    get_event_bus,
+    resumir,
+)
+from services.loteo_service import LoteoService
+from services.terreno_service import TerrenoService
+
+
+class FakeWidget:
+    """Sustituye a Tk: after() sólo anota el callback; el test decide cuándo correrlo."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, _ms, fn):
+        self.callbacks.append(fn)
+
+
+@pytest.fixture
+def escuchados():
+    recibidos = []
+    desuscribir = get_event_bus().suscribir("TERRENO", recibidos.append)
+    yield recibidos
+    desuscribir()
+
+
+def test_publica_recien_al_confirmar_y_descarta_en_rollback():
+    bus = EventBus()
+    recibidos = []
+    bus.suscribir("TERRENO", recibidos.append)
+    db = Database()
+
+    with db.transaction():
+        bus.publicar([cambio("TERRENO", 1)], db=db)
+        with pytest.raises(RuntimeError):
+            with db.transaction():  # savepoint deshecho: su aviso no sale
+                bus.publicar([cambio("TERRENO", 2)], db=db)
+                raise RuntimeError("falla interna")
+        assert recibidos == []
+    assert [[c.id for c in lote] for lote in recibidos] == [[1]]
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            bus.publicar([cambio("TERRENO", 3)], db=db)
+            raise RuntimeError("falla")
+    bus.publicar([cambio("TERRENO", 4), cambio("LOTEO", 5)], db=db)  # fuera de transacción: ya
+    assert [[c.id for c in lote] for lote in recibidos] == [[1], [4]]
+
+
+def test_fusionar_colapsa_por_id_y_sin_id_absorbe_la_entidad():
+    out = fusionar(
+        [
+            cambio("TERRENO", 1, CREADO),
+            cambio("TERRENO", 1, campos=("estado",)),
+            cambio("TERRENO", 2, campos=("estado",)),
+            cambio("TERRENO", 2, campos=("superficie",)),
+            cambio("TERRENO", 3, campos=("estado",)),
+            cambio("TERRENO", 3, ELIMINADO),
+            cambio("EDIFICACION", 9),
+            cambio("EDIFICACION", None, campos=("terrenos_ids",)),
+        ]
+    )
+    assert out[:3] == [
+        cambio("TERRENO", 1, CREADO),
+        cambio("TERRENO", 2, campos=("estado", "superficie")),
+        cambio("TERRENO", 3, ELIMINADO),
+    ]
+    assert out[3:] == [cambio("EDIFICACION", None, campos=("terrenos_ids",))]
+
+
+def test_resumir_filtra_por_columnas_y_recarga_si_son_muchas():
+    cambios = [
+        cambio("TERRENO", 1, campos=("loteo_id",)),  # la vista no lo muestra
+        cambio("TERRENO", 2, campos=("estado",)),
+        cambio("TERRENO", 3, ELIMINADO),
+        cambio("LOTEO", 4),
+    ]
+    p = resumir(cambios, "TERRENO", campos=("estado", "superficie"))
+    assert (p.recargar, p.actualizar, p.quitar) == (False, [2], [3])
+
+    muchos = [cambio("TERRENO", i) for i in range(10)]
+    assert resumir(muchos, "TERRENO", max_filas=5).recargar
+    assert not resumir([cambio("TERRENO", None, campos=("loteo_id",))], "TERRENO", campos=("estado",))
+
+
+def test_cola_entrega_una_vez_por_rafaga():
+    w = FakeWidget()
+    entregas = []
+    cola = ColaCambios(w, entregas.append)
+    assert len(w.callbacks) == 1  # el poll se programa al crearla (hilo de Tk)
+    for i in range(3):
+        cola([cambio("TERRENO", i, campos=("estado",))])
+    cola([cambio("TERRENO", 0, campos=("superficie",))])
+    assert len(w.callbacks) == 1 and cola.pendientes == 4
+
+    w.callbacks.pop()()
+    assert len(entregas) == 1
+    assert [c.id for c in entregas[0]] == [0, 1, 2]
+    assert entregas[0][0].campos == {"estado", "superficie"}
+    assert len(w.callbacks) == 1  # se reprograma
+
+    w.callbacks.pop()()  # sin cambios: no entrega nada
+    assert len(entregas) == 1
+
+    cola.detener()
+    w.callbacks.pop()()
+    assert w.callbacks == []
+
+
+def test_cola_recibe_desde_otro_hilo_sin_tocar_el_widget():
+    hilos = []
+
+    class Widget(FakeWidget):
+        def after(self, ms, fn):
+            hilos.append(threading.current_thread())
+            super().after(ms, fn)
+
+    w = Widget()
+    entregas = []
+    cola = ColaCambios(w, lambda cs: entregas.append((threading.current_thread(), cs)))
+    t = threading.Thread(target=cola, args=([cambio("TERRENO", 1)],))
+    t.start()
+    t.join()
+    assert cola.pendientes == 1
+
+    w.callbacks.pop()()
+    assert entregas == [(threading.current_thread(), [cambio("TERRENO", 1)])]
+    assert hilos == [threading.current_thread()] * 2
+
+
+def test_servicio_publica_operacion_masiva_en_un_solo_aviso(escuchados):
+    ts = TerrenoService()
+    ids = [ts.crear({"manzana": "EV", "numero_lote": str(n), "superficie": 100.0}) for n in range(1, 4)]
+    assert [(c.id, c.accion) for lote in escuchados for c in lote] == [(i, CREADO) for i in ids]
+    escuchados.clear()
+
+    res = ts.cambiar_estado_many([*ids, 999_999], "RESERVADO")
+    assert res.aplicados == ids
+    assert len(escuchados) == 1
+    assert [(c.id, c.campos) for c in escuchados[0]] == [(i, {"estado"}) for i in ids]
+
+    escuchados.clear()
+    ts.actualizar(ids[0], {"superficie": 150.0})
+    assert escuchados == [[cambio("TERRENO", ids[0], campos=("superficie",))]]
+
+
+def test_cambios_de_loteo_no_se_pierden_al_filtrar_por_columnas():
+    recibidos = []
+    desuscribir = get_event_bus().suscribir("LOTEO", recibidos.extend)
+    try:
+        ts = TerrenoService()
+        lid = LoteoService().crear({"nombre": "Loteo EL"})
+        tid = ts.crear({"manzana": "EL", "numero_lote": "1", "superficie": 100.0})
+        recibidos.clear()
+        ts.asignar_loteo_many([tid], lid)
+        ts.eliminar(tid)
+    finally:
+        desuscribir()
+    # la cantidad de terrenos no es una columna de loteos: columnas desconocidas, no inventadas
+    assert recibidos == [cambio("LOTEO", None), cambio("LOTEO", None)]
+    assert resumir(recibidos, "LOTEO", campos=("nombre", "estado")).recargar
@@ -0,0 +1,54 @@
+from core.query_monitor import get_query_monitor
+from services.edificacion_service import EdificacionService
+from services.indice_propiedades import IndicePropiedades, get_indice_propiedades
+from services.terreno_service import TerrenoService
+
+
+def _consultas(fn):
+    events = []
+    mon = get_query_monitor()
+    mon.add_hook(events.append)
+    try:
+        fn()
+    finally:
+        mon.remove_hook(events.append)
+    return [e.sql for e in events]
+
+
+def test_indice_se_arma_una_vez_y_relee_solo_lo_invalidado():
+    ts = TerrenoService()
+    tid = ts.crear({"manzana": "IX", "numero_lote": "1", "superficie": 100.0})
+    indice = IndicePropiedades()
+
+    assert len(_consultas(lambda: indice.etiquetas("TERRENO"))) == 1
+    # clics sucesivos: lookup en memoria, sin consultas
+    assert _consultas(lambda: indice.etiqueta("TERRENO", tid)) == []
+    assert indice.etiqueta("TERRENO", tid) == f"{tid} | Mz IX · Lote 1 · 100.0 m²"
+
+    indice.invalidar("TERRENO", tid)
+    sqls = _consultas(lambda: indice.etiqueta("TERRENO", tid))
+    assert len(sqls) == 1 and "IN" in sqls[0]
+
+    # una baja desaparece al releer
+    indice.invalidar("TERRENO", 999_999)
+    assert indice.etiqueta("TERRENO", 999_999) is None
+
+
+def test_servicios_invalidan_el_indice_compartido():
+    ts = TerrenoService()
+    es = EdificacionService()
+    indice = get_indice_propiedades()
+    tid = ts.crear({"manzana": "IX", "numero_lote": "2", "superficie": 120.0})
+    eid = es.crear({"tipo": "CASA", "superficie_cubierta": 80.0, "terrenos_ids": [tid]})
+    assert indice.etiqueta("EDIFICACION", eid).endswith(f"Terrenos [{tid}]")
+
+    ts.actualizar(tid, {"superficie": 130.0})
+    assert indice.etiqueta("TERRENO", tid).endswith("130.0 m²")
+
+    es.quitar_terreno(eid, tid)
+    assert indice.etiqueta("EDIFICACION", eid).endswith("Terrenos []")
+
+    nuevo = ts.crear({"manzana": "IX", "numero_lote": "3", "superficie": 90.0})
+    assert nuevo in dict(indice.etiquetas("TERRENO"))
+    ts.eliminar(nuevo)
+    assert indice.etiqueta("TERRENO", nuevo) is None
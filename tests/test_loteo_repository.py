@@ -0,0 +1,69 @@
+import pytest
+
+from core.query_monitor import get_query_monitor
+from entities.loteo import Loteo
+from entities.terreno import Terreno
+from repositories.loteo_repository import LoteoRepository
+from repositories.terreno_repository import TerrenoRepository
+from services.loteo_service import LoteoService
+
+
+def test_find_all_agrupa_terrenos_sin_n_mas_1():
+    trepo = TerrenoRepository()
+    lrepo = LoteoRepository()
+    t1, t2, t3 = trepo.create_many(
+        [Terreno(manzana="LQ", numero_lote=str(i), superficie=300.0) for i in range(3)]
+    )
+    l1 = lrepo.create(Loteo(nombre="Loteo LQ uno", terrenos_ids=[t3, t1]))
+    l2 = lrepo.create(Loteo(nombre="Loteo LQ dos", terrenos_ids=[t2]))
+    l3 = lrepo.create(Loteo(nombre="Loteo LQ vacío"))
+
+    events = []
+    monitor = get_query_monitor()
+    monitor.add_hook(events.append)
+    try:
+        loteos = {l.id: l for l in lrepo.find_all()}
+    finally:
+        monitor.remove_hook(events.append)
+
+    assert loteos[l1].terrenos_ids == [t1, t3]
+    assert loteos[l2].terrenos_ids == [t2]
+    assert loteos[l3].terrenos_ids == []
+    assert len(events) == 2
+    assert {l.id: l.terrenos_ids for l in lrepo.iter_all(batch_size=1)}[l1] == [t1, t3]
+
+
+def test_listar_con_cantidad():
+    lsvc = LoteoService()
+    trepo = TerrenoRepository()
+    tids = trepo.create_many([Terreno(manzana="LC", numero_lote=str(i), superficie=300.0) for i in range(4)])
+    lid = lsvc.crear({"nombre": "Loteo cantidades", "terrenos_ids": tids})
+    resumen = {l.id: (l, n) for l, n in lsvc.listar_con_cantidad()}
+    loteo, cantidad = resumen[lid]
+    assert cantidad == 4
+    assert loteo.terrenos_ids == []
+
+
+def test_validacion_de_terrenos_en_una_consulta_por_trozo():
+    trepo = TerrenoRepository()
+    ids = trepo.create_many([Terreno(manzana="EX", numero_lote=str(i), superficie=50.0) for i in range(1200)])
+    assert trepo.exists(ids[0]) and not trepo.exists(-1)
+    assert trepo.existing_ids([*ids, -5]) == set(ids)
+
+    svc = LoteoService()
+    lid = svc.crear({"nombre": "Loteo EX"})
+    events = []
+    monitor = get_query_monitor()
+    monitor.add_hook(events.append)
+    try:
+        svc.reemplazar_terrenos(lid, ids)
+    finally:
+        monitor.remove_hook(events.append)
+    probes = [e for e in events if e.sql.startswith("SELECT id FROM terrenos WHERE id IN")]
+    assert len(probes) == 2  # 1200 ids -> 2 trozos bajo el límite de 999 parámetros
+    updates = [e for e in events if e.sql.startswith("UPDATE terrenos SET loteo_id=?")]
+    assert len(updates) == 2  # asignación set-based: un UPDATE ... IN por trozo
+    assert set(LoteoRepository().find_by_id(lid).terrenos_ids) == set(ids)
+
+    with pytest.raises(ValueError, match="id=-7"):
+        svc.reemplazar_terrenos(lid, [ids[0], -7])
@@ -0,0 +1,83 @@
+import pytest
+
+from core.pagination import decode_token, encode_token
+from entities.reserva import Reserva
+from entities.terreno import Terreno
+from repositories.reserva_repository import ReservaRepository
+from repositories.terreno_repository import TerrenoRepository
+from repositories.usuario_repository import UsuarioRepository
+
+
+def test_token_roundtrip_and_invalid():
+    assert decode_token(encode_token(42, "desc")) == (42, "desc")
+    assert decode_token(encode_token(42, "asc", ["Ñ", "1"])) == (42, "asc")
+    with pytest.raises(ValueError):
+        decode_token("no-es-un-token")
+
+
+def test_terreno_find_page_recorre_todo_sin_repetir():
+    trepo = TerrenoRepository()
+    ids = trepo.create_many([Terreno(manzana="PG", numero_lote=str(i), superficie=90.0) for i in range(7)])
+
+    seen = []
+    page = trepo.find_page(limit=3, filters={"manzana": "PG"}, include_total=True)
+    assert page.total_estimate == 7
+    seen += [t.id for t in page.items]
+    while page.has_more:
+        page = trepo.find_page(token=page.next_token, limit=3, filters={"manzana": "PG"})
+        seen += [t.id for t in page.items]
+    assert seen == ids
+
+    with pytest.raises(ValueError):
+        trepo.find_page(filters={"superficie": 1})
+
+
+def test_reserva_find_page_desc_por_defecto():
+    trepo = TerrenoRepository()
+    rrepo = ReservaRepository()
+    tid = trepo.create(Terreno(manzana="PG", numero_lote="R", superficie=90.0))
+    rids = rrepo.create_many(
+        [
+            # sólo puede haber una reserva ACTIVA por propiedad
+            Reserva(tipo_propiedad="TERRENO", propiedad_id=tid, cliente=f"C{i}", fecha_reserva="2025-01-01", monto_reserva=10.0, estado="CANCELADA")
+            for i in range(3)
+        ]
+    )
+    page = rrepo.find_page(limit=2, filters={"propiedad_id": tid, "tipo_propiedad": "TERRENO"})
+    assert [r.id for r in page.items] == rids[::-1][:2]
+    last = rrepo.find_page(after_id=page.next_after_id, limit=2, filters={"propiedad_id": tid, "tipo_propiedad": "TERRENO"})
+    assert [r.id for r in last.items] == [rids[0]] and not last.has_more
+
+
+def test_usuario_find_page_solo_activos():
+    page = UsuarioRepository().find_page(limit=100)
+    assert all(u.activo for u in page.items)
+
+
+def test_terreno_find_page_por_manzana_y_lote():
+    trepo = TerrenoRepository()
+    # altas desordenadas: el orden por (manzana, numero_lote) no coincide con el de los ids
+    datos = [("PS2", "2"), ("PS1", "3"), ("PS2", "1"), ("PS1", "1"), ("PS1", "2")]
+    ids = dict(zip(datos, trepo.create_many([Terreno(manzana=m, numero_lote=l, superficie=90.0) for m, l in datos])))
+    esperado = [ids[k] for k in sorted(datos)]
+
+    sort = ("manzana", "numero_lote")
+    seen = []
+    page = trepo.find_page(limit=2, sort=sort, filters={"loteo_id": None})
+    while True:
+        seen += [t.id for t in page.items if t.manzana in ("PS1", "PS2")]
+        if not page.has_more:
+            break
+        page = trepo.find_page(token=page.next_token, limit=2, sort=sort, filters={"loteo_id": None})
+    assert seen == esperado
+
+    page = trepo.find_page(limit=2, sort=sort, order="desc", filters={"manzana": "PS1"})
+    page = trepo.find_page(token=page.next_token, limit=2, sort=sort, order="desc", filters={"manzana": "PS1"})
+    assert [t.numero_lote for t in page.items] == ["1"]
+
+    with pytest.raises(ValueError, match="Orden no soportado"):
+        trepo.find_page(sort=("superficie",))
+    with pytest.raises(ValueError, match="token"):
+        trepo.find_page(after_id=1, sort=sort)
+    with pytest.raises(ValueError, match="inválido"):
+        trepo.find_page(token=encode_token(1, "asc"), sort=sort)
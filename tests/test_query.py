@@ -0,0 +1,51 @@
+from core.query import build_select, contains, eq, gte, is_in
+from entities.reserva import Reserva
+from entities.terreno import Terreno
+from repositories.reserva_repository import ReservaRepository
+from repositories.terreno_repository import TerrenoRepository
+from services.reserva_service import ReservaService
+from services.terreno_service import TerrenoService
+
+
+def test_build_select_ignora_none_y_cachea_por_forma():
+    sql, params = build_select("terrenos", [eq("estado", None), gte("superficie", 100), is_in("id", [1, 2])])
+    assert sql == "SELECT * FROM terrenos WHERE superficie >= ? AND id IN (?,?) ORDER BY id ASC"
+    assert params == [100, 1, 2]
+
+    sql2, params2 = build_select("terrenos", [gte("superficie", 5), is_in("id", [7, 8])])
+    assert sql2 is sql  # misma forma -> mismo texto (cacheado)
+    assert params2 == [5, 7, 8]
+
+    sql, params = build_select("reservas", [contains(("cliente",), "50%_x")], order_by="id DESC", limit=10)
+    assert sql.endswith("ORDER BY id DESC LIMIT ?")
+    assert params == ["%50\\%\\_x%", 10]
+
+
+def test_terreno_service_buscar_filtra_en_sql():
+    TerrenoRepository().create_many(
+        [
+            Terreno(manzana="QB", numero_lote="1", superficie=100.0, ubicacion="Calle Sol"),
+            Terreno(manzana="QB", numero_lote="2", superficie=300.0, estado="VENDIDO"),
+            Terreno(manzana="QB", numero_lote="3", superficie=500.0),
+        ]
+    )
+    svc = TerrenoService()
+    assert [t.numero_lote for t in svc.buscar(manzana="QB", estado="DISPONIBLE")] == ["1", "3"]
+    assert [t.numero_lote for t in svc.buscar(manzana="QB", superficie_min=200, superficie_max=400)] == ["2"]
+    assert [t.numero_lote for t in svc.buscar(manzana="QB", texto="sol")] == ["1"]
+    assert len(svc.buscar(manzana="QB", limite=2)) == 2
+
+
+def test_reserva_service_buscar_por_estado_y_texto():
+    tid = TerrenoRepository().create(Terreno(manzana="QB", numero_lote="R", superficie=90.0))
+    ReservaRepository().create_many(
+        [
+            Reserva(tipo_propiedad="TERRENO", propiedad_id=tid, cliente="Quiroga Buscada", fecha_reserva="2025-03-01", monto_reserva=10.0),
+            Reserva(tipo_propiedad="TERRENO", propiedad_id=tid, cliente="Quiroga Buscada", fecha_reserva="2025-04-01", monto_reserva=10.0, estado="CANCELADA"),
+        ]
+    )
+    svc = ReservaService()
+    found = svc.buscar(texto="quiroga busc")
+    assert [r.fecha_reserva for r in found] == ["2025-04-01", "2025-03-01"]
+    assert [r.estado for r in svc.buscar(texto="Quiroga Buscada", estado="ACTIVA")] == ["ACTIVA"]
+    assert [r.fecha_reserva for r in svc.buscar(propiedad_id=tid, fecha_desde="2025-03-15")] == ["2025-04-01"]
@@ -0,0 +1,41 @@
+import logging
+
+from core.query_monitor import QueryMonitor, get_query_monitor, normalize_sql
+from repositories.edificacion_repository import EdificacionRepository
+
+
+def test_normalize_sql_collapses_whitespace_and_in_lists():
+    sql = "SELECT id\n  FROM terrenos   WHERE id IN (?, ?,?)"
+    assert normalize_sql(sql) == "SELECT id FROM terrenos WHERE id IN (?, ...)"
+    # un row value no es una lista IN: su aridad es parte de la consulta
+    assert normalize_sql("SELECT id FROM t WHERE (a, b) > (?, ?)") == "SELECT id FROM t WHERE (a, b) > (?, ?)"
+
+
+def test_monitor_aggregates_statements_by_caller(monkeypatch):
+    monitor = get_query_monitor()
+    monkeypatch.setattr(monitor, "enabled", True)
+    monitor.reset()
+    events = []
+    monitor.add_hook(events.append)
+    try:
+        erepo = EdificacionRepository()
+        erepo.find_all()
+    finally:
+        monitor.remove_hook(events.append)
+
+    assert events and all(e.elapsed_ms >= 0 for e in events)
+    sqls = {st.sql: st for st in monitor.top(20, by="calls")}
+    listing = sqls["SELECT * FROM edificaciones ORDER BY id"]
+    assert listing.calls == 1
+    assert any("EdificacionRepository.find_all" in c for c in listing.callers)
+    assert "calls" in monitor.format_top(5)
+    monitor.reset()
+
+
+def test_slow_queries_are_logged(caplog):
+    monitor = QueryMonitor(slow_ms=1, enabled=False)
+    with caplog.at_level(logging.WARNING, logger="core.query_monitor"):
+        monitor.record("SELECT 1", (), elapsed_ms=5.0, rows=1)
+        monitor.record("SELECT 2", (), elapsed_ms=0.1, rows=1)
+    assert "Slow query" in caplog.text and "SELECT 1" in caplog.text
+    assert "SELECT 2" not in caplog.text
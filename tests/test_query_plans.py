@@ -0,0 +1,118 @@
+"""
+Regresión de planes: ejecuta los métodos de los repositorios capturando su SQL
+(hook del QueryMonitor) y verifica con EXPLAIN QUERY PLAN que ninguna consulta
+con WHERE recorra una tabla completa (SCAN).
+"""
+import re
+
+from core.database import Database
+from core.pagination import encode_token
+from core.query_monitor import get_query_monitor
+from entities.edificacion import Edificacion
+from entities.loteo import Loteo
+from entities.reserva import Reserva
+from entities.terreno import Terreno
+from entities.usuario import Usuario
+from repositories.edificacion_repository import EdificacionRepository
+from repositories.edificacion_terreno_repository import EdificacionTerrenoRepository
+from repositories.loteo_repository import LoteoRepository
+from repositories.reserva_repository import ReservaRepository
+from repositories.terreno_repository import TerrenoRepository
+from repositories.usuario_repository import UsuarioRepository
+from services.reserva_service import ReservaService
+from services.terreno_service import TerrenoService
+
+# Recorridos completos aceptados: listados sin WHERE y búsquedas LIKE '%texto%'
+# (para texto a escala está el índice FTS5, ver BusquedaService).
+_EXENTAS = re.compile(r"\bLIKE\b", re.IGNORECASE)
+_WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+
+def _capturar_consultas():
+    trepo, erepo, rrepo = TerrenoRepository(), EdificacionRepository(), ReservaRepository()
+    lrepo, urepo, etrepo = LoteoRepository(), UsuarioRepository(), EdificacionTerrenoRepository()
+
+    lid = lrepo.create(Loteo(nombre="Loteo Planes"))
+    tid = trepo.create(Terreno(manzana="QP", numero_lote="1", superficie=90.0, nomenclatura="QP-1"))
+    trepo.find_by_id(tid)
+    trepo.find_by_nomenclatura("QP-1")
+    trepo.buscar_prefijo("qp")
+    trepo.buscar_prefijo("mz QP lote 1", despues_de=("QP", "0", 0))
+    trepo.buscar_prefijo("", despues_de=("QP", "0", 0))
+    trepo.exists_by_manzana_lote("QP", "1", exclude_id=tid)
+    trepo.list_disponibles()
+    trepo.find_page(filters={"manzana": "QP"}, include_total=True)
+    trepo.find_page(filters={"estado": "DISPONIBLE"})
+    trepo.find_page(sort=("manzana", "numero_lote"), token=encode_token(0, "asc", ["QP", "0"]))
+    TerrenoService().buscar(manzana="QP", estado="DISPONIBLE")
+
+    eid = erepo.create(Edificacion(nombre="Casa QP", terrenos_ids=[tid]))
+    erepo.find_by_id(eid)
+    erepo.find_all()
+    erepo.list_disponibles()
+    erepo.list_by_terreno(tid)
+    etrepo.terrenos_ids_de_edificacion(eid)
+    etrepo.edificaciones_ids_de_terreno(tid)
+
+    rid = rrepo.create(
+        Reserva(tipo_propiedad="TERRENO", propiedad_id=tid, cliente="Plan", fecha_reserva="2025-02-02", monto_reserva=1.0)
+    )
+    rrepo.find_by_id(rid)
+    rrepo.find_page(filters={"estado": "ACTIVA"})
+    rrepo.find_page(sort=("fecha_reserva",), token=encode_token(0, "desc", ["2025-12-31"]))
+    ReservaService().buscar(fecha_desde="2025-01-01", fecha_hasta="2025-12-31")
+
+    lrepo.reemplazar_terrenos(lid, [tid])
+    lrepo.find_by_id(lid)
+    lrepo.find_all()
+    lrepo.contar_terrenos_por_loteo()
+
+    uid = urepo.create(Usuario(username="planes", password_hash="x"))
+    urepo.find_by_id(uid)
+    urepo.find_by_username("planes")
+    urepo.find_all()
+
+    erepo.delete(eid)
+    lrepo.delete(lid)
+
+
+def test_consultas_de_repositorios_usan_indices():
+    sqls: set[str] = set()
+    monitor = get_query_monitor()
+    hook = lambda ev: sqls.add(ev.sql)  # noqa: E731
+    monitor.add_hook(hook)
+    try:
+        _capturar_consultas()
+    finally:
+        monitor.remove_hook(hook)
+
+    db = Database()
+    problemas = []
+    for sql in sorted(sqls):
+        if not _WHERE.search(sql) or _EXENTAS.search(sql) or sql.upper().startswith("INSERT"):
+            continue
+        stmt = sql.replace("(?, ...)", "(?, ?)")
+        plan = db.fetch_all(f"EXPLAIN QUERY PLAN {stmt}", [None] * stmt.count("?"))
+        for row in plan:
+            detail = row["detail"]
+            if detail.startswith("SCAN ") and "VIRTUAL TABLE" not in detail and "CONSTANT ROW" not in detail:
+                problemas.append(f"{detail} <- {sql}")
+    assert not problemas, "\n".join(problemas)
+
+
+def test_indices_de_consultas_frecuentes():
+    db = Database()
+
+    def plan(sql, params=()):
+        return " | ".join(r["detail"] for r in db.fetch_all(f"EXPLAIN QUERY PLAN {sql}", params))
+
+    assert "ux_terrenos_manzana_lote" in plan(
+        "SELECT id FROM terrenos WHERE manzana = ? AND numero_lote = ?", ("A", "1")
+    )
+    assert "idx_terrenos_estado" in plan("SELECT * FROM terrenos WHERE estado = 'DISPONIBLE' ORDER BY id")
+    assert "idx_usuarios_activo" in plan("SELECT * FROM usuarios WHERE activo = 1 ORDER BY id")
+    assert "idx_reservas_fecha" in plan("SELECT * FROM reservas WHERE fecha_reserva >= ?", ("2025-01-01",))
+
+    # sin índices que ninguna consulta usa
+    indices = {r["name"] for r in db.fetch_all("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert not indices & {"idx_reservas_cliente", "ux_terrenos_loteo_manzana_lote"}
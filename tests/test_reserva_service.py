@@ -1,4 +1,8 @@
+import threading
+from dataclasses import asdict
+
 import pytest
+from entities.reserva import Reserva
 from services.reserva_service import ReservaService
 from services.terreno_service import TerrenoService
 from services.edificacion_service import EdificacionService
@@ -88,3 +92,189 @@ def test_reserva_service_validaciones_edificacion():
             }
         )
 
+
+def test_reservar_es_atomico_y_cancelar_libera():
+    ts = TerrenoService()
+    rs = ReservaService()
+    tid = ts.crear({"manzana": "RV", "numero_lote": "1", "superficie": 150.0})
+    datos = {
+        "tipo_propiedad": "TERRENO",
+        "propiedad_id": tid,
+        "cliente": "Primero",
+        "fecha_reserva": "2025-11-05",
+        "monto_reserva": 1000.0,
+    }
+    rid = rs.reservar(datos)
+    assert ts.obtener(tid).estado == "RESERVADO"
+
+    # segundo agente: el UPDATE condicional no aplica y no se inserta nada
+    with pytest.raises(ValueError, match="no está disponible"):
+        rs.reservar({**datos, "cliente": "Segundo"})
+    assert [r.cliente for r in rs.buscar(propiedad_id=tid)] == ["Primero"]
+
+    # crear() de una ACTIVA pasa por reservar()
+    with pytest.raises(ValueError, match="no está disponible"):
+        rs.crear({**datos, "cliente": "Tercero"})
+    # el índice único parcial rechaza otra ACTIVA aunque se saltee reservar()
+    with pytest.raises(ValueError, match="reserva activa"):
+        rs._create(Reserva(**{**datos, "cliente": "Tercero"}))
+
+    with pytest.raises(ValueError, match="inexistente"):
+        rs.reservar({**datos, "propiedad_id": 999999})
+
+    rs.cancelar(rid)
+    assert ts.obtener(tid).estado == "DISPONIBLE"
+    assert rs.reservar({**datos, "cliente": "Segundo"}) > 0
+
+
+def test_reservar_concurrente_una_sola_gana():
+    tid = TerrenoService().crear({"manzana": "RV", "numero_lote": "2", "superficie": 150.0})
+    resultados = []
+
+    def agente(n):
+        try:
+            ReservaService().reservar(
+                {
+                    "tipo_propiedad": "TERRENO",
+                    "propiedad_id": tid,
+                    "cliente": f"Agente {n}",
+                    "fecha_reserva": "2025-11-06",
+                    "monto_reserva": 10.0,
+                }
+            )
+            resultados.append("ok")
+        except ValueError:
+            resultados.append("rechazada")
+
+    hilos = [threading.Thread(target=agente, args=(n,)) for n in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert sorted(resultados) == ["ok"] + ["rechazada"] * 7
+
+
+def test_actualizar_con_dict_completo_y_confirmar_cancelada():
+    ts = TerrenoService()
+    rs = ReservaService()
+    tid = ts.crear({"manzana": "FD", "numero_lote": "1", "superficie": 100.0})
+    rid = rs.crear(
+        {
+            "tipo_propiedad": "TERRENO",
+            "propiedad_id": tid,
+            "cliente": "Cliente FD",
+            "fecha_reserva": "2025-11-04",
+            "monto_reserva": 1000.0,
+        }
+    )
+
+    # un dict completo (id, created_at, ...) como el que arma una pantalla a partir de la entidad
+    datos = {**asdict(rs.obtener(rid)), "monto_reserva": 1500.0}
+    rs.actualizar(rid, datos)
+    assert rs.obtener(rid).monto_reserva == 1500.0
+
+    t = ts.obtener(tid)
+    ts.actualizar(tid, {**asdict(t), "superficie": 120.0})
+    assert ts.obtener(tid).superficie == 120.0
+
+    es = EdificacionService()
+    eid = es.crear({"tipo": "CASA", "superficie_cubierta": 70.0, "terrenos_ids": [tid]})
+    es.actualizar(eid, {**asdict(es.obtener(eid)), "superficie_cubierta": 75.0})
+    e = es.obtener(eid)
+    assert e.superficie_cubierta == 75.0 and e.terrenos_ids == [tid]
+
+    # como antes: una reserva existente se puede confirmar aunque esté cancelada
+    rs.cancelar(rid)
+    rs.confirmar(rid)
+    assert rs.obtener(rid).estado == "CONFIRMADA"
+    with pytest.raises(ValueError, match="no encontrada"):
+        rs.confirmar(999_999)
+
+
+def _datos_reserva(tid, **extra):
+    return {
+        "tipo_propiedad": "TERRENO",
+        "propiedad_id": tid,
+        "cliente": "Cliente RS",
+        "fecha_reserva": "2025-11-07",
+        "monto_reserva": 500.0,
+        **extra,
+    }
+
+
+def test_crear_y_eliminar_respetan_el_estado_de_la_propiedad():
+    ts = TerrenoService()
+    rs = ReservaService()
+    t1 = ts.crear({"manzana": "RS", "numero_lote": "1", "superficie": 100.0})
+    t2 = ts.crear({"manzana": "RS", "numero_lote": "2", "superficie": 100.0})
+
+    rid = rs.crear(_datos_reserva(t1))  # ACTIVA por defecto
+    assert ts.obtener(t1).estado == "RESERVADO"
+    rs.crear(_datos_reserva(t2, estado="CANCELADA"))
+    assert ts.obtener(t2).estado == "DISPONIBLE"
+
+    rs.eliminar(rid)
+    assert rs.obtener(rid) is None
+    assert ts.obtener(t1).estado == "DISPONIBLE"
+
+
+def test_actualizar_estado_libera_o_reserva_la_propiedad():
+    ts = TerrenoService()
+    rs = ReservaService()
+    tid = ts.crear({"manzana": "RS", "numero_lote": "3", "superficie": 100.0})
+    rid = rs.reservar(_datos_reserva(tid))
+
+    rs.actualizar(rid, {"estado": "CANCELADA"})
+    assert ts.obtener(tid).estado == "DISPONIBLE"
+
+    rs.actualizar(rid, {"estado": "ACTIVA"})
+    assert ts.obtener(tid).estado == "RESERVADO"
+
+    # confirmar no libera, igual que confirmar()
+    rs.actualizar(rid, {"estado": "CONFIRMADA"})
+    assert ts.obtener(tid).estado == "RESERVADO"
+
+    ts.cambiar_estado(tid, "DISPONIBLE")
+    otra = rs.reservar(_datos_reserva(tid, cliente="Otro"))
+    with pytest.raises(ValueError, match="no está disponible"):
+        rs.actualizar(rid, {"estado": "ACTIVA"})
+    assert rs.obtener(rid).estado == "CONFIRMADA"
+    assert rs.obtener(otra).estado == "ACTIVA"
+
+
+def test_actualizar_propiedad_de_reserva_activa_mueve_el_bloqueo():
+    ts = TerrenoService()
+    rs = ReservaService()
+    t1 = ts.crear({"manzana": "RS", "numero_lote": "4", "superficie": 100.0})
+    t2 = ts.crear({"manzana": "RS", "numero_lote": "5", "superficie": 100.0})
+    vendido = ts.crear({"manzana": "RS", "numero_lote": "6", "superficie": 100.0, "estado": "VENDIDO"})
+    rid = rs.reservar(_datos_reserva(t1))
+
+    rs.actualizar(rid, {"propiedad_id": t2})
+    assert (ts.obtener(t1).estado, ts.obtener(t2).estado) == ("DISPONIBLE", "RESERVADO")
+
+    # a una propiedad no disponible: se rechaza y no cambia nada
+    with pytest.raises(ValueError, match="no está disponible"):
+        rs.actualizar(rid, {"propiedad_id": vendido})
+    assert rs.obtener(rid).propiedad_id == t2
+    assert (ts.obtener(t2).estado, ts.obtener(vendido).estado) == ("RESERVADO", "VENDIDO")
+
+    # una reserva no activa se puede mover sin tocar propiedades
+    rs.cancelar(rid)
+    rs.actualizar(rid, {"propiedad_id": vendido})
+    assert (ts.obtener(t2).estado, ts.obtener(vendido).estado) == ("DISPONIBLE", "VENDIDO")
+
+
+def test_buscar_por_texto_incluye_propiedad_monto_y_estado():
+    ts = TerrenoService()
+    rs = ReservaService()
+    tid = ts.crear({"manzana": "RB", "numero_lote": "1", "superficie": 100.0})
+    rid = rs.reservar(_datos_reserva(tid, cliente="Cliente RB", monto_reserva=4321.5))
+
+    assert rid in [r.id for r in rs.buscar(texto="4321.5")]
+    assert rid in [r.id for r in rs.buscar(texto=str(tid))]
+    assert rid in [r.id for r in rs.buscar(texto="activa")]
+    # la referencia que muestra el listado
+    assert [r.id for r in rs.buscar(texto=f"TERRENO #{tid}")] == [rid]
+    assert [r.id for r in rs.buscar(texto=f"#{tid}")] == [rid]
+    assert all(r.tipo_propiedad == "EDIFICACION" for r in rs.buscar(texto=f"edificacion #{tid}"))
@@ -0,0 +1,28 @@
+from config.settings import SQLITE_PROFILES, load_sqlite_profile
+from core.database import Database
+
+
+def test_sqlite_profile_preset_and_overrides(monkeypatch):
+    monkeypatch.setenv("DB_PROFILE", "high-throughput")
+    monkeypatch.setenv("DB_CACHE_SIZE_KB", "1024")
+    monkeypatch.setenv("DB_SYNCHRONOUS", "bogus")
+    p = load_sqlite_profile()
+    assert p.name == "high-throughput"
+    assert p.cache_size_kb == 1024
+    # valores inválidos caen al preset
+    assert p.synchronous == SQLITE_PROFILES["high-throughput"].synchronous
+
+
+def test_unknown_profile_falls_back_to_default(monkeypatch):
+    monkeypatch.setenv("DB_PROFILE", "turbo")
+    assert load_sqlite_profile().name == "desktop-safe"
+
+
+def test_diagnostics_report_effective_pragmas():
+    diag = Database().diagnostics()
+    profile = Database().settings.sqlite_profile
+    assert diag["profile"] == profile.name
+    assert str(diag["journal_mode"]).upper() == profile.journal_mode
+    assert diag["synchronous"] == profile.synchronous
+    assert diag["busy_timeout"] == profile.busy_timeout_ms
+    assert diag["cache_size"] == -profile.cache_size_kb
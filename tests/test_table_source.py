@@ -0,0 +1,105 @@
+from view.widgets.table_source import ListSource, PagedSource
+
+
+def _rows(n):
+    return [(str(i), [f"Cliente {i:05d}", i]) for i in range(n)]
+
+
+def test_list_source_ventana_filtro_y_orden():
+    src = ListSource(_rows(1000))
+    assert len(src) == 1000
+    assert [iid for iid, _ in src.rows(995, 20)] == ["995", "996", "997", "998", "999"]
+
+    src.set_query("cliente 0099")
+    assert [iid for iid, _ in src.rows(0, 50)] == [str(i) for i in range(990, 1000)]
+
+    src.set_order(0, desc=True)
+    assert src.rows(0, 1)[0][0] == "999"
+    src.set_query("")
+    assert len(src) == 1000 and src.rows(0, 1)[0][0] == "999"
+
+
+def test_paged_source_lee_solo_las_paginas_visibles():
+    data = _rows(50_000)
+    llamadas = []
+
+    def fetch(offset, limit, query, order):
+        llamadas.append((offset, limit, query, order))
+        return data[offset : offset + limit]
+
+    src = PagedSource(count=lambda q: len(data), fetch=fetch, page_size=100, max_pages=2)
+    assert len(src) == 50_000
+    assert llamadas == []
+
+    # ventana que cruza dos páginas
+    assert [iid for iid, _ in src.rows(190, 20)] == [str(i) for i in range(190, 210)]
+    assert [c[0] for c in llamadas] == [100, 200]
+    src.rows(195, 10)
+    assert len(llamadas) == 2  # cacheadas
+
+    src.rows(49_990, 30)  # recorta al final y desaloja la página más vieja
+    assert [c[0] for c in llamadas[2:]] == [49_900]
+    src.rows(100, 5)
+    assert [c[0] for c in llamadas[3:]] == [100]
+
+    src.set_order(1, desc=True)
+    src.rows(0, 1)
+    assert llamadas[-1] == (0, 100, "", (1, True))
+
+
+def test_list_source_upsert_remove_y_claves():
+    src = ListSource(_rows(5), query="cliente 00000")
+    assert src.iids() == ["0"]
+
+    # upsert: reemplaza por iid (recalcula la clave) y agrega al final los nuevos
+    src.upsert([("3", ["Cliente 00000 bis", 3]), ("9", ["cliente 00000 nuevo", 9])])
+    assert src.iids() == ["0", "3", "9"]
+    assert src.get("3") == ["Cliente 00000 bis", 3]
+    assert len(src.all_iids()) == 6
+
+    src.remove(["0", "nope"])
+    assert src.iids() == ["3", "9"] and "0" not in src
+
+    # la clave separa celdas: no hay match a caballo entre columnas
+    src.set_query("bis3")
+    assert src.iids() == []
+
+
+def test_orden_tipado_y_colacion_espanola():
+    rows = [
+        ("1", ["Ñandú", "1000", "2025-02-01"]),
+        ("2", ["nube", "200", "15/01/2025"]),
+        ("3", ["Oso", "", "2024-12-31"]),
+        ("4", ["árbol", "35,5", ""]),
+        ("5", ["Lote 10", "200", "2025-01-15"]),
+        ("6", ["Lote 2", "200", "2025-01-15"]),
+    ]
+    src = ListSource(rows, kinds=("text", "number", "date"))
+
+    src.set_order(0)
+    assert src.iids() == ["4", "6", "5", "2", "1", "3"]  # á≈a, natural, n < ñ < o
+
+    src.set_order(1)  # numérico; vacío al final; empates en orden de carga
+    assert src.iids() == ["4", "2", "5", "6", "1", "3"]
+    src.set_order(1, desc=True)  # inversión estable: empates siguen en orden de carga
+    assert src.iids() == ["3", "1", "2", "5", "6", "4"]
+
+    src.set_order(1, then=(0,))  # secundaria: desempata por nombre
+    assert src.iids() == ["4", "6", "5", "2", "1", "3"]
+
+    src.set_order(2)
+    assert src.iids() == ["3", "2", "5", "6", "1", "4"]
+
+
+def test_orden_cachea_permutaciones():
+    src = ListSource(_rows(100_000), kinds=("text", "number"))
+    src.set_order(1, desc=True)
+    assert src.rows(0, 1)[0][0] == "99999"
+    perms = dict(src._perms)
+    src.set_order(1)
+    src.set_order(1, desc=True)
+    assert src._perms == perms and src.rows(0, 1)[0][0] == "99999"
+
+    # actualizar una fila invalida el caché y recalcula sólo su clave
+    src.upsert([("5", ["Cliente 00005", 10**9])])
+    assert src.rows(0, 1)[0][0] == "5"
@@ -39,3 +39,120 @@ def test_crear_con_nomenclatura_duplicate(test_database):
     with pytest.raises(ValueError):
         svc.crear_con_nomenclatura(datos)
 
+
+
+def test_duplicado_manzana_lote_por_sondeo_y_por_indice(test_database, monkeypatch):
+    svc = TerrenoService()
+    datos = {"manzana": "UQ", "numero_lote": "1", "superficie": 100}
+    tid = svc.crear(datos)
+    assert svc.repo.exists_by_manzana_lote("UQ", "1")
+    assert not svc.repo.exists_by_manzana_lote("UQ", "1", exclude_id=tid)
+
+    with pytest.raises(ValueError, match="Ya existe un terreno con esa manzana"):
+        svc.crear(datos)
+
+    # si el sondeo no lo detecta (alta concurrente), el índice único da el mismo error
+    monkeypatch.setattr(svc, "_exists_duplicate", lambda *a, **k: False)
+    with pytest.raises(ValueError, match="Ya existe un terreno con esa manzana"):
+        svc.crear(datos)
+    otro = svc.crear({"manzana": "UQ", "numero_lote": "2", "superficie": 100})
+    with pytest.raises(ValueError, match="Otro terreno con la misma manzana"):
+        svc.actualizar(otro, {"numero_lote": "1"})
+
+
+def test_patch_y_cambio_de_estado_en_una_sentencia(test_database):
+    from core.query_monitor import get_query_monitor
+
+    svc = TerrenoService()
+    tid = svc.crear({"manzana": "DT", "numero_lote": "1", "superficie": 100})
+    t = svc.obtener(tid)
+    assert t.changes() == {}
+    t.observaciones = "nueva"
+    t.superficie = 100  # mismo valor: no cuenta como cambio
+    assert t.changes() == {"observaciones": "nueva"}
+
+    events = []
+    monitor = get_query_monitor()
+    monitor.add_hook(events.append)
+    try:
+        svc.cambiar_estado(tid, "RESERVADO")
+    finally:
+        monitor.remove_hook(events.append)
+    assert [e.sql.split()[0] for e in events] == ["UPDATE"]
+
+    with pytest.raises(ValueError, match="Sólo se puede reservar"):
+        svc.cambiar_estado(tid, "RESERVADO")
+    svc.cambiar_estado(tid, "VENDIDO")
+    with pytest.raises(ValueError, match="revertir"):
+        svc.cambiar_estado(tid, "DISPONIBLE")
+    with pytest.raises(ValueError, match="no encontrado"):
+        svc.cambiar_estado(999999, "VENDIDO")
+
+    svc.actualizar(tid, {"observaciones": "esquina"})
+    assert svc.obtener(tid).observaciones == "esquina"
+    with pytest.raises(ValueError):
+        svc.repo.patch(tid, {"loteo_id": 1})
+
+
+def test_cambiar_estado_many_y_asignar_loteo_many(test_database):
+    from services.loteo_service import LoteoService
+
+    svc = TerrenoService()
+    ids = [svc.crear({"manzana": "MM", "numero_lote": str(i), "superficie": 100}) for i in range(4)]
+    svc.cambiar_estado(ids[3], "VENDIDO")
+
+    res = svc.cambiar_estado_many([*ids, 999999], "RESERVADO")
+    assert res.aplicados == ids[:3]
+    assert res.rechazados == {ids[3]: "No se puede revertir un terreno VENDIDO.", 999999: "Terreno no encontrado."}
+    assert [svc.obtener(i).estado for i in ids] == ["RESERVADO", "RESERVADO", "RESERVADO", "VENDIDO"]
+
+    res = svc.cambiar_estado_many(ids, "DISPONIBLE")
+    assert res.rechazados == {ids[3]: "No se puede revertir un terreno VENDIDO."}
+
+    lid = LoteoService().crear({"nombre": "Loteo MM"})
+    res = svc.asignar_loteo_many([*ids, 999999], lid)
+    assert res.aplicados == ids and list(res.rechazados) == [999999]
+    assert sorted(LoteoService().obtener(lid).terrenos_ids) == ids
+    with pytest.raises(ValueError, match="Loteo no encontrado"):
+        svc.asignar_loteo_many(ids, 999999)
+    assert svc.asignar_loteo_many(ids, None).ok
+    assert LoteoService().obtener(lid).terrenos_ids == []
+
+
+def test_sugerir_por_prefijo_paginado():
+    svc = TerrenoService()
+    for n in range(1, 13):
+        svc.crear({"manzana": "PF", "numero_lote": f"{n:02d}", "superficie": 100.0, "nomenclatura": f"PFX-{n:02d}"})
+    svc.crear({"manzana": "PFZ", "numero_lote": "1", "superficie": 100.0})
+
+    pagina = svc.sugerir("pf", limite=5)
+    assert [(t.manzana, t.numero_lote) for t in pagina] == [("PF", f"{n:02d}") for n in range(1, 6)]
+    resto = []
+    while pagina:
+        resto.extend(pagina)
+        ult = pagina[-1]
+        pagina = svc.sugerir("pf", despues_de=(ult.manzana, ult.numero_lote, ult.id), limite=5)
+    assert [(t.manzana, t.numero_lote) for t in resto][-2:] == [("PF", "12"), ("PFZ", "1")]
+    assert len({t.id for t in resto}) == 13
+
+    assert [t.numero_lote for t in svc.sugerir("Mz PF lote 1")] == ["10", "11", "12"]
+    assert [t.nomenclatura for t in svc.sugerir("pfx-0", limite=3)] == ["PFX-01", "PFX-02", "PFX-03"]
+
+
+def test_sugerir_no_distingue_mayusculas():
+    svc = TerrenoService()
+    a = svc.crear({"manzana": "Mc", "numero_lote": "1", "superficie": 100.0, "nomenclatura": "Mc-12"})
+    b = svc.crear({"manzana": "mc", "numero_lote": "1", "superficie": 100.0})
+    c = svc.crear({"manzana": "MC", "numero_lote": "2", "superficie": 100.0})
+
+    assert {t.id for t in svc.sugerir("mC")} == {a, b, c}
+    assert {t.id for t in svc.sugerir("mz mc lote 1")} == {a, b}
+    assert [t.id for t in svc.sugerir("MC-1")] == [a]
+
+    # lotes que sólo difieren en mayúsculas: el id desempata y la paginación no saltea ninguno
+    vistos, pagina = [], svc.sugerir("mc", limite=1)
+    while pagina:
+        vistos.extend(t.id for t in pagina)
+        ult = pagina[-1]
+        pagina = svc.sugerir("mc", despues_de=(ult.manzana, ult.numero_lote, ult.id), limite=1)
+    assert vistos == [a, b, c]